@@ -0,0 +1,106 @@
+"""
+Benchmark of the image presets used before pages are sent to the vision model.
+
+For every sample document and preset it reports the Base64 payload size, the
+preprocessing + encoding time and the end-to-end latency per page (rendering +
+encoding, plus the vision call when --vision is given).
+
+Usage:
+    python -m api.benchmarks.bench_image_presets --documents documents --pages 3
+    XAI_API_KEY=... python -m api.benchmarks.bench_image_presets --vision
+"""
+import argparse
+import asyncio
+import glob
+import os
+import statistics
+import time
+from typing import List, Tuple
+from PIL import Image
+from api.services.llm_gateway import get_gateway
+from api.utils.image_preprocessing import IMAGE_PRESETS
+from api.utils.image_utils import encode_page_to_base64, get_pdf_page_count, render_pdf_page
+
+VISION_MODEL_NAME = "grok-vision-beta"
+VISION_PROMPT = "Analyze this document and extract all form fields as JSON."
+
+
+def load_pages(path: str, max_pages: int, dpi: int) -> List[Tuple[Image.Image, float]]:
+    """Loads up to max_pages pages of a document with the time spent rendering each one."""
+    if not path.lower().endswith(".pdf"):
+        start = time.perf_counter()
+        image = Image.open(path)
+        image.load()
+        return [(image, time.perf_counter() - start)]
+
+    pages = []
+    for page_number in range(1, min(max_pages, get_pdf_page_count(path)) + 1):
+        start = time.perf_counter()
+        image = render_pdf_page(path, page_number, dpi)
+        pages.append((image, time.perf_counter() - start))
+    return pages
+
+
+async def vision_latency(gateway, base64_image: str) -> float:
+    start = time.perf_counter()
+    await gateway.chat_completion(
+        task="vision",
+        model=VISION_MODEL_NAME,
+        messages=[{
+            "role": "user",
+            "content": [
+                {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}", "detail": "low"}},
+                {"type": "text", "text": VISION_PROMPT},
+            ],
+        }],
+    )
+    return time.perf_counter() - start
+
+
+async def run(documents: List[str], presets: List[str], max_pages: int, dpi: int, vision: bool) -> None:
+    gateway = get_gateway() if vision else None
+
+    header = f"{'document':<28} {'preset':<11} {'pages':>5} {'payload KB':>11} {'encode ms':>10} {'e2e ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for path in documents:
+        pages = load_pages(path, max_pages, dpi)
+        for preset_name in presets:
+            payloads, encode_times, e2e_times = [], [], []
+            for image, render_time in pages:
+                start = time.perf_counter()
+                base64_image = encode_page_to_base64(image, preset_name)
+                encode_time = time.perf_counter() - start
+                e2e = render_time + encode_time
+                if gateway:
+                    e2e += await vision_latency(gateway, base64_image)
+                payloads.append(len(base64_image))
+                encode_times.append(encode_time)
+                e2e_times.append(e2e)
+            print(
+                f"{os.path.basename(path)[:28]:<28} {preset_name:<11} {len(pages):>5} "
+                f"{statistics.mean(payloads) / 1024:>11.1f} {statistics.mean(encode_times) * 1000:>10.1f} "
+                f"{statistics.mean(e2e_times) * 1000:>9.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", default="documents", help="Directory with sample PDFs/images")
+    parser.add_argument("--presets", nargs="*", default=list(IMAGE_PRESETS), help="Presets to compare")
+    parser.add_argument("--pages", type=int, default=3, help="Pages per PDF")
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--vision", action="store_true", help="Include a real vision call in the end-to-end latency")
+    args = parser.parse_args()
+
+    documents = sorted(
+        path for pattern in ("*.pdf", "*.jpg", "*.jpeg", "*.png")
+        for path in glob.glob(os.path.join(args.documents, pattern))
+    )
+    if not documents:
+        raise SystemExit(f"No sample documents found in {args.documents}")
+    asyncio.run(run(documents, args.presets, args.pages, args.dpi, args.vision))
+
+
+if __name__ == "__main__":
+    main()
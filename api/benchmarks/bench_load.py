@@ -0,0 +1,208 @@
+"""
+End-to-end load test of the GovAssist API at a target request rate.
+
+Requests are sent open-loop (a new one every 1/RPS seconds on average, whether
+or not earlier ones finished), spread over the endpoints by weight. At the end
+throughput, errors and p50/p95/p99 latency are reported per endpoint. The run
+fails when an endpoint has no successful request, errs (or drops requests)
+more often than --max-error-rate, or is slower than --max-p95, so it can gate
+a deploy.
+
+Run the API against the LLM stand-in to avoid spending x.ai quota:
+    uvicorn api.benchmarks.llm_standin:app --port 9000
+    XAI_BASE_URL=http://localhost:9000/v1 uvicorn api.main:app --port 8000
+
+Usage:
+    python -m api.benchmarks.bench_load --base-url http://localhost:8000 --rps 5 --duration 60 \\
+        --token $FIREBASE_ID_TOKEN --document documents/sample.pdf --max-p95 generate-response=3
+"""
+import argparse
+import asyncio
+import json
+import mimetypes
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import httpx
+from api.services.model_router import percentile
+
+QUESTIONS = [
+    "How do I apply for a driver's license?",
+    "What documents do I need to renew my passport?",
+    "How can I register a newborn child?",
+    "Where do I report a change of address?",
+    "How do I apply for unemployment benefits?",
+]
+
+DEFAULT_MIX = {"generate-response": 6, "analyze-document": 2, "validate-document": 2}
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, latency: float, error: Optional[str]) -> None:
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        else:
+            self.latencies.append(latency)
+
+    def summary(self, duration: float) -> dict:
+        latencies = sorted(self.latencies)
+        errors = sum(self.errors.values())
+        sent = len(latencies) + errors
+        return {
+            "ok": len(latencies),
+            "errors": errors,
+            "error_rate": errors / sent if sent else 0.0,
+            "error_kinds": self.errors,
+            "throughput_rps": len(latencies) / duration if duration else 0.0,
+            "p50_seconds": percentile(latencies, 0.5),
+            "p95_seconds": percentile(latencies, 0.95),
+            "p99_seconds": percentile(latencies, 0.99),
+        }
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, document: Optional[str], mix: Dict[str, int]):
+        self.client = client
+        self.mix = mix
+        self.stats = {endpoint: EndpointStats() for endpoint in mix}
+        self.document = None
+        if document:
+            with open(document, "rb") as f:
+                self.document = (os.path.basename(document), f.read(),
+                                 mimetypes.guess_type(document)[0] or "application/pdf")
+        elif any(endpoint != "generate-response" and weight for endpoint, weight in mix.items()):
+            raise SystemExit("--document is required for the document endpoints")
+
+    def _request(self, endpoint: str):
+        if endpoint == "generate-response":
+            return self.client.post("/generate-response", json={"question": random.choice(QUESTIONS), "start": True})
+        return self.client.post(f"/{endpoint}", files={"file": self.document})
+
+    async def _send(self, endpoint: str) -> None:
+        start = time.perf_counter()
+        error = None
+        try:
+            response = await self._request(endpoint)
+            if response.status_code >= 400:
+                error = str(response.status_code)
+        except httpx.HTTPError as e:
+            error = type(e).__name__
+        self.stats[endpoint].record(time.perf_counter() - start, error)
+
+    async def run(self, rps: float, duration: float, max_in_flight: int) -> float:
+        """Sends requests for ``duration`` seconds and returns the wall time until all finished."""
+        endpoints = [endpoint for endpoint, weight in self.mix.items() if weight > 0]
+        weights = [self.mix[endpoint] for endpoint in endpoints]
+        slots = asyncio.Semaphore(max_in_flight)
+        tasks = []
+
+        async def send(endpoint: str) -> None:
+            try:
+                await self._send(endpoint)
+            finally:
+                slots.release()
+
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            # Poisson arrivals; when the client itself saturates, the request is counted as dropped
+            await asyncio.sleep(random.expovariate(rps))
+            endpoint = random.choices(endpoints, weights)[0]
+            if slots.locked():
+                self.stats[endpoint].record(0.0, "dropped")
+                continue
+            await slots.acquire()
+            tasks.append(asyncio.create_task(send(endpoint)))
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+
+def parse_pairs(values: List[str], cast) -> Dict[str, float]:
+    pairs = {}
+    for value in values:
+        key, _, raw = value.partition("=")
+        pairs[key] = cast(raw)
+    return pairs
+
+
+def print_report(report: Dict[str, dict]) -> None:
+    header = f"{'endpoint':<20} {'ok':>6} {'errors':>7} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, stats in report.items():
+        print(
+            f"{endpoint:<20} {stats['ok']:>6} {stats['errors']:>7} {stats['throughput_rps']:>7.2f} "
+            f"{stats['p50_seconds'] * 1000:>8.0f} {stats['p95_seconds'] * 1000:>8.0f} {stats['p99_seconds'] * 1000:>8.0f}"
+        )
+        if stats["error_kinds"]:
+            print(f"{'':<20} errors: {stats['error_kinds']}")
+
+
+def check_gates(report: Dict[str, dict], max_error_rate: float, max_p95: Dict[str, float]) -> List[str]:
+    """Returns why the run fails; latency percentiles only count when requests succeeded."""
+    failures = []
+    for endpoint, stats in report.items():
+        if stats["ok"] == 0:
+            failures.append(f"{endpoint}: no successful requests ({stats['errors']} errors)")
+            continue
+        if stats["error_rate"] > max_error_rate:
+            failures.append(f"{endpoint}: error rate {stats['error_rate']:.1%} > {max_error_rate:.1%}")
+        limit = max_p95.get(endpoint)
+        if limit is not None and stats["p95_seconds"] > limit:
+            failures.append(f"{endpoint}: p95 {stats['p95_seconds']:.2f}s > {limit:.2f}s")
+    return failures
+
+
+async def run(args) -> int:
+    headers = {name.strip(): value.strip() for name, _, value in (header.partition(":") for header in args.header)}
+    if args.token:
+        headers["Authorization"] = f"Bearer {args.token}"
+    mix = parse_pairs(args.mix, int) if args.mix else DEFAULT_MIX
+
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=args.timeout,
+                                 limits=httpx.Limits(max_connections=args.max_in_flight)) as client:
+        load_test = LoadTest(client, args.document, mix)
+        elapsed = await load_test.run(args.rps, args.duration, args.max_in_flight)
+
+    report = {
+        endpoint: stats.summary(elapsed)
+        for endpoint, stats in load_test.stats.items() if mix[endpoint] > 0
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    failures = check_gates(report, args.max_error_rate, parse_pairs(args.max_p95, float))
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--rps", type=float, default=2.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to send requests for")
+    parser.add_argument("--max-in-flight", type=int, default=100, help="Concurrent requests before dropping")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--document", help="Sample PDF/image uploaded to the document endpoints")
+    parser.add_argument("--mix", nargs="*", help="Endpoint weights, e.g. generate-response=8 validate-document=2")
+    parser.add_argument("--token", help="Firebase ID token sent as a Bearer token")
+    parser.add_argument("--header", nargs="*", default=[], help="Extra headers, e.g. X-Session-ID:load-test")
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                        help="Fail when a larger share of requests errs or is dropped")
+    parser.add_argument("--max-p95", nargs="*", default=[], help="Fail when slower, e.g. generate-response=3")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
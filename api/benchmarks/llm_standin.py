@@ -0,0 +1,248 @@
+"""
+OpenAI-compatible stand-in for the x.ai API, for load tests without real quota.
+
+Replays recorded chat, vision and embedding responses with a realistic
+latency: sampled from the latencies measured while recording, or from a
+log-normal distribution per kind when nothing was recorded. A request with a
+recorded twin (same messages, tools or input) gets that exact response; any
+other request gets a recording of the same kind, or a synthetic response.
+
+In record mode every request is forwarded to the real API and the response
+and its latency are appended to the recordings file.
+
+Usage:
+    # Replay (point GovAssist at it with XAI_BASE_URL=http://localhost:9000/v1)
+    STANDIN_RECORDINGS=recordings.json uvicorn api.benchmarks.llm_standin:app --port 9000
+    # Record real responses while using the app
+    STANDIN_MODE=record XAI_API_KEY=... STANDIN_RECORDINGS=recordings.json uvicorn api.benchmarks.llm_standin:app --port 9000
+
+In-process, e.g. in tests:
+    configure_gateway(transport=httpx.ASGITransport(app=create_app(...)), base_url="http://standin/v1")
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+STANDIN_MODE = os.getenv("STANDIN_MODE", "replay")
+STANDIN_RECORDINGS = os.getenv("STANDIN_RECORDINGS", "llm_recordings.json")
+# Multiplies every simulated latency; 0 answers immediately
+STANDIN_LATENCY_SCALE = float(os.getenv("STANDIN_LATENCY_SCALE", "1"))
+STANDIN_UPSTREAM_URL = os.getenv("STANDIN_UPSTREAM_URL", os.getenv("XAI_BASE_URL", "https://api.x.ai/v1"))
+
+# Latency (median, p95) in seconds per kind, used when no latencies were recorded
+DEFAULT_LATENCIES = {
+    "chat": (1.2, 4.0),
+    "vision": (3.0, 9.0),
+    "embeddings": (0.15, 0.4),
+}
+# Share of a streamed completion's latency spent before the first chunk
+STREAM_FIRST_CHUNK_SHARE = 0.3
+STREAM_CHUNK_WORDS = 3
+
+SYNTHETIC_CONTENT = {
+    "chat": "This is a stand-in answer from the load-test server.",
+    "vision": json.dumps({"fields": [{
+        "field_name": "Full Name", "position": {"x": 50, "y": 120, "width": 300, "height": 24},
+        "required_value": "Text", "is_required": True,
+    }]}),
+}
+EMBEDDING_DIMENSIONS = 256
+
+
+def request_kind(endpoint: str, body: dict) -> str:
+    """"embeddings", "vision" (a chat request with an image) or "chat"."""
+    if endpoint == "embeddings":
+        return "embeddings"
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, list) and any(part.get("type") == "image_url" for part in content):
+            return "vision"
+    return "chat"
+
+
+def recording_key(kind: str, body: dict) -> str:
+    """Identifies a request by what it asks, not by the model it was routed to."""
+    relevant = {"input": body.get("input")} if kind == "embeddings" else {
+        "messages": body.get("messages"), "tools": body.get("tools"), "tool_choice": body.get("tool_choice"),
+    }
+    payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{kind}\0{payload}".encode("utf-8")).hexdigest()
+
+
+def lognormal_latency(median: float, p95: float, rng: random.Random) -> float:
+    """Samples a log-normal latency with the given median and 95th percentile."""
+    sigma = max(0.0, math.log(p95 / median) / 1.645)
+    return rng.lognormvariate(math.log(median), sigma)
+
+
+class RecordingStore:
+    """Recorded responses and latencies, kept in memory and persisted as a JSON list."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.recordings: List[dict] = []
+        self._by_key: Dict[str, dict] = {}
+        self._by_kind: Dict[str, List[dict]] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for recording in json.load(f):
+                    self._index(recording)
+
+    def _index(self, recording: dict) -> None:
+        self.recordings.append(recording)
+        self._by_key[recording["key"]] = recording
+        self._by_kind.setdefault(recording["kind"], []).append(recording)
+
+    def find(self, kind: str, key: str, rng: random.Random) -> Optional[dict]:
+        recording = self._by_key.get(key)
+        if recording is None and self._by_kind.get(kind):
+            recording = rng.choice(self._by_kind[kind])
+        return recording
+
+    def latencies(self, kind: str) -> List[float]:
+        return [recording["latency"] for recording in self._by_kind.get(kind, [])]
+
+    def add(self, recording: dict) -> None:
+        with self._lock:
+            self._index(recording)
+            if self.path:
+                with open(self.path, "w", encoding="utf-8") as f:
+                    json.dump(self.recordings, f, ensure_ascii=False)
+
+
+def _synthetic_response(endpoint: str, kind: str, body: dict) -> dict:
+    if kind == "embeddings":
+        inputs = body.get("input")
+        inputs = inputs if isinstance(inputs, list) else [inputs]
+        data = []
+        for index, text in enumerate(inputs):
+            # Deterministic per input, so identical questions get identical vectors
+            rng = random.Random(hashlib.sha256(str(text).encode("utf-8")).digest())
+            data.append({"object": "embedding", "index": index,
+                         "embedding": [rng.uniform(-1, 1) for _ in range(EMBEDDING_DIMENSIONS)]})
+        return {"object": "list", "data": data, "model": body.get("model"),
+                "usage": {"prompt_tokens": 0, "total_tokens": 0}}
+    content = SYNTHETIC_CONTENT[kind]
+    prompt_tokens = len(json.dumps(body.get("messages", []), default=str)) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion", "created": int(time.time()),
+        "model": body.get("model"),
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                  "total_tokens": prompt_tokens + len(content) // 4},
+    }
+
+
+def _stream_chunks(response: dict) -> List[dict]:
+    """Splits a recorded completion into chat.completion.chunk events."""
+    message = response["choices"][0]["message"]
+    base = {"id": response["id"], "object": "chat.completion.chunk", "created": response["created"],
+            "model": response.get("model")}
+    words = (message.get("content") or "").split(" ")
+    chunks = [
+        {**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": " ".join(words[i:i + STREAM_CHUNK_WORDS])
+                                                    + (" " if i + STREAM_CHUNK_WORDS < len(words) else "")},
+                              "finish_reason": None}]}
+        for i in range(0, len(words), STREAM_CHUNK_WORDS)
+    ]
+    for index, tool_call in enumerate(message.get("tool_calls") or []):
+        chunks.append({**base, "choices": [{"index": 0, "finish_reason": None, "delta": {"tool_calls": [
+            {"index": index, "id": tool_call["id"], "type": "function", "function": tool_call["function"]}]}}]})
+    chunks.append({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": response["choices"][0]["finish_reason"]}],
+                   "usage": response.get("usage")})
+    return chunks
+
+
+def create_app(
+    mode: str = STANDIN_MODE,
+    recordings: Optional[str] = STANDIN_RECORDINGS,
+    latency_scale: float = STANDIN_LATENCY_SCALE,
+    upstream_url: str = STANDIN_UPSTREAM_URL,
+    api_key: Optional[str] = None,
+    seed: Optional[int] = None,
+) -> FastAPI:
+    """
+    Builds the stand-in app.
+
+    :param mode: "replay" or "record".
+    :param recordings: JSON file with the recordings; None keeps them in memory only.
+    :param latency_scale: Factor applied to every simulated latency.
+    :param upstream_url: Real API used in record mode.
+    :param api_key: Key for the real API in record mode (defaults to XAI_API_KEY).
+    :param seed: Seed of the latency and recording choice, for repeatable runs.
+    """
+    if mode not in ("replay", "record"):
+        raise ValueError(f"Unknown stand-in mode: {mode}")
+    app = FastAPI(title="LLM stand-in")
+    store = RecordingStore(recordings)
+    rng = random.Random(seed)
+    app.state.store = store
+
+    def sample_latency(kind: str) -> float:
+        recorded = store.latencies(kind)
+        latency = rng.choice(recorded) if recorded else lognormal_latency(*DEFAULT_LATENCIES[kind], rng)
+        return latency * latency_scale
+
+    async def record(endpoint: str, kind: str, body: dict) -> dict:
+        start = time.perf_counter()
+        async with httpx.AsyncClient(timeout=120) as client:
+            upstream = await client.post(
+                f"{upstream_url}/{endpoint.replace('.', '/')}",
+                json={**body, "stream": False},
+                headers={"Authorization": f"Bearer {api_key or os.getenv('XAI_API_KEY')}"},
+            )
+        if upstream.status_code != 200:
+            raise HTTPException(status_code=upstream.status_code, detail=upstream.text)
+        response = upstream.json()
+        store.add({"kind": kind, "key": recording_key(kind, body), "latency": time.perf_counter() - start,
+                   "response": response})
+        return response
+
+    async def handle(endpoint: str, request: Request):
+        body = await request.json()
+        kind = request_kind(endpoint, body)
+        if mode == "record":
+            response = await record(endpoint, kind, body)
+            latency = 0.0
+        else:
+            recording = store.find(kind, recording_key(kind, body), rng)
+            response = recording["response"] if recording else _synthetic_response(endpoint, kind, body)
+            latency = sample_latency(kind)
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency)
+            return JSONResponse(response)
+
+        async def events():
+            chunks = _stream_chunks(response)
+            await asyncio.sleep(latency * STREAM_FIRST_CHUNK_SHARE)
+            for chunk in chunks:
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                await asyncio.sleep(latency * (1 - STREAM_FIRST_CHUNK_SHARE) / len(chunks))
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        return await handle("chat.completions", request)
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        return await handle("embeddings", request)
+
+    return app
+
+
+app = create_app()
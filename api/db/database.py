@@ -10,10 +10,17 @@ DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+asyncpg://postgres:password
 engine = create_async_engine(DATABASE_URL, echo=True)
 SessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
+def _create_missing_indexes(connection, metadata) -> None:
+    # create_all skips existing tables, so indexes added later are created here
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
 async def init_db():
     from api.db.models import Base
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_missing_indexes, Base.metadata)
 
 # Function to get async session
 @asynccontextmanager
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import insert
+from api.db.database import SessionLocal
+from api.db.models import ConversationMessage
+
+logger = logging.getLogger(__name__)
+
+# Bufor jest zapisywany, gdy ma tyle wierszy albo gdy od ostatniego zapisu minęło tyle sekund
+MESSAGE_SINK_BATCH_SIZE = int(os.getenv("MESSAGE_SINK_BATCH_SIZE", "100"))
+MESSAGE_SINK_FLUSH_SECONDS = float(os.getenv("MESSAGE_SINK_FLUSH_SECONDS", "0.5"))
+# Powyżej tej liczby niezapisanych wierszy (np. gdy baza nie odpowiada) add() czeka na zapis
+MESSAGE_SINK_MAX_BUFFER = int(os.getenv("MESSAGE_SINK_MAX_BUFFER", "10000"))
+
+
+class MessageSink:
+    """
+    Bufor zapisu wiadomości rozmów (write-behind).
+
+    Wiadomości dodane na ścieżce żądania trafiają do pamięci, a zadanie w tle
+    zapisuje je jednym wielowierszowym INSERT-em w jednej transakcji, gdy
+    bufor osiągnie ``batch_size`` wierszy lub minie ``flush_interval`` sekund.
+    Przy zamknięciu aplikacji bufor jest zapisywany w całości.
+
+    Odczyt sesji, która ma niezapisane wiadomości, najpierw wywołuje ``sync``,
+    więc widzi je razem z ich ID. Bez uruchomionego zadania w tle (skrypty,
+    testy) każda wiadomość jest zapisywana od razu.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        batch_size: int = MESSAGE_SINK_BATCH_SIZE,
+        flush_interval: float = MESSAGE_SINK_FLUSH_SECONDS,
+        max_buffer: int = MESSAGE_SINK_MAX_BUFFER,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: List[dict] = []
+        self._in_flight: List[dict] = []
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._flushed = asyncio.Condition()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._flushes = 0
+        self._flushed_rows = 0
+        self._failures = 0
+
+    async def add(self, user_id: str, session_id: str, role: str, content: str) -> None:
+        """
+        Dodaje wiadomość do bufora; znacznik czasu jest nadawany teraz, więc kolejność jest zachowana.
+
+        :param user_id: ID użytkownika.
+        :param session_id: ID sesji rozmowy.
+        :param role: Rola nadawcy wiadomości ("user" lub "assistant").
+        :param content: Treść wiadomości.
+        """
+        self._buffer.append({
+            "user_id": user_id,
+            "session_id": session_id,
+            "role": role,
+            "content": content,
+            "timestamp": datetime.utcnow(),
+        })
+        if self._task is None or len(self._buffer) >= self.max_buffer:
+            await self.flush()
+        elif len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def has_pending(self, user_id: str, session_id: Optional[str] = None) -> bool:
+        """Czy użytkownik (lub jego sesja) ma wiadomości, które nie są jeszcze zatwierdzone w bazie."""
+        return any(
+            row["user_id"] == user_id and (session_id is None or row["session_id"] == session_id)
+            for row in self._in_flight + self._buffer
+        )
+
+    async def sync(self, user_id: str, session_id: Optional[str] = None, wait: bool = False) -> None:
+        """
+        Zapewnia, że wiadomości użytkownika lub sesji są w bazie; wywoływane przed ich odczytem.
+
+        :param user_id: ID użytkownika.
+        :param session_id: ID sesji rozmowy; None oznacza wszystkie sesje użytkownika.
+        :param wait: Czeka na najbliższy zapis w tle zamiast wymuszać własny (dla zadań w tle,
+            którym nie zależy na czasie odpowiedzi, a wymuszony zapis rozbijałby paczki).
+        """
+        if not self.has_pending(user_id, session_id):
+            return
+        if wait and self._task is not None:
+            try:
+                async with self._flushed:
+                    await asyncio.wait_for(
+                        self._flushed.wait_for(lambda: not self.has_pending(user_id, session_id)),
+                        self.flush_interval * 4,
+                    )
+                return
+            except asyncio.TimeoutError:
+                pass
+        await self.flush()
+
+    async def flush(self) -> int:
+        """
+        Zapisuje cały bufor w jednej transakcji.
+
+        Przy błędzie wiersze wracają na początek bufora i błąd jest zgłaszany dalej.
+
+        :return: Liczba zapisanych wierszy.
+        """
+        async with self._flush_lock:
+            if not self._buffer:
+                return 0
+            self._in_flight, self._buffer = self._buffer, []
+            try:
+                async with self.session_factory() as session:
+                    await session.execute(insert(ConversationMessage), self._in_flight)
+                    await session.commit()
+            except BaseException:
+                self._failures += 1
+                self._buffer[:0] = self._in_flight
+                raise
+            finally:
+                rows, self._in_flight = self._in_flight, []
+            self._flushes += 1
+            self._flushed_rows += len(rows)
+        async with self._flushed:
+            self._flushed.notify_all()
+        return len(rows)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Błąd zapisu {len(self._buffer)} wiadomości, ponowna próba za {self.flush_interval}s: {e}")
+
+    def start(self) -> None:
+        """Uruchamia zapis w tle; wywoływane przy starcie aplikacji."""
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Zatrzymuje zapis w tle i zapisuje pozostałe wiadomości; wywoływane przy zamykaniu aplikacji."""
+        if self._task is not None:
+            # Zapis w toku jest dokończony, a nie przerywany, żeby nie powtórzyć zatwierdzonych wierszy
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._buffer) + len(self._in_flight),
+            "flushes": self._flushes,
+            "flushed_rows": self._flushed_rows,
+            "failures": self._failures,
+        }
+
+
+message_sink = MessageSink()
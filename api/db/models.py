@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
 from sqlalchemy.orm import declarative_base
 from datetime import datetime
 import json
@@ -7,13 +7,35 @@ Base = declarative_base()
 
 class ConversationMessage(Base):
     __tablename__ = "conversations"
+    # Indeksy złożone pokrywają filtrowanie i sortowanie (timestamp, id) bez osobnego sortowania;
+    # zastępują też pojedynczy indeks na user_id
+    __table_args__ = (
+        Index("ix_conversations_user_session_timestamp", "user_id", "session_id", "timestamp", "id"),
+        Index("ix_conversations_user_timestamp", "user_id", "timestamp", "id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, index=True)
+    user_id = Column(String)
     session_id = Column(String, index=True)
     role = Column(String)  # "user" or "assistant"
     content = Column(Text)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+class ConversationSummary(Base):
+    __tablename__ = "conversation_summaries"
+    session_id = Column(String, primary_key=True)
+    user_id = Column(String, index=True)
+    summary = Column(Text)
+    summarized_until = Column(Integer, default=0)  # ID ostatniej wiadomości uwzględnionej w podsumowaniu
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class ConversationTitle(Base):
+    __tablename__ = "conversation_titles"
+    session_id = Column(String, primary_key=True)
+    user_id = Column(String, index=True)
+    title = Column(String)
+    message_count = Column(Integer, default=0)  # Liczba wiadomości w chwili wygenerowania tytułu
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
 class DocumentAnalysis(Base):
     __tablename__ = "document_analysis"
     
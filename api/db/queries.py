@@ -1,7 +1,10 @@
+from typing import Optional
+from sqlalchemy import func, tuple_
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime
-from api.db.models import ConversationMessage, DocumentAnalysis, UserProfile
+from datetime import datetime, timedelta
+from api.db.models import ConversationMessage, ConversationSummary, ConversationTitle, DocumentAnalysis, UserProfile
+from api.utils.pagination_utils import decode_cursor, encode_cursor
 
 async def get_conversation_history(session: AsyncSession, user_id: str, session_id: str):
     """
@@ -18,12 +21,141 @@ async def get_conversation_history(session: AsyncSession, user_id: str, session_
             ConversationMessage.user_id == user_id,
             ConversationMessage.session_id == session_id
         )
-        .order_by(ConversationMessage.timestamp)
+        .order_by(ConversationMessage.timestamp, ConversationMessage.id)
     )
     messages = result.scalars().all()
 
     return [{"role": msg.role, "content": msg.content} for msg in messages]
 
+async def get_recent_messages(session: AsyncSession, user_id: str, session_id: str, limit: int):
+    """
+    Pobiera ostatnie wiadomości sesji, od najstarszej do najnowszej.
+
+    :param session: Obiekt sesji bazy danych.
+    :param user_id: ID użytkownika.
+    :param session_id: ID sesji rozmowy.
+    :param limit: Maksymalna liczba wiadomości.
+    :return: Lista obiektów ConversationMessage.
+    """
+    result = await session.execute(
+        select(ConversationMessage)
+        .where(
+            ConversationMessage.user_id == user_id,
+            ConversationMessage.session_id == session_id
+        )
+        .order_by(ConversationMessage.id.desc())
+        .limit(limit)
+    )
+    return list(reversed(result.scalars().all()))
+
+async def get_messages_between(session: AsyncSession, user_id: str, session_id: str, after_id: int, until_id: int):
+    """
+    Pobiera wiadomości sesji o ID z przedziału (after_id, until_id], od najstarszej.
+    """
+    result = await session.execute(
+        select(ConversationMessage)
+        .where(
+            ConversationMessage.user_id == user_id,
+            ConversationMessage.session_id == session_id,
+            ConversationMessage.id > after_id,
+            ConversationMessage.id <= until_id
+        )
+        .order_by(ConversationMessage.id)
+    )
+    return result.scalars().all()
+
+async def get_conversation_summary(session: AsyncSession, session_id: str):
+    result = await session.execute(
+        select(ConversationSummary)
+        .where(ConversationSummary.session_id == session_id)
+    )
+    return result.scalars().first()
+
+async def save_conversation_summary(session: AsyncSession, user_id: str, session_id: str, summary: str, summarized_until: int):
+    """
+    Zapisuje (lub nadpisuje) podsumowanie starszej części rozmowy.
+
+    :param summarized_until: ID ostatniej wiadomości uwzględnionej w podsumowaniu.
+    """
+    await session.merge(ConversationSummary(
+        session_id=session_id,
+        user_id=user_id,
+        summary=summary,
+        summarized_until=summarized_until,
+        updated_at=datetime.utcnow()
+    ))
+    await session.commit()
+
+async def count_messages(session: AsyncSession, user_id: str, session_id: str) -> int:
+    result = await session.execute(
+        select(func.count(ConversationMessage.id))
+        .where(
+            ConversationMessage.user_id == user_id,
+            ConversationMessage.session_id == session_id
+        )
+    )
+    return result.scalar_one()
+
+async def get_first_messages(session: AsyncSession, user_id: str, session_id: str, limit: int):
+    """
+    Pobiera pierwsze wiadomości sesji, od najstarszej.
+    """
+    result = await session.execute(
+        select(ConversationMessage)
+        .where(
+            ConversationMessage.user_id == user_id,
+            ConversationMessage.session_id == session_id
+        )
+        .order_by(ConversationMessage.id)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+async def get_conversation_title(session: AsyncSession, session_id: str):
+    result = await session.execute(
+        select(ConversationTitle)
+        .where(ConversationTitle.session_id == session_id)
+    )
+    return result.scalars().first()
+
+async def save_conversation_title(session: AsyncSession, user_id: str, session_id: str, title: str, message_count: int):
+    """
+    Zapisuje (lub nadpisuje) tytuł rozmowy.
+
+    :param message_count: Liczba wiadomości sesji w chwili wygenerowania tytułu.
+    """
+    await session.merge(ConversationTitle(
+        session_id=session_id,
+        user_id=user_id,
+        title=title,
+        message_count=message_count,
+        updated_at=datetime.utcnow()
+    ))
+    await session.commit()
+
+async def get_user_sessions(session: AsyncSession, user_id: str):
+    """
+    Pobiera listę sesji użytkownika z tytułami, od ostatnio aktywnej, jednym zapytaniem.
+
+    :param session: Obiekt sesji bazy danych.
+    :param user_id: ID użytkownika.
+    :return: Lista słowników z session_id, title, message_count i last_message_at.
+    """
+    last_message_at = func.max(ConversationMessage.timestamp).label("last_message_at")
+    result = await session.execute(
+        select(
+            ConversationMessage.session_id,
+            ConversationTitle.title,
+            func.count(ConversationMessage.id).label("message_count"),
+            last_message_at
+        )
+        .outerjoin(ConversationTitle, ConversationTitle.session_id == ConversationMessage.session_id)
+        .where(ConversationMessage.user_id == user_id)
+        .group_by(ConversationMessage.session_id, ConversationTitle.title)
+        .order_by(last_message_at.desc())
+    )
+    return [dict(row._mapping) for row in result]
+
 async def add_message(session: AsyncSession, user_id: str, session_id: str, role: str, content: str):
     """
     Dodaje wiadomość do historii konwersacji w bazie danych.
@@ -45,45 +177,52 @@ async def add_message(session: AsyncSession, user_id: str, session_id: str, role
     await session.commit()
 
 
-# Function to get conversations with pagination asynchronously
+TIME_RANGES = {"today": timedelta(days=1), "7days": timedelta(days=7), "30days": timedelta(days=30)}
+
+# Function to get conversations with keyset pagination asynchronously
 async def get_conversations_with_pagination(
-    session: AsyncSession, user_id: str, time_range: str, skip: int, limit: int
+    session: AsyncSession, user_id: str, time_range: str, limit: int, cursor: Optional[str] = None
 ):
     """
-    Pobiera konwersacje użytkownika z paginacją.
-    
+    Pobiera wiadomości użytkownika z paginacją kursorową, od najnowszych.
+
+    Zamiast OFFSET kolejna strona zaczyna się za ostatnim wierszem poprzedniej
+    (timestamp, id), więc koszt zapytania nie rośnie z numerem strony.
+
     :param session: Obiekt sesji bazy danych.
     :param user_id: ID użytkownika.
     :param time_range: Okres czasu ("today", "7days", "30days").
-    :param skip: Liczba pominiętych wyników.
     :param limit: Maksymalna liczba wyników.
-    :return: Lista konwersacji.
+    :param cursor: Kursor zwrócony z poprzednią stroną; None dla pierwszej strony.
+    :return: Słownik z listą wiadomości ("items") i kursorem następnej strony ("next_cursor") lub None.
+    :raises ValueError: Jeśli kursor jest nieprawidłowy.
     """
-    now = datetime.utcnow()
+    start_date = datetime.utcnow() - TIME_RANGES.get(time_range, TIME_RANGES["today"])  # Domyślnie: 1 dzień
 
-    if time_range == "today":
-        start_date = now - timedelta(days=1)
-    elif time_range == "7days":
-        start_date = now - timedelta(days=7)
-    elif time_range == "30days":
-        start_date = now - timedelta(days=30)
-    else:
-        start_date = now - timedelta(days=1)  # Default: 1 day
-
-    result = await session.execute(
+    query = (
         select(ConversationMessage)
         .where(
             ConversationMessage.user_id == user_id,
             ConversationMessage.timestamp >= start_date
         )
-        .order_by(ConversationMessage.timestamp.desc())
-        .offset(skip)
-        .limit(limit)
+        .order_by(ConversationMessage.timestamp.desc(), ConversationMessage.id.desc())
+        .limit(limit + 1)
     )
+    if cursor:
+        query = query.where(tuple_(ConversationMessage.timestamp, ConversationMessage.id) < decode_cursor(cursor))
+
+    result = await session.execute(query)
+    messages = result.scalars().all()
+    page = messages[:limit]
+    next_cursor = encode_cursor(page[-1].timestamp, page[-1].id) if len(messages) > limit else None
 
-    conversations = result.scalars().all()
-    
-    return [{"role": msg.role, "content": msg.content, "timestamp": msg.timestamp} for msg in conversations]
+    return {
+        "items": [
+            {"session_id": msg.session_id, "role": msg.role, "content": msg.content, "timestamp": msg.timestamp}
+            for msg in page
+        ],
+        "next_cursor": next_cursor,
+    }
 
 async def get_document_analysis(session, session_id: str):
     result = await session.execute(
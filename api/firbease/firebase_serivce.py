@@ -16,11 +16,11 @@ bucket = storage.bucket()
 
 class DocumentManager:
     @staticmethod
-    async def save_document(session_id: str, file_data: bytes, analysis_data: dict):
+    async def save_document(session_id: str, file_path: str, analysis_data: dict, content_type: str = 'application/pdf'):
         try:
-            # Zapisz plik PDF w Storage
+            # Zapisz plik w Storage prosto z dysku, bez wczytywania go do pamięci
             blob = bucket.blob(f"documents/{session_id}.pdf")
-            blob.upload_from_string(file_data, content_type='application/pdf')
+            blob.upload_from_filename(file_path, content_type=content_type)
             
             # Zapisz metadane w Firestore
             doc_ref = db.collection("document_analysis").document(session_id)
@@ -1,8 +1,18 @@
+import time
 from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from api.routes import router
 from api.db.database import init_db
+from api.db.message_sink import message_sink
 from api.middleware.firebase_middleware import FirebaseAuthMiddleware
+from api.utils.image_utils import image_pool
+from api.services.job_service import job_queue
+from api.services.llm_gateway import close_gateway, get_gateway
+from api.services.greeting_service import GREETING_LLM_REFRESH, greeting_pool
+from api.services.semantic_cache import get_semantic_cache
+from api.services.vision_cache import get_vision_cache
+from api.utils.metrics import registry
 
 app = FastAPI(
     title="DMV Document Validator and Assistant",
@@ -19,9 +29,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "Time until the response headers are sent, by route.",
+    ["method", "route", "status"])
+
+registry.register_stats("llm_single_flight", "Upstream model calls and identical calls coalesced into them.",
+                        lambda: get_gateway().stats())
+registry.register_stats("vision_cache", "Vision result cache counters.",
+                        lambda: get_vision_cache().stats() if get_vision_cache() else {})
+registry.register_stats("semantic_cache", "Semantic answer cache counters.",
+                        lambda: get_semantic_cache().stats() if get_semantic_cache() else {})
+registry.register_gauge("model_health", "Rolling latency (seconds) and error rate of each model used by the router.",
+                        lambda: get_gateway().router.gauge_samples())
+registry.register_gauge("llm_circuit_state", "Circuit breaker state per model: 0 closed, 1 half-open, 2 open.",
+                        lambda: get_gateway().circuit_states())
+registry.register_stats("image_pool", "Image process pool queue depth and throughput.", image_pool.stats)
+registry.register_stats("job_queue", "Background document job queue.", job_queue.stats)
+registry.register_stats("message_sink", "Write-behind buffer of conversation messages.", message_sink.stats)
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Route templates (e.g. /jobs/{job_id}) keep the number of label values bounded
+    route = request.scope.get("route")
+    HTTP_LATENCY.observe(time.perf_counter() - start, method=request.method,
+                         route=getattr(route, "path", "unmatched"), status=str(response.status_code))
+    return response
+
 @app.on_event("startup")
 async def startup_event():
     await init_db()
+    message_sink.start()
+    await job_queue.start()
+    if GREETING_LLM_REFRESH:
+        greeting_pool.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await job_queue.stop()
+    # Messages still in the write buffer are written before the process exits
+    await message_sink.stop()
+    await greeting_pool.stop()
+    image_pool.shutdown()
+    await close_gateway()
 
 # Add Firebase Authentication middleware
 app.add_middleware(FirebaseAuthMiddleware)
@@ -32,3 +83,8 @@ app.include_router(router)
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the DMV Document Validator and Assistant API"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of model-call, cache, pool and queue metrics."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
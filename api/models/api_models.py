@@ -1,5 +1,7 @@
 from pydantic import BaseModel
+from datetime import datetime
 from typing import List, Optional
+from api.models.document_models import DocumentAnalysisResponse
 
 
 class DocumentCheckResult(BaseModel):
@@ -30,6 +32,24 @@ class ConversationMessage(BaseModel):
     role: str
     content: str
 
+class ConversationSession(BaseModel):
+    """A user's conversation in the /conversations list."""
+    session_id: str
+    title: Optional[str] = None  # None until the first title has been generated
+    message_count: int
+    last_message_at: datetime
+
+class ConversationPageMessage(BaseModel):
+    session_id: str
+    role: str
+    content: str
+    timestamp: datetime
+
+class ConversationPage(BaseModel):
+    """One page of /conversations/messages; pass next_cursor back to get the following page."""
+    items: List[ConversationPageMessage]
+    next_cursor: Optional[str] = None
+
 
 class InitialMessageRequest(BaseModel):
     """Request model for the /initial-message endpoint."""
@@ -41,4 +61,16 @@ class InitialMessageResponse(BaseModel):
 
 class OptionsResponse(BaseModel):
     """Response model for the /options endpoint."""
-    options: List[str]  # List of predefined options
\ No newline at end of file
+    options: List[str]  # List of predefined options
+
+class JobSubmittedResponse(BaseModel):
+    """Response model for submitting a background document job."""
+    job_id: str
+    status: str
+
+class JobStatusResponse(BaseModel):
+    """Response model for the /jobs/{job_id} endpoint."""
+    job_id: str
+    status: str  # pending, running, succeeded or failed
+    result: Optional[DocumentAnalysisResponse] = None
+    error: Optional[str] = None
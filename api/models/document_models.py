@@ -12,6 +12,7 @@ class Field(BaseModel):
     position: Position
     required_value: str
     is_required: bool
+    page: int = 0  # 0-based index of the page the field was found on
 
 class DocumentAnalysisResponse(BaseModel):
     fields: List[Field]
@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Request, HTTPException, UploadFile, Depends 
-from typing import List
+from fastapi import APIRouter, Request, HTTPException, UploadFile, Depends, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from api.db.database import get_async_session
-from api.services.openai_service import process_image_with_grok, process_document_with_text_model, generate_response, generate_initial_message
-from api.utils.image_utils import encode_image_to_base64, convert_pdf_to_images, pil_image_to_base64
-from api.utils.firebase_utils import get_current_user_uid, get_user_name_from_firebase
-from api.models.api_models import (DocumentCheckResult, ConversationMessage, QuestionRequest, QuestionResponse, DocumentRequest, DocumentResponse,
-                                    FunctionCallResultMessage, InitialMessageResponse, InitialMessageResponse, InitialMessageResponse, OptionsResponse)
+from api.db.message_sink import message_sink
+from api.services.openai_service import process_image_with_grok, process_document_with_text_model, generate_response, stream_response
+from api.utils.firebase_utils import get_current_user_uid
+from api.services.greeting_service import client_now, greeting_pool, resolve_locale
+from api.models.api_models import (DocumentCheckResult, ConversationMessage, ConversationPage, ConversationSession, QuestionRequest, QuestionResponse, DocumentRequest, DocumentResponse,
+                                    FunctionCallResultMessage, InitialMessageResponse, InitialMessageResponse, InitialMessageResponse, OptionsResponse,
+                                    JobSubmittedResponse, JobStatusResponse)
 from api.models.document_models import DocumentAnalysisResponse
-from api.services.image_service import analyze_document_with_vision
-import tempfile
+from api.services.job_service import JobQueueFullError, job_queue
+from api.services.title_service import DEFAULT_TITLE, schedule_title_refresh
+from api.db.queries import get_conversation_history, get_conversations_with_pagination, get_user_sessions, get_conversation_title as load_conversation_title
+from api.services.semantic_cache import get_semantic_cache
+from api.utils.admin_utils import require_admin_token
+from api.utils.upload_utils import SpooledUpload, UnsupportedUploadError, UploadTooLargeError, spool_upload
+from api.services.document_service import analyze_document_file, analyze_pages, extract_form_fields
 import logging
+import uuid
 
 router = APIRouter()
 
@@ -19,33 +28,20 @@ logger.setLevel(logging.DEBUG)
 
 
 @router.get("/initial-message", response_model=InitialMessageResponse)
-async def initial_message(request: Request, uid: str = None):
+async def initial_message(request: Request, uid: str = None, tz: Optional[str] = None):
     """
-    Generates a personalized initial greeting message.
-    
-    If no UID is provided, it retrieves the UID from the authentication token in the request headers.
-    If no UID is found (i.e. user is not authorized), it generates a unique session ID and sets the name to 'citizen'.
-    """
-    try:
-        # Check if the user is authenticated (based on middleware)
-        if request.state.user:  # The user is authenticated
-            user_id = request.state.session_id  # Use the session ID from middleware
-            user_name = get_user_name_from_firebase(user_id)  # Fetch the user's name from Firebase
-        else:  # The user is not authenticated
-            user_id = request.state.session_id  # Session ID generated by the middleware
-            user_name = "citizen"  # Set the name to "citizen" for unauthorized users
-
-        # Generate the initial greeting message
-        message = await generate_initial_message(user_name, user_id)
-        return InitialMessageResponse(message=message)
+    Returns a personalized initial greeting message.
 
-    except HTTPException as e:
-        logger.error(f"Error generating initial message: {e.detail}")
-        raise e
-
-    except Exception as e:
-        logger.error(f"Unexpected error in initial_message: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    The greeting is picked from an in-memory pool by language (Accept-Language header) and the client's
+    time of day (X-Timezone header or tz param, an IANA name like "Europe/Warsaw" or an offset like "+02:00"),
+    without calling the model. Authenticated users are greeted with the name claim of their ID token,
+    everyone else as "citizen".
+    """
+    user = request.state.user
+    user_name = user.get("name") if user else None
+    locale = resolve_locale(request.headers.get("Accept-Language"))
+    now = client_now(tz or request.headers.get("X-Timezone"))
+    return InitialMessageResponse(message=greeting_pool.greeting(user_name, locale, now))
 
 
 @router.get("/options", response_model=OptionsResponse)
@@ -71,64 +67,105 @@ async def get_options(request: Request):
 
 
 @router.get("/conversation-history", response_model=List[ConversationMessage])
-async def conversation_history(request: Request, session: AsyncSession = Depends(get_async_session)):
+async def conversation_history(request: Request):
     """
     Pobiera historię konwersacji dla danego użytkownika.
     """
-    user = await get_current_user(request)
-    user_id = user["uid"]
+    user_id = get_current_user_uid(request)
     session_id = request.state.session_id  # Pobranie session_id z requestu
 
     if not user_id or not session_id:
         raise HTTPException(status_code=400, detail="Brak wymaganych parametrów: user_id lub session_id")
 
     try:
-        history = await get_conversation_history(session, user_id, session_id)
-        return history
+        await message_sink.sync(user_id, session_id)
+        async with get_async_session() as session:
+            return await get_conversation_history(session, user_id, session_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Błąd podczas pobierania historii rozmów: {str(e)}")    
 
 @router.get("/conversation-title")
-async def get_conversation_title(request: Request):
+async def get_conversation_title(request: Request, session_id: Optional[str] = None):
     """
-    Zwraca tytuł konwersacji dla danego użytkownika.
+    Zwraca zapisany tytuł konwersacji dla danego użytkownika.
+
+    Tytuł jest generowany w tle po kolejnych wiadomościach, więc odczyt nie wywołuje modelu.
     """
-    user = get_current_user(request)
-    user_id = user["uid"]
-    session_id = request.state.session_id  
+    user_id = get_current_user_uid(request)
+    session_id = session_id or request.state.session_id
 
     if not user_id or not session_id:
         raise HTTPException(status_code=400, detail="Brak wymaganych danych: user_id lub session_id")
 
     try:
-        title = await generate_conversation_title(user_id, session_id)
-        return {"user_id": user_id, "session_id": session_id, "title": title}
+        async with get_async_session() as session:
+            title = await load_conversation_title(session, session_id)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Błąd podczas generowania tytułu: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Błąd podczas pobierania tytułu: {str(e)}")
+
+    if title is None or title.user_id != user_id:
+        # Rozmowa bez tytułu - wygeneruj go w tle, jeśli ma już pierwszą wymianę wiadomości
+        schedule_title_refresh(user_id, session_id)
+        return {"user_id": user_id, "session_id": session_id, "title": DEFAULT_TITLE}
+    return {"user_id": user_id, "session_id": session_id, "title": title.title}
+
+@router.get("/conversations", response_model=List[ConversationSession])
+async def list_conversations(request: Request):
+    """
+    Zwraca listę rozmów użytkownika z tytułami, od ostatnio aktywnej (jedno zapytanie do bazy).
+    """
+    user_id = get_current_user_uid(request)
+
+    await message_sink.sync(user_id)
+    async with get_async_session() as session:
+        return await get_user_sessions(session, user_id)
+
+@router.get("/conversations/messages", response_model=ConversationPage)
+async def list_conversation_messages(request: Request, time_range: str = "7days", limit: int = Query(50, ge=1, le=200),
+                                     cursor: Optional[str] = None):
+    """
+    Zwraca wiadomości użytkownika stronami, od najnowszych; kolejną stronę pobiera się kursorem next_cursor.
+    """
+    user_id = get_current_user_uid(request)
+
+    try:
+        await message_sink.sync(user_id)
+        async with get_async_session() as session:
+            return await get_conversations_with_pagination(session, user_id, time_range, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _spool_document(file: UploadFile, unsupported_detail: str) -> SpooledUpload:
+    """Streams an upload to disk, rejecting unsupported content and oversized files early."""
+    try:
+        return await spool_upload(file)
+    except UnsupportedUploadError:
+        raise HTTPException(status_code=400, detail=unsupported_detail)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
 
 @router.post("/validate-document")
-def validate_document(request: Request, file: UploadFile):
+async def validate_document(request: Request, file: UploadFile):
     logger.debug(f"Received file: {file.filename}, content_type: {file.content_type}")
     
     if file.content_type not in ["image/jpeg", "image/png", "application/pdf"]:
         raise HTTPException(status_code=400, detail="Unsupported file type. Only JPEG, PNG, and PDF are allowed.")
 
+    upload = await _spool_document(file, "Unsupported file type. Only JPEG, PNG, and PDF are allowed.")
+
     try:
-        base64_images = []
-
-        if file.content_type == "application/pdf":
-            with tempfile.NamedTemporaryFile(delete=True, suffix=".pdf") as temp_pdf:
-                temp_pdf.write(file.file.read())
-                temp_pdf.flush()
-                images = convert_pdf_to_images(temp_pdf.name)
-                base64_images = [pil_image_to_base64(image) for image in images]
-        else:
-            base64_image = encode_image_to_base64(file.file)
-            base64_images = [base64_image]
-
-        aggregated_results = [process_image_with_grok(base64_image) for base64_image in base64_images]
-        response = process_document_with_text_model(aggregated_results)
-        return response
+        with upload:
+            # Fillable PDFs already carry their fields and values, no vision call needed
+            acroform = await extract_form_fields(upload.content_type, upload.path)
+            if acroform:
+                response = await process_document_with_text_model([acroform.to_validation_summary()])
+                return response
+
+            # Pages are rendered one at a time and analyzed concurrently; results keep the page order
+            aggregated_results = await analyze_pages(upload.content_type, upload.path, process_image_with_grok)
+            response = await process_document_with_text_model(aggregated_results)
+            return response
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing the document: {str(e)}")
@@ -157,10 +194,35 @@ async def ask_question(request: Request, request_data: dict, session: AsyncSessi
         logger.debug(f"Response returned: {response_message}")
 
         return QuestionResponse(response=response_message, session_id=session_id) 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing the request: {str(e)}")
 
+@router.post("/generate-response/stream")
+async def ask_question_stream(request: Request, request_data: dict):
+    """Same as /generate-response, but streams the answer as Server-Sent Events."""
+    user = request.state.user
+    # Tożsamość pochodzi wyłącznie z tokenu; user_id przesłany przez klienta jest ignorowany
+    request_data["user_id"] = user["uid"] if user else None
+
+    if request_data.get("start", False):
+        session_id = str(uuid.uuid4())
+        logger.info(f"New conversation started. New Session ID: {session_id}")
+    else:
+        session_id = request.state.session_id
+
+    if not request_data.get("question"):
+        raise HTTPException(status_code=400, detail="Question is required")
+
+    return StreamingResponse(
+        stream_response(request_data, session_id),
+        media_type="text/event-stream",
+        # Proxies must not buffer the stream, otherwise the first token is delayed
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Session-ID": session_id},
+    )
+
 @router.post("/analyze-document", response_model=DocumentAnalysisResponse)
 async def analyze_document(request: Request, file: UploadFile):
     """
@@ -171,28 +233,69 @@ async def analyze_document(request: Request, file: UploadFile):
     if file.content_type not in ["image/jpeg", "image/png", "application/pdf"]:
         raise HTTPException(status_code=400, detail="Nieobsługiwany typ pliku. Dopuszczalne formaty: JPEG, PNG, PDF.")
 
+    session_id = request.state.session_id
+    upload = await _spool_document(file, "Nieobsługiwany typ pliku. Dopuszczalne formaty: JPEG, PNG, PDF.")
+
     try:
-        base64_images = []
-
-        if file.content_type == "application/pdf":
-            with tempfile.NamedTemporaryFile(delete=True, suffix=".pdf") as temp_pdf:
-                temp_pdf.write(file.file.read())
-                temp_pdf.flush()
-                images = convert_pdf_to_images(temp_pdf.name)
-                base64_images = [pil_image_to_base64(image) for image in images]
-        else:
-            base64_image = encode_image_to_base64(file.file)
-            base64_images = [base64_image]
-
-        # Analizuj wszystkie obrazy i agreguj wyniki
-        results = []
-        for base64_image in base64_images:
-            analysis_result = analyze_document_with_vision(base64_image)
-            results.append(analysis_result)
-        
-        # Zwróć pierwszy wynik (lub zmodyfikuj logikę agregacji według potrzeb)
-        return results[0]
+        with upload:
+            return await analyze_document_file(session_id, upload.path, upload.content_type)
 
     except Exception as e:
         logger.error(f"Błąd analizy dokumentu: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Błąd przetwarzania dokumentu: {str(e)}")
+
+
+@router.post("/analyze-document/jobs", response_model=JobSubmittedResponse, status_code=202)
+async def submit_analyze_document_job(request: Request, file: UploadFile):
+    """
+    Przyjmuje dokument do analizy w tle i od razu zwraca identyfikator zadania.
+    Wynik można pobrać przez GET /jobs/{job_id}.
+    """
+    logger.debug(f"Otrzymano plik do analizy w tle: {file.filename}, typ: {file.content_type}")
+
+    if file.content_type not in ["image/jpeg", "image/png", "application/pdf"]:
+        raise HTTPException(status_code=400, detail="Nieobsługiwany typ pliku. Dopuszczalne formaty: JPEG, PNG, PDF.")
+
+    session_id = request.state.session_id
+    # Plik zostaje na dysku do końca zadania, usuwa go worker
+    upload = (await _spool_document(file, "Nieobsługiwany typ pliku. Dopuszczalne formaty: JPEG, PNG, PDF.")).keep()
+
+    try:
+        job_id = await job_queue.submit(
+            "analyze-document",
+            lambda: analyze_document_file(session_id, upload.path, upload.content_type),
+            cleanup=upload.close,
+        )
+    except JobQueueFullError:
+        upload.close()
+        raise HTTPException(status_code=503, detail="Zbyt wiele dokumentów w kolejce, spróbuj ponownie za chwilę.")
+
+    return JobSubmittedResponse(job_id=job_id, status="pending")
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str, wait: float = 0):
+    """
+    Zwraca status zadania. Parametr `wait` (w sekundach, maks. 30) czeka na zakończenie zadania (long polling).
+    """
+    if wait > 0:
+        job = await job_queue.wait(job_id, timeout=min(wait, 30))
+    else:
+        job = await job_queue.get(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Nie znaleziono zadania")
+
+    return JobStatusResponse(job_id=job["job_id"], status=job["status"], result=job["result"], error=job["error"])
+
+
+@router.delete("/admin/semantic-cache", dependencies=[Depends(require_admin_token)])
+async def purge_semantic_cache(ministry: Optional[str] = None):
+    """
+    Usuwa zapamiętane odpowiedzi z cache semantycznego (wszystkie lub tylko dla jednego ministerstwa),
+    np. po zmianie przepisów lub linków.
+    """
+    cache = get_semantic_cache()
+    purged = cache.purge(ministry) if cache else 0
+    logger.info(f"Purged {purged} semantic cache entries (ministry: {ministry or 'all'})")
+    return {"purged": purged}
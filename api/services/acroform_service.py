@@ -0,0 +1,127 @@
+import io
+import logging
+from typing import Dict, List, Optional, Union
+from PyPDF2 import PdfReader
+from api.models.document_models import DocumentAnalysisResponse, Field, Position
+
+logger = logging.getLogger(__name__)
+
+# PDF field types (/FT) mapped to the data types used by the vision prompt
+FIELD_TYPE_LABELS = {
+    "/Tx": "Text",
+    "/Btn": "Checkbox",
+    "/Ch": "Choice",
+    "/Sig": "Signature",
+}
+# Bit 2 of the field flags (/Ff) marks a field as required
+REQUIRED_FLAG = 1 << 1
+UNCHECKED_VALUES = {"/Off", "Off"}
+
+
+class AcroFormExtraction:
+    """
+    Fields read natively from a fillable PDF.
+
+    Positions are in PDF points with the origin in the bottom-left corner of
+    the page, which is the coordinate system ``fill_pdf_service`` draws in.
+    """
+
+    def __init__(self, fields: List[Field], values: Dict[str, Optional[str]]):
+        self.fields = fields
+        self.values = values
+
+    def is_filled(self, field_name: str) -> bool:
+        value = self.values.get(field_name)
+        return value is not None and value != "" and value not in UNCHECKED_VALUES
+
+    def to_analysis_response(self) -> DocumentAnalysisResponse:
+        return DocumentAnalysisResponse(fields=self.fields)
+
+    def to_validation_summary(self) -> dict:
+        """Returns the same structure the vision model produces for /validate-document."""
+        return {
+            "completed_fields": [
+                {"field_name": field.field_name, "field_value": self.values[field.field_name]}
+                for field in self.fields if self.is_filled(field.field_name)
+            ],
+            "empty_fields": [
+                {"field_name": field.field_name}
+                for field in self.fields if not self.is_filled(field.field_name)
+            ],
+            "required_field_statuses": [
+                {"field_name": field.field_name, "status": "filled" if self.is_filled(field.field_name) else "missing"}
+                for field in self.fields if field.is_required
+            ],
+        }
+
+
+def _inherited(annotation, key: str):
+    """Reads a field attribute, following /Parent for attributes set on the field rather than the widget."""
+    node = annotation
+    while node is not None:
+        if key in node:
+            return node[key]
+        parent = node.get("/Parent")
+        node = parent.get_object() if parent is not None else None
+    return None
+
+
+def _qualified_name(annotation) -> Optional[str]:
+    parts = []
+    node = annotation
+    while node is not None:
+        if "/T" in node:
+            parts.append(str(node["/T"]))
+        parent = node.get("/Parent")
+        node = parent.get_object() if parent is not None else None
+    return ".".join(reversed(parts)) if parts else None
+
+
+def extract_acroform(pdf: Union[str, bytes]) -> Optional[AcroFormExtraction]:
+    """
+    Extracts form fields from a fillable PDF without rendering it.
+
+    :param pdf: Path of the PDF file, or its raw bytes.
+    :return: The extracted fields, or None when the PDF has no AcroForm fields (e.g. scans).
+    """
+    try:
+        reader = PdfReader(pdf if isinstance(pdf, str) else io.BytesIO(pdf))
+        if "/AcroForm" not in reader.trailer["/Root"]:
+            return None
+
+        fields = []
+        values = {}
+        for page_index, page in enumerate(reader.pages):
+            for annotation_ref in page.get("/Annots") or []:
+                annotation = annotation_ref.get_object()
+                if annotation.get("/Subtype") != "/Widget":
+                    continue
+                name = _qualified_name(annotation)
+                rect = annotation.get("/Rect")
+                # Radio groups have one widget per option, keep the first one
+                if not name or not rect or name in values:
+                    continue
+
+                x1, y1, x2, y2 = [float(value) for value in rect]
+                field_type = _inherited(annotation, "/FT")
+                flags = int(_inherited(annotation, "/Ff") or 0)
+                value = _inherited(annotation, "/V")
+
+                fields.append(Field(
+                    field_name=name,
+                    position=Position(x=min(x1, x2), y=min(y1, y2), width=abs(x2 - x1), height=abs(y2 - y1)),
+                    required_value=FIELD_TYPE_LABELS.get(field_type, "Text"),
+                    is_required=bool(flags & REQUIRED_FLAG),
+                    page=page_index,
+                ))
+                values[name] = str(value) if value is not None else None
+
+        if not fields:
+            return None
+        logger.info(f"Extracted {len(fields)} AcroForm fields natively")
+        return AcroFormExtraction(fields, values)
+
+    except Exception as e:
+        # Broken or encrypted PDFs fall back to the vision path
+        logger.warning(f"AcroForm extraction failed, falling back to vision: {e}")
+        return None
@@ -0,0 +1,130 @@
+import logging
+import os
+from typing import Awaitable, Callable, List, Optional, Tuple
+from api.db.database import SessionLocal
+from api.db.message_sink import message_sink
+from api.db.queries import get_conversation_summary, get_messages_between, get_recent_messages, save_conversation_summary
+from api.services.llm_gateway import get_gateway
+from api.utils.concurrency import KeyedTasks
+from api.utils.token_utils import estimate_message_tokens, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Number of most recent user/assistant turns sent verbatim
+CONTEXT_RECENT_TURNS = int(os.getenv("CONTEXT_RECENT_TURNS", "6"))
+# Token budget of the history (summary + recent turns) sent with every question
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "300"))
+# Long messages are cut before being folded into the summary
+SUMMARY_MESSAGE_MAX_CHARS = 2000
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a citizen and a government-services assistant. "
+    "Update the summary with the new messages. Keep facts the assistant will need later: the user's goal, "
+    "state, ministry, documents and form values mentioned, and open questions. "
+    "Write at most {max_words} words, in the language of the conversation. Return only the summary."
+)
+
+# Background summary refreshes, one per session
+summary_refreshes = KeyedTasks("Summary refresh")
+
+
+async def build_context(
+    session,
+    user_id: str,
+    session_id: str,
+    recent_turns: int = CONTEXT_RECENT_TURNS,
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+) -> Tuple[List[dict], Optional[int]]:
+    """
+    Builds the bounded conversation history sent to the chat model.
+
+    The last ``recent_turns`` turns are kept verbatim as long as they fit the
+    token budget together with the stored summary of the older turns.
+
+    :param session: Database session.
+    :param user_id: User ID.
+    :param session_id: Conversation session ID.
+    :return: The history messages, and the ID of the newest message left out of
+        them that the summary does not cover yet (None when the summary is current).
+    """
+    # Messages of this session still waiting in the write buffer are written first
+    await message_sink.sync(user_id, session_id)
+    window = recent_turns * 2
+    # One extra row tells whether anything older than the window exists
+    rows = await get_recent_messages(session, user_id, session_id, window + 1)
+    older, recent = rows[:-window] if len(rows) > window else [], rows[-window:]
+
+    summary = await get_conversation_summary(session, session_id)
+    summary_message = None
+    if summary and summary.summary:
+        summary_message = {"role": "system", "content": f"Summary of the earlier conversation: {summary.summary}"}
+
+    # Drop the oldest turns of the window that do not fit the budget
+    remaining = token_budget - (estimate_message_tokens([summary_message]) if summary_message else 0)
+    kept: List[dict] = []
+    for row in reversed(recent):
+        message = {"role": row.role, "content": row.content}
+        remaining -= estimate_message_tokens([message])
+        if remaining < 0:
+            break
+        kept.append(message)
+    kept.reverse()
+    dropped = older + recent[:len(recent) - len(kept)]
+
+    summarized_until = summary.summarized_until if summary else 0
+    stale_until = dropped[-1].id if dropped and dropped[-1].id > summarized_until else None
+
+    messages = [summary_message] if summary_message else []
+    messages.extend(kept)
+    return messages, stale_until
+
+
+async def summarize_with_model(previous_summary: Optional[str], messages: List[dict]) -> str:
+    transcript = "\n".join(
+        f"{message['role']}: {message['content'][:SUMMARY_MESSAGE_MAX_CHARS]}" for message in messages
+    )
+    response = await get_gateway().chat_completion(
+        task="summary",
+        messages=[
+            {"role": "system", "content": SUMMARY_PROMPT.format(max_words=int(SUMMARY_MAX_TOKENS * 0.75))},
+            {"role": "user", "content": f"Current summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}"},
+        ],
+        max_tokens=SUMMARY_MAX_TOKENS,
+        temperature=0.2,
+    )
+    return response.choices[0].message.content.strip()
+
+
+async def refresh_summary(
+    user_id: str,
+    session_id: str,
+    until_id: int,
+    session_factory=SessionLocal,
+    summarize: Callable[[Optional[str], List[dict]], Awaitable[str]] = summarize_with_model,
+) -> None:
+    """
+    Folds the messages up to ``until_id`` that are not summarized yet into the stored summary.
+
+    Only the new messages and the previous summary are sent to the model, so the
+    cost of a refresh does not grow with the length of the conversation.
+    """
+    async with session_factory() as session:
+        summary = await get_conversation_summary(session, session_id)
+        summarized_until = summary.summarized_until if summary else 0
+        if until_id <= summarized_until:
+            return
+        rows = await get_messages_between(session, user_id, session_id, summarized_until, until_id)
+        if not rows:
+            return
+
+        new_summary = await summarize(summary.summary if summary else None,
+                                      [{"role": row.role, "content": row.content or ""} for row in rows])
+        await save_conversation_summary(session, user_id, session_id, new_summary, rows[-1].id)
+        logger.info(f"Summary of session {session_id} updated with {len(rows)} messages "
+                    f"({estimate_tokens(new_summary)} tokens)")
+
+
+def schedule_summary_refresh(user_id: str, session_id: str, until_id: int) -> None:
+    """Refreshes the summary in the background, off the request path; one refresh per session at a time."""
+    summary_refreshes.spawn(session_id, lambda: refresh_summary(user_id, session_id, until_id))
@@ -0,0 +1,64 @@
+import logging
+import os
+import re
+from typing import Dict, List
+from api.models.document_models import DocumentAnalysisResponse, Field
+
+logger = logging.getLogger(__name__)
+
+# Fields with the same name on different pages are the same field when their
+# positions differ by at most this much (in the units the page analysis uses)
+FIELD_POSITION_TOLERANCE = float(os.getenv("FIELD_POSITION_TOLERANCE", "10"))
+
+
+def normalize_field_name(field_name: str) -> str:
+    """Lowercases a field label and drops punctuation, so 'Full Name:' and 'full name' compare equal."""
+    return re.sub(r"[^\w]+", " ", field_name.lower()).strip()
+
+
+def _same_position(first: Field, second: Field, tolerance: float) -> bool:
+    return (
+        abs(first.position.x - second.position.x) <= tolerance
+        and abs(first.position.y - second.position.y) <= tolerance
+    )
+
+
+def merge_page_results(
+    page_results: List[DocumentAnalysisResponse],
+    tolerance: float = FIELD_POSITION_TOLERANCE,
+) -> DocumentAnalysisResponse:
+    """
+    Merges per-page analyses into one analysis of the whole document.
+
+    Every field is tagged with the index of its page. A field repeated on a later
+    page (same normalized name, same position) is kept once, on the first page it
+    appears on, and is required if any of its copies is required. Fields sharing a
+    name on the same page are distinct and are all kept.
+
+    :param page_results: Page analyses in page order.
+    :param tolerance: Maximum position difference for repeated fields.
+    :return: The merged analysis.
+    """
+    merged: List[Field] = []
+    by_name: Dict[str, List[int]] = {}
+
+    for page_index, result in enumerate(page_results):
+        for field in result.fields:
+            name = normalize_field_name(field.field_name)
+            duplicate = next(
+                (i for i in by_name.get(name, [])
+                 if merged[i].page != page_index and _same_position(merged[i], field, tolerance)),
+                None,
+            )
+            if duplicate is not None:
+                if field.is_required and not merged[duplicate].is_required:
+                    merged[duplicate] = merged[duplicate].copy(update={"is_required": True})
+                continue
+            by_name.setdefault(name, []).append(len(merged))
+            merged.append(field.copy(update={"page": page_index}))
+
+    logger.debug(
+        f"Merged {sum(len(result.fields) for result in page_results)} fields "
+        f"from {len(page_results)} pages into {len(merged)}"
+    )
+    return DocumentAnalysisResponse(fields=merged)
@@ -0,0 +1,123 @@
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from api.services.document_aggregation import normalize_field_name
+from api.utils.metrics import registry
+from api.utils.token_utils import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Page answers that are not valid JSON are passed on as text, cut to this length
+UNPARSED_PAGE_MAX_CHARS = 1000
+
+DOCUMENT_CONTEXT_TOKENS = registry.histogram(
+    "document_context_tokens", "Estimated tokens of the /validate-document context, before and after compaction.",
+    ["stage"], buckets=(100, 250, 500, 1000, 2000, 4000, 8000, 16000))
+
+_JSON_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def _page_content(result: Any) -> Any:
+    """The model's answer for a page: a ChatCompletionMessage, a summary dict or a JSON string."""
+    if isinstance(result, dict):
+        return result
+    content = getattr(result, "content", result)
+    return content if isinstance(content, (dict, str)) else str(content)
+
+
+def parse_page_summary(result: Any) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    Extracts the field summary JSON from one page result.
+
+    :param result: A page answer of the vision model, or an already parsed summary.
+    :return: The parsed summary, or None and the raw text when the answer is not JSON.
+    """
+    content = _page_content(result)
+    if isinstance(content, dict):
+        return content, None
+
+    text = _JSON_FENCE.sub("", content.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            parsed = json.loads(text[start:end + 1])
+            if isinstance(parsed, dict):
+                return parsed, None
+        except json.JSONDecodeError:
+            pass
+    logger.warning("Page result is not valid JSON, passing it on as text")
+    return None, text[:UNPARSED_PAGE_MAX_CHARS]
+
+
+def merge_page_summaries(summaries: List[dict]) -> dict:
+    """
+    Merges the field summaries of all pages into one, without repeated fields.
+
+    A field counts as completed when any page has a value for it (the first one is
+    kept), and as required when any page says so. Fields are matched by their
+    normalized name and keep the order in which they first appear.
+
+    :param summaries: Parsed page summaries in page order.
+    :return: Completed fields with their values, empty fields and missing required fields.
+    """
+    labels: Dict[str, str] = {}
+    values: Dict[str, Any] = {}
+    required = set()
+
+    def label(field: dict) -> Optional[str]:
+        name = str(field.get("field_name") or "").strip()
+        key = normalize_field_name(name)
+        if key:
+            labels.setdefault(key, name)
+        return key or None
+
+    for summary in summaries:
+        for field in summary.get("completed_fields") or []:
+            key = label(field)
+            if key and key not in values and field.get("field_value") not in (None, ""):
+                values[key] = field["field_value"]
+        for field in summary.get("empty_fields") or []:
+            label(field)
+        for field in summary.get("required_field_statuses") or []:
+            key = label(field)
+            if key:
+                required.add(key)
+
+    return {
+        "completed_fields": {labels[key]: value for key, value in values.items()},
+        "empty_fields": [name for key, name in labels.items() if key not in values],
+        "missing_required_fields": [name for key, name in labels.items() if key in required and key not in values],
+    }
+
+
+def build_document_context(page_results: list) -> str:
+    """
+    Builds the compact JSON context sent with /validate-document feedback requests.
+
+    Only the parsed field summaries are kept; message objects, their repr and
+    fields repeated on several pages are dropped. Token estimates before and
+    after are logged and recorded as metrics.
+
+    :param page_results: Vision answers per page, or summary dicts (e.g. from AcroForm fields).
+    :return: Minified JSON with completed, empty and missing required fields.
+    """
+    summaries, unparsed = [], []
+    for result in page_results:
+        summary, text = parse_page_summary(result)
+        if summary is not None:
+            summaries.append(summary)
+        elif text:
+            unparsed.append(text)
+
+    context = merge_page_summaries(summaries)
+    if unparsed:
+        context["unparsed_pages"] = unparsed
+    compact = json.dumps(context, ensure_ascii=False, separators=(",", ":"))
+
+    raw_tokens = estimate_tokens(" ".join(str(result) for result in page_results))
+    compact_tokens = estimate_tokens(compact)
+    DOCUMENT_CONTEXT_TOKENS.observe(raw_tokens, stage="raw")
+    DOCUMENT_CONTEXT_TOKENS.observe(compact_tokens, stage="compact")
+    logger.info(f"Document context for {len(page_results)} pages: ~{raw_tokens} tokens raw, ~{compact_tokens} compact")
+    return compact
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional
+from api.models.document_models import DocumentAnalysisResponse
+from api.services.acroform_service import AcroFormExtraction, extract_acroform
+from api.services.document_aggregation import merge_page_results
+from api.services.form_templates import match_known_form
+from api.services.image_service import analyze_document_with_vision, save_document_analysis_result
+from api.utils.concurrency import gather_in_order
+from api.utils.image_preprocessing import get_position_preset_name
+from api.utils.image_utils import aiter_pdf_base64, encode_image_file_to_base64, image_pool
+
+logger = logging.getLogger(__name__)
+
+
+async def analyze_pages(
+    content_type: str,
+    file_path: str,
+    analyze_page: Callable[[str], Awaitable[Any]],
+    preset_name: Optional[str] = None,
+) -> List[Any]:
+    """
+    Rasterizes an uploaded document page by page and analyzes every page.
+
+    PDF pages are rendered one at a time and handed to ``analyze_page`` as soon
+    as they are encoded, so rendering overlaps with the model calls.
+
+    :param content_type: MIME type of the upload ("application/pdf", "image/jpeg", "image/png").
+    :param file_path: Path of the spooled upload.
+    :param analyze_page: Coroutine function taking a Base64 encoded page.
+    :param preset_name: Image preset applied before encoding (default is IMAGE_PRESET).
+    :return: Per-page results in page order.
+    """
+    if content_type == "application/pdf":
+        return await gather_in_order(analyze_page, aiter_pdf_base64(file_path, preset_name=preset_name))
+
+    base64_image = await image_pool.run(encode_image_file_to_base64, file_path, preset_name)
+    return await gather_in_order(analyze_page, [base64_image])
+
+
+async def extract_form_fields(content_type: str, file_path: str) -> Optional[AcroFormExtraction]:
+    """
+    Reads fields natively from fillable PDFs, so the vision model is only needed for scans.
+
+    :param content_type: MIME type of the upload.
+    :param file_path: Path of the spooled upload.
+    :return: The AcroForm fields, or None when the upload is not a fillable PDF.
+    """
+    if content_type != "application/pdf":
+        return None
+    return await asyncio.to_thread(extract_acroform, file_path)
+
+
+async def analyze_document_file(session_id: str, file_path: str, content_type: str) -> DocumentAnalysisResponse:
+    """
+    Runs the full /analyze-document pipeline on a spooled upload and saves the result.
+
+    Fillable PDFs are read natively, known forms come from the template registry,
+    and everything else goes page by page through the vision model.
+
+    :param session_id: Session the analysis is saved under.
+    :param file_path: Path of the spooled upload.
+    :param content_type: Detected MIME type of the upload.
+    :return: The merged analysis of all pages.
+    """
+    # Formularze PDF z polami AcroForm mają dokładne współrzędne pól w samym pliku
+    acroform = await extract_form_fields(content_type, file_path)
+    if acroform:
+        analysis = acroform.to_analysis_response()
+        await save_document_analysis_result(session_id, file_path, content_type, analysis)
+        return analysis
+
+    # Znane formularze rozpoznajemy po hashu pierwszej strony, bez wywołania modelu
+    known_form = await match_known_form(content_type, file_path)
+    if known_form:
+        await save_document_analysis_result(session_id, file_path, content_type, known_form)
+        return known_form
+
+    # Analizuj strony równolegle w miarę renderowania, wyniki w kolejności stron.
+    # Strony nie są przycinane ani skalowane, żeby pozycje pól pasowały do strony.
+    page_results = await analyze_pages(
+        content_type, file_path, analyze_document_with_vision, get_position_preset_name())
+
+    # Scal pola ze wszystkich stron w jedną analizę dokumentu
+    analysis = merge_page_results(page_results)
+    if not analysis.fields:
+        raise ValueError("Brak wykrytych pól w dokumencie")
+
+    await save_document_analysis_result(session_id, file_path, content_type, analysis)
+    return analysis
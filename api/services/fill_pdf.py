@@ -2,15 +2,29 @@ from PyPDF2 import PdfReader, PdfWriter
 from reportlab.pdfgen import canvas
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfbase import pdfmetrics
-from io import BytesIO
-from api.services.firebase_service import DocumentManager
+from api.firebase.firebase_service import DocumentManager, bucket
+import asyncio
 import io
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
-# Rejestracja czcionki odręcznej (pobierz np. "PatrickHand-Regular.ttf" i umieść w katalogu)
-pdfmetrics.registerFont(TTFont("Handwriting", "PatrickHand-Regular.ttf"))
+# Czcionka odręczna (np. "PatrickHand-Regular.ttf"); bez pliku używana jest Helvetica
+HANDWRITING_FONT_PATH = os.getenv("HANDWRITING_FONT_PATH", "PatrickHand-Regular.ttf")
+FALLBACK_FONT = "Helvetica"
+
+
+def handwriting_font() -> str:
+    """Rejestruje czcionkę odręczną przy pierwszym użyciu i zwraca nazwę czcionki do użycia."""
+    if "Handwriting" in pdfmetrics.getRegisteredFontNames():
+        return "Handwriting"
+    try:
+        pdfmetrics.registerFont(TTFont("Handwriting", HANDWRITING_FONT_PATH))
+        return "Handwriting"
+    except Exception as e:
+        logger.warning(f"Brak czcionki odręcznej {HANDWRITING_FONT_PATH}, używam {FALLBACK_FONT}: {e}")
+        return FALLBACK_FONT
 
 # Funkcja do wypełniania PDF odręcznym pismem
 async def fill_pdf_dynamically(session_id: str, data: dict):
@@ -18,7 +32,7 @@ async def fill_pdf_dynamically(session_id: str, data: dict):
         # Pobierz metadane i plik PDF
         analysis = await DocumentManager.get_document_analysis(session_id)
         blob = bucket.blob(f"documents/{session_id}.pdf")
-        pdf_data = blob.download_as_bytes()
+        pdf_data = await asyncio.to_thread(blob.download_as_bytes)
         
         # Wczytaj PDF
         reader = PdfReader(io.BytesIO(pdf_data))
@@ -27,7 +41,7 @@ async def fill_pdf_dynamically(session_id: str, data: dict):
         # Przygotuj warstwę tekstu
         packet = io.BytesIO()
         c = canvas.Canvas(packet)
-        c.setFont("Handwriting", 12)
+        c.setFont(handwriting_font(), 12)
         
         # Wypełnij pola na podstawie analizy
         for field in analysis['fields']:
@@ -52,18 +66,10 @@ async def fill_pdf_dynamically(session_id: str, data: dict):
         
         # Zapisz wynikowy plik
         result_blob = bucket.blob(f"filled_forms/{session_id}.pdf")
-        result_blob.upload_from_string(output.read(), content_type='application/pdf')
+        await asyncio.to_thread(result_blob.upload_from_string, output.read(), content_type='application/pdf')
         
         return result_blob.public_url
         
     except Exception as e:
         logger.error(f"Błąd wypełniania PDF: {str(e)}")
         raise
-
-# Dane do wypełnienia
-data = {
-    "name": "John Doe",
-    "address": "123 Main St, Springfield, IL"
-}
-
-fill_pdf_dynamically("session_id", data)
@@ -0,0 +1,155 @@
+import argparse
+import json
+import logging
+import os
+import threading
+from typing import List, Optional, Tuple
+from PIL import Image
+from api.models.document_models import DocumentAnalysisResponse
+from api.utils.image_utils import image_pool, render_pdf_page
+
+logger = logging.getLogger(__name__)
+
+FORM_TEMPLATES_PATH = os.getenv(
+    "FORM_TEMPLATES_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "form_templates.json"),
+)
+# Maximum Hamming distance (out of 64 bits) for an upload to count as a known form
+FORM_TEMPLATE_MAX_DISTANCE = int(os.getenv("FORM_TEMPLATE_MAX_DISTANCE", "6"))
+# First pages are rendered at a low resolution, the hash only needs a 9x8 thumbnail
+FORM_TEMPLATE_DPI = 50
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Computes a difference hash (dHash) of an image.
+
+    The image is reduced to a (hash_size + 1) x hash_size grayscale thumbnail and
+    every bit records whether a pixel is brighter than its right neighbour. The
+    result survives re-encoding, small scaling differences and scan noise.
+    """
+    thumbnail = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = thumbnail.tobytes()
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+
+def hamming_distance(first: int, second: int) -> int:
+    return bin(first ^ second).count("1")
+
+
+class TemplateRegistry:
+    """
+    Registry of known forms: a dHash of each form's first page together with its
+    already extracted field layout, stored in a JSON file.
+    """
+
+    def __init__(self, path: str = FORM_TEMPLATES_PATH, max_distance: int = FORM_TEMPLATE_MAX_DISTANCE):
+        self.path = path
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._templates: List[dict] = []
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._templates = json.load(f)
+            logger.info(f"Loaded {len(self._templates)} form templates from {path}")
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def register(self, name: str, first_page: Image.Image, analysis: DocumentAnalysisResponse) -> None:
+        """Adds (or replaces) a known form and persists the registry."""
+        template = {
+            "name": name,
+            "hash": format(dhash(first_page), "016x"),
+            "analysis": analysis.dict(),
+        }
+        with self._lock:
+            self._templates = [t for t in self._templates if t["name"] != name] + [template]
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self._templates, f, ensure_ascii=False, indent=2)
+
+    def match(self, first_page: Image.Image) -> Optional[Tuple[str, DocumentAnalysisResponse]]:
+        """Returns the nearest known form within the distance threshold, if any."""
+        return self.match_hash(dhash(first_page))
+
+    def match_hash(self, page_hash: int) -> Optional[Tuple[str, DocumentAnalysisResponse]]:
+        """Same as ``match`` for an already computed first-page dHash."""
+        if not self._templates:
+            return None
+        best_distance, best = min(
+            ((hamming_distance(page_hash, int(t["hash"], 16)), t) for t in self._templates),
+            key=lambda candidate: candidate[0],
+        )
+        if best_distance > self.max_distance:
+            return None
+        logger.info(f"Upload matched form template '{best['name']}' (distance {best_distance})")
+        return best["name"], DocumentAnalysisResponse(**best["analysis"])
+
+
+def load_first_page(content_type: str, file_path: str) -> Image.Image:
+    """Loads the first page of an upload as a low resolution PIL image."""
+    if content_type == "application/pdf":
+        return render_pdf_page(file_path, page_number=1, dpi=FORM_TEMPLATE_DPI)
+    return Image.open(file_path)
+
+
+def first_page_hash(content_type: str, file_path: str) -> int:
+    """Computes the dHash of an upload's first page (runs in the image process pool)."""
+    return dhash(load_first_page(content_type, file_path))
+
+
+_registry: Optional[TemplateRegistry] = None
+
+
+def get_template_registry() -> TemplateRegistry:
+    global _registry
+    if _registry is None:
+        _registry = TemplateRegistry()
+    return _registry
+
+
+async def match_known_form(content_type: str, file_path: str) -> Optional[DocumentAnalysisResponse]:
+    """
+    Looks up an upload in the template registry.
+
+    :param content_type: MIME type of the upload.
+    :param file_path: Path of the spooled upload.
+    :return: The stored analysis of the matching form, or None.
+    """
+    registry = get_template_registry()
+    if not len(registry):
+        return None
+    try:
+        page_hash = await image_pool.run(first_page_hash, content_type, file_path)
+    except Exception as e:
+        logger.warning(f"Could not render first page for template lookup: {e}")
+        return None
+    match = registry.match_hash(page_hash)
+    return match[1] if match else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Register a known form in the template registry.")
+    parser.add_argument("name", help="Template name, e.g. 'DL-14A'")
+    parser.add_argument("document", help="Path to the blank form (PDF, JPEG or PNG)")
+    parser.add_argument("analysis", help="Path to a JSON file with the DocumentAnalysisResponse of the form")
+    args = parser.parse_args()
+
+    content_type = "application/pdf" if args.document.lower().endswith(".pdf") else "image/jpeg"
+    first_page = load_first_page(content_type, args.document)
+    with open(args.analysis, "r", encoding="utf-8") as f:
+        analysis = DocumentAnalysisResponse(**json.load(f))
+
+    get_template_registry().register(args.name, first_page, analysis)
+    print(f"Registered '{args.name}' with {len(analysis.fields)} fields in {FORM_TEMPLATES_PATH}")
+
+
+if __name__ == "__main__":
+    main()
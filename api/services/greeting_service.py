@@ -0,0 +1,193 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from api.services.llm_gateway import get_gateway
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCALE = "en"
+# Lets the model write extra greeting variants in the background; templates are always served meanwhile
+GREETING_LLM_REFRESH = os.getenv("GREETING_LLM_REFRESH", "false").lower() == "true"
+GREETING_REFRESH_INTERVAL_SECONDS = int(os.getenv("GREETING_REFRESH_INTERVAL_SECONDS", str(6 * 60 * 60)))
+GREETING_VARIANTS_PER_SLOT = int(os.getenv("GREETING_VARIANTS_PER_SLOT", "5"))
+GREETING_MAX_LENGTH = 160
+# Time zone for the time-of-day slot when the client does not send its own (X-Timezone header or tz param)
+GREETING_DEFAULT_TIMEZONE = os.getenv("GREETING_DEFAULT_TIMEZONE", "UTC")
+
+LANGUAGE_NAMES = {"en": "English", "pl": "Polish", "es": "Spanish"}
+
+# {name} is replaced with the user's name, "citizen" for guests
+GREETING_TEMPLATES: Dict[str, Dict[str, List[str]]] = {
+    "en": {
+        "morning": ["Good morning, {name}! What would you like assistance with today? 📋",
+                    "Morning, {name}! Which government service can I help you with? ☕"],
+        "afternoon": ["Good afternoon, {name}! What would you like assistance with today? 📋",
+                      "Hey {name}! What can I help you sort out this afternoon? 📋"],
+        "evening": ["Good evening, {name}! What would you like assistance with today? 📋",
+                    "Hey {name}! Let's get your paperwork done before the day is over. What do you need? 📋"],
+        "night": ["Hey {name}! Burning the midnight oil? What would you like assistance with? 🌙",
+                  "Hey {name}! What would you like assistance with today? 📋"],
+    },
+    "pl": {
+        "morning": ["Dzień dobry, {name}! W czym mogę dziś pomóc? 📋",
+                    "Dzień dobry, {name}! Którą sprawę urzędową załatwiamy dziś rano? ☕"],
+        "afternoon": ["Dzień dobry, {name}! W czym mogę dziś pomóc? 📋",
+                      "Cześć {name}! Jaką sprawę urzędową mamy dziś do załatwienia? 📋"],
+        "evening": ["Dobry wieczór, {name}! W czym mogę pomóc? 📋",
+                    "Cześć {name}! Załatwmy formalności jeszcze dziś. Czego potrzebujesz? 📋"],
+        "night": ["Cześć {name}! Późna pora na urzędowe sprawy, ale chętnie pomogę. 🌙",
+                  "Cześć {name}! W czym mogę pomóc? 📋"],
+    },
+    "es": {
+        "morning": ["¡Buenos días, {name}! ¿En qué trámite te puedo ayudar hoy? 📋"],
+        "afternoon": ["¡Buenas tardes, {name}! ¿En qué trámite te puedo ayudar hoy? 📋"],
+        "evening": ["¡Buenas noches, {name}! ¿En qué trámite te puedo ayudar? 📋"],
+        "night": ["¡Hola, {name}! ¿En qué trámite te puedo ayudar? 🌙"],
+    },
+}
+
+GREETING_PROMPT = (
+    "Write {count} short, friendly opening greetings in {language} for an assistant that helps citizens "
+    "with government services (DMV, taxes, health, education). They are shown in the {time_of_day}. "
+    "Each greeting must contain the placeholder {{name}} exactly once, end with a question about what the "
+    "user needs help with, and be at most {max_length} characters. "
+    "Return only a JSON array of strings."
+)
+
+
+def time_of_day(hour: int) -> str:
+    if 5 <= hour < 12:
+        return "morning"
+    if 12 <= hour < 18:
+        return "afternoon"
+    if 18 <= hour < 23:
+        return "evening"
+    return "night"
+
+
+_UTC_OFFSET = re.compile(r"^(?:UTC|GMT)?([+-])(\d{1,2})(?::?(\d{2}))?$", re.IGNORECASE)
+
+
+def parse_timezone(value: Optional[str]) -> Optional[timezone]:
+    """Parses an IANA time zone name (e.g. "Europe/Warsaw") or a UTC offset (e.g. "+02:00", "UTC-5")."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    match = _UTC_OFFSET.match(value)
+    if match:
+        sign, hours, minutes = match.groups()
+        offset = timedelta(hours=int(hours), minutes=int(minutes or 0))
+        if offset > timedelta(hours=14):
+            return None
+        return timezone(-offset if sign == "-" else offset)
+    try:
+        return ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def client_now(client_timezone: Optional[str] = None) -> datetime:
+    """Current time in the client's time zone, so the greeting matches their time of day, not the server's."""
+    tz = parse_timezone(client_timezone) or parse_timezone(GREETING_DEFAULT_TIMEZONE) or timezone.utc
+    return datetime.now(tz)
+
+
+def resolve_locale(accept_language: Optional[str]) -> str:
+    """Picks the first supported language of an Accept-Language header (e.g. "pl-PL,pl;q=0.9,en;q=0.8")."""
+    for part in (accept_language or "").split(","):
+        language = part.split(";")[0].strip().split("-")[0].lower()
+        if language in GREETING_TEMPLATES:
+            return language
+    return DEFAULT_LOCALE
+
+
+def is_valid_variant(text: str) -> bool:
+    if len(text) > GREETING_MAX_LENGTH or text.count("{name}") != 1:
+        return False
+    # Any other braces would break str.format
+    rest = text.replace("{name}", "")
+    return "{" not in rest and "}" not in rest
+
+
+async def generate_variants_with_model(locale: str, slot: str, count: int) -> List[str]:
+    response = await get_gateway().chat_completion(
+        task="greeting",
+        messages=[{"role": "user", "content": GREETING_PROMPT.format(
+            count=count, language=LANGUAGE_NAMES.get(locale, locale), time_of_day=slot, max_length=GREETING_MAX_LENGTH,
+        )}],
+        max_tokens=400,
+        temperature=0.9,
+    )
+    content = response.choices[0].message.content.strip()
+    # The model sometimes wraps the array in a code block
+    content = content[content.find("["):content.rfind("]") + 1]
+    return json.loads(content)
+
+
+class GreetingPool:
+    """
+    Greeting variants per locale and time of day, served from memory.
+
+    The pool starts with the built-in templates, so a greeting never waits for
+    the model. When enabled, ``refresh`` asks the model for extra variants in
+    the background and swaps them in once they pass validation.
+    """
+
+    def __init__(
+        self,
+        templates: Dict[str, Dict[str, List[str]]] = GREETING_TEMPLATES,
+        generate: Callable[[str, str, int], Awaitable[List[str]]] = generate_variants_with_model,
+    ):
+        self.templates = templates
+        self.generate = generate
+        self._variants: Dict[Tuple[str, str], List[str]] = {
+            (locale, slot): list(variants) for locale, slots in templates.items() for slot, variants in slots.items()
+        }
+        self._task: Optional[asyncio.Task] = None
+
+    def greeting(self, name: Optional[str] = None, locale: str = DEFAULT_LOCALE, now: Optional[datetime] = None) -> str:
+        """Returns a greeting for the user; no I/O, so it is safe on the request path."""
+        if locale not in self.templates:
+            locale = DEFAULT_LOCALE
+        slot = time_of_day((now or datetime.now()).hour)
+        template = random.choice(self._variants[(locale, slot)])
+        return template.format(name=name or "citizen")
+
+    async def refresh(self, count: int = GREETING_VARIANTS_PER_SLOT) -> int:
+        """Adds model-written variants to every slot; returns how many were accepted."""
+        accepted = 0
+        for locale, slot in list(self._variants):
+            try:
+                generated = [text.strip() for text in await self.generate(locale, slot, count) if isinstance(text, str)]
+            except Exception as e:
+                logger.warning(f"Greeting refresh for {locale}/{slot} failed: {e}")
+                continue
+            valid = [text for text in generated if is_valid_variant(text)]
+            # Replaces the previous model-written variants, the templates always stay
+            self._variants[(locale, slot)] = list(self.templates[locale][slot]) + valid
+            accepted += len(valid)
+        logger.info(f"Greeting pool refreshed with {accepted} generated variants")
+        return accepted
+
+    def start(self, interval: int = GREETING_REFRESH_INTERVAL_SECONDS) -> None:
+        async def run():
+            while True:
+                await self.refresh()
+                await asyncio.sleep(interval)
+
+        self._task = asyncio.create_task(run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+greeting_pool = GreetingPool()
@@ -2,94 +2,102 @@ import logging
 import os
 import json
 import re
-from openai import OpenAI  
+from typing import Tuple
 from fastapi import HTTPException
-from pydantic import BaseModel
-from typing import List
+from api.models.document_models import DocumentAnalysisResponse, Field, Position
 from api.db.queries import save_document_analysis
 from api.db.database import SessionLocal
 from api.firebase.firebase_service import DocumentManager
+from api.services.vision_cache import get_vision_cache, page_cache_key
+from api.services.llm_gateway import get_gateway
 
 logger = logging.getLogger(__name__)
 
-XAI_API_KEY = os.getenv("XAI_API_KEY")
-VISION_MODEL_NAME = "grok-vision-beta"
+FIELD_EXTRACTION_PROMPT_VERSION = "fields-v1"
+FIELD_EXTRACTION_PROMPT = (
+    "Analyze this document and extract all form fields. "
+    "For each field, return the following information:\n"
+    "- 'field_name': The field name (e.g., 'Full Name').\n"
+    "- 'position': The exact location of the field in the document (e.g., X, Y coordinates, width, height).\n"
+    "- 'required_value': The type of data required in this field (e.g., 'Text', 'Number', 'Date', 'Email').\n"
+    "- 'is_required': Whether the field is mandatory (true/false).\n"
+    "Return the result in JSON format:\n"
+    "{\n"
+    "  \"fields\": [\n"
+    "    { \"field_name\": \"<field_label>\", \"position\": { \"x\": <x>, \"y\": <y>, \"width\": <width>, \"height\": <height> }, \"required_value\": \"<data_type>\", \"is_required\": <true/false> }\n"
+    "  ]\n"
+    "}"
+)
 
-client = OpenAI(api_key=XAI_API_KEY, base_url="https://api.x.ai/v1")
+async def save_document_analysis_result(session_id: str, file_path: str, content_type: str, analysis: DocumentAnalysisResponse) -> None:
+    """Saves the uploaded document and its field analysis to Firebase."""
+    analysis_data = {
+        "fields": [field.dict() for field in analysis.fields],
+        "document_id": session_id
+    }
+    await DocumentManager.save_document(session_id, file_path, analysis_data, content_type)
 
-class Position(BaseModel):
-    x: float
-    y: float
-    width: float
-    height: float
-
-class Field(BaseModel):
-    field_name: str
-    position: Position
-    required_value: str
-    is_required: bool
-
-class DocumentAnalysisResponse(BaseModel):
-    fields: List[Field]
+async def _request_field_extraction(base64_image: str) -> Tuple[str, str]:
+    """Sends a page to the Vision model and returns the model that answered and the raw text of its answer."""
+    logger.debug("Sending request to the Vision model...")
+    
+    # Send the request through the shared model gateway
+    model, response = await get_gateway().routed_chat_completion(
+        task="vision",
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:image/jpeg;base64,{base64_image}",
+                            "detail": "low", 
+                        },
+                    },
+                    {
+                        "type": "text",
+                        "text": FIELD_EXTRACTION_PROMPT
+                    }
+                ]
+            }
+        ]
+    )
+    
+    # Accessing the 'choices' attribute correctly
+    # response.choices is a list, we need to access the first element
+    choice = response.choices[0]
+    
+    # If the message contains JSON data (fields in a structured format), we can process it here
+    response_data = choice.message.content
+    return model, response_data
 
-async def analyze_document_with_vision(base64_image: str, session_id: str, file_data: bytes) -> dict:
+async def analyze_document_with_vision(base64_image: str) -> DocumentAnalysisResponse:
     """
-    Analyzes a document from an image and extracts form fields, their exact location, and required data.
+    Analyzes a single page image and extracts form fields, their exact location, and required data.
+
+    A page without form fields (e.g. an instructions page) returns an empty field list;
+    pages are merged and saved by the caller.
 
     :param base64_image: Document image in Base64 format.
-    :return: A dictionary containing a list of detected fields with their names, locations, and required values.
+    :return: The detected fields with their names, locations, and required values.
     """
     try:
-        logger.debug("Sending request to the Vision model...")
-        
-        # Send the request to OpenAI's API
-        response = client.chat.completions.create(
-            model=VISION_MODEL_NAME,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}",
-                                "detail": "low", 
-                            },
-                        },
-                        {
-                            "type": "text",
-                            "text": (
-                                "Analyze this document and extract all form fields. "
-                                "For each field, return the following information:\n"
-                                "- 'field_name': The field name (e.g., 'Full Name').\n"
-                                "- 'position': The exact location of the field in the document (e.g., X, Y coordinates, width, height).\n"
-                                "- 'required_value': The type of data required in this field (e.g., 'Text', 'Number', 'Date', 'Email').\n"
-                                "- 'is_required': Whether the field is mandatory (true/false).\n"
-                                "Return the result in JSON format:\n"
-                                "{\n"
-                                "  \"fields\": [\n"
-                                "    { \"field_name\": \"<field_label>\", \"position\": { \"x\": <x>, \"y\": <y>, \"width\": <width>, \"height\": <height> }, \"required_value\": \"<data_type>\", \"is_required\": <true/false> }\n"
-                                "  ]\n"
-                                "}"
-                            )
-                        }
-                    ]
-                }
-            ]
-        )
-        
-        logger.debug(f"Response received: {response}")
-        
-        # Accessing the 'choices' attribute correctly
-        # response.choices is a list, we need to access the first element
-        choice = response.choices[0]
-        
-        # If the message contains JSON data (fields in a structured format), we can process it here
-        response_data = choice.message.content
+        cache = get_vision_cache()
+        # Looked up under the model the router would call now, stored under the model that answered
+        model = get_gateway().router.pick("vision")
+        response_data = await cache.aget(page_cache_key(base64_image, FIELD_EXTRACTION_PROMPT_VERSION, model)) if cache else None
+        from_cache = response_data is not None
+
+        if from_cache:
+            logger.debug("Vision cache hit for page.")
+        else:
+            model, response_data = await _request_field_extraction(base64_image)
         
         # Parsowanie odpowiedzi
-        logger.debug(f"Raw response data (type: {type(response_data)}): {response_data}")
+        logger.debug("Raw response data (%d chars)", len(response_data or ""))
         
+        raw_response = response_data
         if isinstance(response_data, str):
             try:
                 # Usuń ewentualne znaki specjalne przed/po JSON
@@ -135,18 +143,8 @@ async def analyze_document_with_vision(base64_image: str, session_id: str, file_
                 logger.error(f"Błąd przetwarzania pola: {e} | Dane: {field_data}")
                 continue
                 
-        if not fields:
-            raise ValueError("Brak wykrytych pól w dokumencie")
-            
-        # Zapisz wyniki do bazy
-        async with SessionLocal() as session:
-            analysis_data = {
-                "fields": [field.dict() for field in fields],
-                "document_id": session_id
-            }
-            
-            # Zapisz do Firebase
-            await DocumentManager.save_document(session_id, file_data, analysis_data)
+        if cache and not from_cache and isinstance(raw_response, str):
+            await cache.aput(page_cache_key(base64_image, FIELD_EXTRACTION_PROMPT_VERSION, model), raw_response)
             
         return DocumentAnalysisResponse(fields=fields)
     
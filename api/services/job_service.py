@@ -0,0 +1,275 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# "memory" or "sqlite:///<path>"
+JOB_STORE_URL = os.getenv("JOB_STORE_URL", f"sqlite:///{os.path.join(os.getenv('TMPDIR', '/tmp'), 'govassist_jobs.sqlite3')}")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+# Finished jobs are kept this long for polling
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", str(24 * 60 * 60)))
+# How often expired jobs are removed while the API is running
+JOB_PURGE_INTERVAL_SECONDS = float(os.getenv("JOB_PURGE_INTERVAL_SECONDS", str(60 * 60)))
+JOB_POLL_INTERVAL = 0.5
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED_STATUSES = {SUCCEEDED, FAILED}
+
+
+class JobQueueFullError(RuntimeError):
+    """No more jobs can be accepted until the workers catch up."""
+
+
+class JobStore(ABC):
+    """Persists job status and results, so any API worker can answer a status poll."""
+
+    @abstractmethod
+    async def create(self, job_id: str, kind: str) -> None: ...
+
+    @abstractmethod
+    async def update(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None) -> None: ...
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def purge(self, older_than: float) -> int: ...
+
+
+class InMemoryJobStore(JobStore):
+    """Job store for a single process and for tests."""
+
+    def __init__(self):
+        self._jobs: Dict[str, dict] = {}
+
+    async def create(self, job_id: str, kind: str) -> None:
+        now = time.time()
+        self._jobs[job_id] = {"job_id": job_id, "kind": kind, "status": PENDING,
+                              "result": None, "error": None, "created_at": now, "updated_at": now}
+
+    async def update(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+        self._jobs[job_id].update(status=status, result=result, error=error, updated_at=time.time())
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def purge(self, older_than: float) -> int:
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job["status"] in FINISHED_STATUSES and job["updated_at"] < older_than]
+        for job_id in expired:
+            del self._jobs[job_id]
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """Job store in a local SQLite file, shared by all API workers on the host."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, result TEXT, error TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cursor
+
+    async def create(self, job_id: str, kind: str) -> None:
+        now = time.time()
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO jobs (job_id, kind, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, kind, PENDING, now, now),
+        )
+
+    async def update(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE job_id = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id),
+        )
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        row = (await asyncio.to_thread(
+            self._execute,
+            "SELECT job_id, kind, status, result, error, created_at, updated_at FROM jobs WHERE job_id = ?",
+            (job_id,),
+        )).fetchone()
+        if row is None:
+            return None
+        keys = ["job_id", "kind", "status", "result", "error", "created_at", "updated_at"]
+        job = dict(zip(keys, row))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    async def purge(self, older_than: float) -> int:
+        cursor = await asyncio.to_thread(
+            self._execute,
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (SUCCEEDED, FAILED, older_than),
+        )
+        return cursor.rowcount
+
+
+def create_job_store(url: str = JOB_STORE_URL) -> JobStore:
+    if url == "memory":
+        return InMemoryJobStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteJobStore(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported job store: {url}")
+
+
+class JobQueue:
+    """
+    Runs long document jobs in background workers of the API process.
+
+    ``submit`` returns a job id immediately; clients poll ``get`` or wait on
+    ``wait`` until the job has finished. Handlers live in memory, so jobs still
+    queued when the process stops are marked as failed.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = JOB_WORKERS,
+        max_pending: int = JOB_QUEUE_SIZE,
+        ttl: float = JOB_TTL_SECONDS,
+        purge_interval: float = JOB_PURGE_INTERVAL_SECONDS,
+    ):
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._finished: Dict[str, asyncio.Event] = {}
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        purged = await self.purge_expired()
+        self._tasks.append(asyncio.create_task(self._purge_loop()))
+        logger.info(f"Job queue started with {self.workers} workers ({purged} expired jobs purged)")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Jobs that never started are marked as failed and their files removed
+        while self._queue is not None and not self._queue.empty():
+            job_id, _, cleanup = self._queue.get_nowait()
+            await self.store.update(job_id, FAILED, error="Job cancelled on shutdown")
+            if cleanup:
+                cleanup()
+
+    async def submit(
+        self,
+        kind: str,
+        handler: Callable[[], Awaitable[BaseModel]],
+        cleanup: Optional[Callable[[], None]] = None,
+    ) -> str:
+        """
+        Queues a job.
+
+        :param kind: Job type, e.g. "analyze-document".
+        :param handler: Coroutine function producing the job's result model.
+        :param cleanup: Called after the job has finished, successfully or not.
+        :return: The id of the new job.
+        :raises JobQueueFullError: The queue already holds ``max_pending`` jobs.
+        """
+        if self._queue is None:
+            raise RuntimeError("Job queue is not started")
+        if self._queue.full():
+            raise JobQueueFullError("Too many pending jobs")
+        job_id = str(uuid.uuid4())
+        await self.store.create(job_id, kind)
+        self._finished[job_id] = asyncio.Event()
+        self._queue.put_nowait((job_id, handler, cleanup))
+        logger.info(f"Job {job_id} ({kind}) queued, {self._queue.qsize()} pending")
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.store.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        """Waits up to ``timeout`` seconds for a job to finish and returns its current state."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await self.store.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in FINISHED_STATUSES or remaining <= 0:
+                return job
+            # Jobs of this process wake the waiter directly, others are polled from the store
+            event = self._finished.get(job_id)
+            try:
+                if event:
+                    await asyncio.wait_for(event.wait(), timeout=remaining)
+                else:
+                    await asyncio.sleep(min(JOB_POLL_INTERVAL, remaining))
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "pending": self._queue.qsize() if self._queue else 0}
+
+    async def purge_expired(self) -> int:
+        """Removes jobs that finished more than ``ttl`` seconds ago; returns how many."""
+        return await self.store.purge(time.time() - self.ttl)
+
+    async def _purge_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            try:
+                purged = await self.purge_expired()
+                if purged:
+                    logger.info(f"Purged {purged} expired jobs")
+            except Exception as e:
+                logger.error(f"Purging expired jobs failed: {e}")
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id, handler, cleanup = await self._queue.get()
+            try:
+                await self.store.update(job_id, RUNNING)
+                result = await handler()
+                await self.store.update(job_id, SUCCEEDED, result=result.dict())
+                logger.info(f"Job {job_id} succeeded (worker {index})")
+            except asyncio.CancelledError:
+                await self.store.update(job_id, FAILED, error="Job cancelled on shutdown")
+                raise
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+                await self.store.update(job_id, FAILED, error=str(getattr(e, "detail", e)))
+            finally:
+                if cleanup:
+                    cleanup()
+                event = self._finished.pop(job_id, None)
+                if event:
+                    event.set()
+                self._queue.task_done()
+
+
+job_queue = JobQueue(create_job_store())
@@ -0,0 +1,382 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import httpx
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI, NOT_GIVEN
+from openai.types import CreateEmbeddingResponse
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from api.services.model_router import ModelRouter, get_model_router
+from api.utils.concurrency import SingleFlight
+from api.utils.metrics import registry
+from api.utils.resilience import STATE_VALUES, CircuitBreaker, CircuitOpenError, hedged
+
+logger = logging.getLogger(__name__)
+
+XAI_API_KEY = os.getenv("XAI_API_KEY")
+XAI_BASE_URL = os.getenv("XAI_BASE_URL", "https://api.x.ai/v1")
+
+# Default timeout of a whole model call; individual calls can pass their own
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+# Keep-alive pool shared by all model calls of the process
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+
+# Concurrent identical requests share one upstream call
+LLM_SINGLE_FLIGHT_ENABLED = os.getenv("LLM_SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+# Interactive tasks get a duplicate request once the first one is slower than the model's p95
+LLM_HEDGE_TASKS = {task.strip() for task in os.getenv("LLM_HEDGE_TASKS", "chat,rag").split(",") if task.strip()}
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "1"))
+# Consecutive failures after which a model is not called for LLM_CIRCUIT_RESET_SECONDS
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+LLM_REQUESTS = registry.counter(
+    "llm_requests_total", "Upstream model calls by outcome (ok or error class).",
+    ["endpoint", "task", "model", "outcome"])
+LLM_LATENCY = registry.histogram(
+    "llm_request_duration_seconds", "Latency of upstream model calls, retries included.",
+    ["endpoint", "task", "model"])
+LLM_TIME_TO_FIRST_TOKEN = registry.histogram(
+    "llm_time_to_first_token_seconds", "Time until the first chunk of a streamed completion.",
+    ["task", "model"])
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "Prompt and completion tokens reported by the model API.", ["task", "model", "kind"])
+LLM_TOOL_CALLS = registry.counter(
+    "llm_tool_calls_total", "Tool calls requested by the model.", ["tool"])
+LLM_RETRIES = registry.counter(
+    "llm_retries_total", "Retried model calls by status code or connection error.", ["reason"])
+LLM_FALLBACKS = registry.counter(
+    "llm_fallbacks_total", "Calls moved to the next model of the tier after the routed one failed.",
+    ["task", "model", "fallback"])
+LLM_HEDGES = registry.counter(
+    "llm_hedged_requests_total", "Duplicate requests sent after the hedge delay, and how many of them won.",
+    ["task", "result"])
+LLM_CIRCUIT_REJECTIONS = registry.counter(
+    "llm_circuit_rejections_total", "Calls not made because the model's circuit breaker was open.", ["model"])
+
+
+def backoff_delay(attempt: int, base: float = LLM_BACKOFF_BASE_SECONDS, cap: float = LLM_BACKOFF_MAX_SECONDS,
+                  retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff; a Retry-After from the server takes precedence."""
+    if retry_after is not None:
+        return min(cap, retry_after)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def request_key(endpoint: str, params: dict) -> str:
+    """Hash of everything sent upstream (model, messages, tools and sampling parameters)."""
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{endpoint}\0{payload}".encode("utf-8")).hexdigest()
+
+
+def _record_usage(task: str, model: Optional[str], response: Any) -> None:
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        LLM_TOKENS.inc(usage.prompt_tokens or 0, task=task, model=model, kind="prompt")
+        LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, task=task, model=model, kind="completion")
+    for choice in getattr(response, "choices", None) or []:
+        for tool_call in getattr(choice.message, "tool_calls", None) or []:
+            LLM_TOOL_CALLS.inc(tool=tool_call.function.name)
+
+
+def _record_chunk(task: str, model: Optional[str], chunk: ChatCompletionChunk) -> None:
+    if chunk.usage is not None:
+        _record_usage(task, model, chunk)
+    for choice in chunk.choices:
+        for tool_call in choice.delta.tool_calls or []:
+            # Only the first delta of a tool call carries its name
+            if tool_call.function and tool_call.function.name:
+                LLM_TOOL_CALLS.inc(tool=tool_call.function.name)
+
+
+def is_model_failure(error: Exception) -> bool:
+    """Failures caused by the model service (overload, outage, timeout) rather than by the request."""
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, APIConnectionError)
+
+
+def _retry_after(error: APIStatusError) -> Optional[float]:
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    """
+    Single async entry point for all x.ai model calls.
+
+    One ``AsyncOpenAI`` client over a pooled keep-alive ``httpx.AsyncClient`` is
+    shared by every caller. Calls are retried with jittered backoff on 429/5xx
+    and connection errors, and concurrent identical calls are coalesced into
+    one upstream request. Calls that do not name a model are routed by task
+    through the ``ModelRouter`` and fall back to the next model of the tier
+    when the routed one fails. Each model has a circuit breaker, so a model
+    that keeps failing is skipped instead of waited for, and slow non-streamed
+    calls of interactive tasks are hedged with a duplicate request. The HTTP
+    transport can be swapped (e.g. for a local stand-in server in tests).
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = XAI_API_KEY,
+        base_url: str = XAI_BASE_URL,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE_SECONDS,
+        single_flight: bool = LLM_SINGLE_FLIGHT_ENABLED,
+        router: Optional[ModelRouter] = None,
+        hedge_tasks: Optional[set] = None,
+        circuit_failure_threshold: int = LLM_CIRCUIT_FAILURE_THRESHOLD,
+        circuit_reset_timeout: float = LLM_CIRCUIT_RESET_SECONDS,
+    ):
+        self.router = router or get_model_router()
+        self.hedge_tasks = LLM_HEDGE_TASKS if hedge_tasks is None else hedge_tasks
+        self.circuit_failure_threshold = circuit_failure_threshold
+        self.circuit_reset_timeout = circuit_reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.single_flight = SingleFlight() if single_flight else None
+        self._http = httpx.AsyncClient(
+            transport=transport,
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(timeout, connect=LLM_CONNECT_TIMEOUT_SECONDS),
+        )
+        # Retries are handled here, so the SDK's own retry loop is disabled
+        self.client = AsyncOpenAI(api_key=api_key or "missing-api-key", base_url=base_url,
+                                  http_client=self._http, max_retries=0)
+
+    async def chat_completion(self, task: str = "chat", timeout: Optional[float] = None, **kwargs: Any) -> ChatCompletion:
+        """
+        Calls chat.completions.create with retries; kwargs are passed to the SDK unchanged.
+
+        :param task: What the call is for (e.g. "chat", "vision", "rag"); selects the model when
+            none is given and labels the metrics.
+        """
+        _, response = await self.routed_chat_completion(task, timeout, **kwargs)
+        return response
+
+    async def routed_chat_completion(self, task: str = "chat", timeout: Optional[float] = None,
+                                     **kwargs: Any) -> Tuple[str, ChatCompletion]:
+        """Like ``chat_completion``, but also returns the model that answered, after any fallback."""
+        return await self._routed(task, kwargs, lambda params: self._answered_by(params["model"], self._coalesced(
+            "chat.completions", params, lambda: self._attempt(params["model"], lambda: self._instrumented(
+                "chat.completions", task, params["model"],
+                lambda: self._hedged(task, params["model"], lambda: self._with_retries(
+                    lambda: self.client.chat.completions.create(timeout=timeout or NOT_GIVEN, **params)
+                )),
+            )))))
+
+    @staticmethod
+    async def _answered_by(model: str, call: Awaitable[Any]) -> Tuple[str, Any]:
+        return model, await call
+
+    async def stream_chat_completion(self, task: str = "chat", timeout: Optional[float] = None,
+                                     **kwargs: Any) -> AsyncIterator[ChatCompletionChunk]:
+        """
+        Streams chat completion chunks as they arrive.
+
+        Only opening the stream is retried; once chunks have been forwarded to the
+        caller a failure is raised, since the partial answer cannot be taken back.
+        The same holds for the model fallback. Streams are not hedged.
+        """
+        model = kwargs.get("model")
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            model, stream = await self._routed(task, kwargs, lambda params: self._attempt(
+                params["model"], lambda: self._open_stream(params, timeout)))
+            first_chunk = True
+            try:
+                async for chunk in stream:
+                    if first_chunk:
+                        LLM_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - start, task=task, model=model)
+                        first_chunk = False
+                    _record_chunk(task, model, chunk)
+                    yield chunk
+            finally:
+                await stream.close()
+        except GeneratorExit:
+            # The client went away before the end of the stream
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            LLM_REQUESTS.inc(endpoint="chat.completions.stream", task=task, model=model, outcome=outcome)
+            LLM_LATENCY.observe(time.perf_counter() - start, endpoint="chat.completions.stream", task=task, model=model)
+
+    async def _open_stream(self, params: dict, timeout: Optional[float]):
+        stream = await self._with_retries(
+            lambda: self.client.chat.completions.create(stream=True, timeout=timeout or NOT_GIVEN, **params)
+        )
+        return params["model"], stream
+
+    async def embeddings(self, task: str = "embeddings", timeout: Optional[float] = None,
+                         **kwargs: Any) -> CreateEmbeddingResponse:
+        """Calls embeddings.create with retries; the model must be given."""
+        return await self._routed(task, kwargs, lambda params: self._coalesced(
+            "embeddings", params, lambda: self._attempt(params["model"], lambda: self._instrumented(
+                "embeddings", task, params["model"],
+                lambda: self._with_retries(
+                    lambda: self.client.embeddings.create(timeout=timeout or NOT_GIVEN, **params)
+                ),
+            ))))
+
+    async def _routed(self, task: str, kwargs: dict, call: Callable[[dict], Awaitable[Any]]) -> Any:
+        """
+        Makes the call with the model given by the caller, or with the models the router
+        suggests for the task, moving to the next one when a model fails or its circuit
+        is open. When no model is left the last error (e.g. ``CircuitOpenError``) is raised.
+        """
+        models = [kwargs["model"]] if kwargs.get("model") else self.router.candidates(task)
+        for index, model in enumerate(models):
+            try:
+                return await call({**kwargs, "model": model})
+            except CircuitOpenError:
+                if index == len(models) - 1:
+                    raise
+            except Exception as e:
+                if not is_model_failure(e) or index == len(models) - 1:
+                    raise
+                logger.warning(f"Model {model} failed for task {task} ({type(e).__name__}), "
+                               f"falling back to {models[index + 1]}")
+                LLM_FALLBACKS.inc(task=task, model=model, fallback=models[index + 1])
+
+    async def _attempt(self, model: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Makes one upstream call to a model behind its circuit breaker.
+
+        The latency and outcome are reported to the router and the breaker here, inside
+        the shared single-flight call, so callers coalesced onto one upstream request
+        count as a single sample, not one per caller.
+        """
+        breaker = self._breaker(model)
+        if not breaker.allow():
+            LLM_CIRCUIT_REJECTIONS.inc(model=model)
+            raise CircuitOpenError(model, breaker.retry_after())
+        start = time.perf_counter()
+        try:
+            result = await call()
+        except Exception as e:
+            if not is_model_failure(e):
+                # The model service answered; the request itself was wrong
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            self.router.record(model, time.perf_counter() - start, ok=False)
+            raise
+        breaker.record_success()
+        self.router.record(model, time.perf_counter() - start, ok=True)
+        return result
+
+    def _breaker(self, model: str) -> CircuitBreaker:
+        breaker = self.breakers.get(model)
+        if breaker is None:
+            breaker = self.breakers[model] = CircuitBreaker(
+                f"llm:{model}", self.circuit_failure_threshold, self.circuit_reset_timeout)
+        return breaker
+
+    async def _hedged(self, task: str, model: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Sends a duplicate request when the call takes longer than the model's p95 latency."""
+        delay = None
+        if task in self.hedge_tasks:
+            p95 = self.router.p95(model)
+            delay = max(LLM_HEDGE_MIN_DELAY_SECONDS, p95) if p95 is not None else None
+        result, from_hedge = await hedged(call, delay, on_hedge=lambda: LLM_HEDGES.inc(task=task, result="sent"))
+        if from_hedge:
+            LLM_HEDGES.inc(task=task, result="won")
+        return result
+
+    def circuit_states(self) -> List[Tuple[Dict[str, str], float]]:
+        """State of each model's circuit breaker (0 closed, 1 half-open, 2 open), for metrics."""
+        return [({"model": model}, STATE_VALUES[breaker.state]) for model, breaker in self.breakers.items()]
+
+    async def _coalesced(self, endpoint: str, params: dict, call: Callable[[], Awaitable[Any]]) -> Any:
+        if self.single_flight is None:
+            return await call()
+        return await self.single_flight.do(request_key(endpoint, params), call)
+
+    async def _instrumented(self, endpoint: str, task: str, model: Optional[str], call: Callable[[], Awaitable[Any]]) -> Any:
+        """Records latency, outcome and token usage of one upstream call (including its retries)."""
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            response = await call()
+            _record_usage(task, model, response)
+            return response
+        except Exception as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            LLM_REQUESTS.inc(endpoint=endpoint, task=task, model=model, outcome=outcome)
+            LLM_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint, task=task, model=model)
+
+    def stats(self) -> dict:
+        """Single-flight counters: upstream calls made and identical calls that shared them."""
+        return self.single_flight.stats() if self.single_flight else {"calls": 0, "coalesced": 0, "in_flight": 0}
+
+    async def _with_retries(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await call()
+            except APIStatusError as e:
+                if e.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base, retry_after=_retry_after(e))
+                logger.warning(f"Model call failed with {e.status_code}, retry {attempt + 1} in {delay:.2f}s")
+                LLM_RETRIES.inc(reason=str(e.status_code))
+            except APIConnectionError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base)
+                logger.warning(f"Model call failed ({type(e).__name__}), retry {attempt + 1} in {delay:.2f}s")
+                LLM_RETRIES.inc(reason=type(e).__name__)
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def get_gateway() -> LLMGateway:
+    """Returns the process-wide gateway, creating it on first use."""
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway()
+    return _gateway
+
+
+def configure_gateway(**kwargs: Any) -> LLMGateway:
+    """Replaces the process-wide gateway, e.g. to point it at a stand-in transport."""
+    global _gateway
+    _gateway = LLMGateway(**kwargs)
+    return _gateway
+
+
+async def close_gateway() -> None:
+    global _gateway
+    if _gateway is not None:
+        await _gateway.aclose()
+        _gateway = None
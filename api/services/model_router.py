@@ -0,0 +1,200 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rolling window of per-model samples used for the health decisions
+MODEL_HEALTH_WINDOW_SECONDS = float(os.getenv("MODEL_HEALTH_WINDOW_SECONDS", "300"))
+MODEL_HEALTH_MAX_SAMPLES = int(os.getenv("MODEL_HEALTH_MAX_SAMPLES", "500"))
+# A model is only judged degraded once it has this many samples in the window
+MODEL_HEALTH_MIN_SAMPLES = int(os.getenv("MODEL_HEALTH_MIN_SAMPLES", "10"))
+MODEL_MAX_ERROR_RATE = float(os.getenv("MODEL_MAX_ERROR_RATE", "0.25"))
+
+# Tiers list their models in order of preference; the first healthy one is used.
+# "large" answers citizens, "small" does the short background jobs (titles,
+# summaries, greetings) where latency and cost matter more than quality.
+DEFAULT_ROUTES = {
+    "tiers": {
+        "large": {"models": ["grok-2-latest", "grok-beta"], "p95_budget_seconds": 20},
+        "small": {"models": ["grok-beta", "grok-2-latest"], "p95_budget_seconds": 8},
+        "vision": {"models": ["grok-vision-beta", "grok-2-vision-1212"], "p95_budget_seconds": 30},
+    },
+    "tasks": {
+        "chat": "large",
+        "rag": "large",
+        "vision": "vision",
+        "document_feedback": "small",
+        "title": "small",
+        "summary": "small",
+        "greeting": "small",
+    },
+    "default_tier": "large",
+}
+
+
+def load_routes(raw: Optional[str] = None) -> dict:
+    """
+    Returns the routing config, with ``MODEL_ROUTES`` (JSON) merged over the defaults.
+
+    Example: ``{"tasks": {"summary": "large"}, "tiers": {"small": {"models": ["grok-2-1212"]}}}``
+
+    Raises:
+        ValueError: If the override is not valid JSON or references an unknown tier.
+    """
+    raw = os.getenv("MODEL_ROUTES") if raw is None else raw
+    routes = {
+        "tiers": {name: dict(tier) for name, tier in DEFAULT_ROUTES["tiers"].items()},
+        "tasks": dict(DEFAULT_ROUTES["tasks"]),
+        "default_tier": DEFAULT_ROUTES["default_tier"],
+    }
+    if raw:
+        try:
+            override = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"MODEL_ROUTES is not valid JSON: {e}")
+        for name, tier in override.get("tiers", {}).items():
+            routes["tiers"][name] = {**routes["tiers"].get(name, {}), **tier}
+        routes["tasks"].update(override.get("tasks", {}))
+        routes["default_tier"] = override.get("default_tier", routes["default_tier"])
+
+    for task, tier in [*routes["tasks"].items(), ("default", routes["default_tier"])]:
+        if not routes["tiers"].get(tier, {}).get("models"):
+            raise ValueError(f"Task {task} is routed to tier {tier}, which has no models")
+    return routes
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class ModelHealth:
+    """Latency and outcome of a model's recent calls, over a rolling time window."""
+
+    def __init__(self, window_seconds: float = MODEL_HEALTH_WINDOW_SECONDS,
+                 max_samples: int = MODEL_HEALTH_MAX_SAMPLES):
+        self.window_seconds = window_seconds
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=max_samples)
+
+    def record(self, latency: float, ok: bool, now: Optional[float] = None) -> None:
+        self._samples.append((time.monotonic() if now is None else now, latency, ok))
+
+    def _prune(self, now: float) -> None:
+        while self._samples and now - self._samples[0][0] > self.window_seconds:
+            self._samples.popleft()
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, float]:
+        self._prune(time.monotonic() if now is None else now)
+        # Failed calls often end early, so only successful ones describe the latency
+        latencies = sorted(latency for _, latency, ok in self._samples if ok)
+        errors = sum(1 for _, _, ok in self._samples if not ok)
+        samples = len(self._samples)
+        return {
+            "samples": samples,
+            "error_rate": errors / samples if samples else 0.0,
+            "p50_seconds": percentile(latencies, 0.5),
+            "p95_seconds": percentile(latencies, 0.95),
+        }
+
+
+class ModelRouter:
+    """
+    Maps task types to a model tier and picks the model of the tier to call.
+
+    Every upstream call reports its latency and outcome back to the router. A
+    model whose error rate or p95 latency over the window exceeds the limits of
+    its tier is considered degraded and moved behind the other models of the
+    tier until its old samples age out of the window.
+    """
+
+    def __init__(
+        self,
+        routes: Optional[dict] = None,
+        window_seconds: float = MODEL_HEALTH_WINDOW_SECONDS,
+        min_samples: int = MODEL_HEALTH_MIN_SAMPLES,
+        max_error_rate: float = MODEL_MAX_ERROR_RATE,
+    ):
+        self.routes = routes or load_routes()
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self._health: Dict[str, ModelHealth] = {}
+        self._lock = threading.Lock()
+
+    def tier(self, task: str) -> str:
+        return self.routes["tasks"].get(task, self.routes["default_tier"])
+
+    def _health_of(self, model: str) -> ModelHealth:
+        health = self._health.get(model)
+        if health is None:
+            health = self._health[model] = ModelHealth(self.window_seconds)
+        return health
+
+    def record(self, model: Optional[str], latency: float, ok: bool) -> None:
+        """Reports one upstream call; ``ok`` is False for failures that say something about the model."""
+        if not model:
+            return
+        with self._lock:
+            self._health_of(model).record(latency, ok)
+
+    def is_degraded(self, model: str, p95_budget: Optional[float] = None) -> bool:
+        with self._lock:
+            stats = self._health_of(model).snapshot()
+        if stats["samples"] < self.min_samples:
+            return False
+        if stats["error_rate"] > self.max_error_rate:
+            return True
+        return p95_budget is not None and stats["p95_seconds"] > p95_budget
+
+    def p95(self, model: str) -> Optional[float]:
+        """Rolling p95 latency of the model, or None while it has too few samples."""
+        with self._lock:
+            stats = self._health_of(model).snapshot()
+        if stats["samples"] < self.min_samples or not stats["p95_seconds"]:
+            return None
+        return stats["p95_seconds"]
+
+    def candidates(self, task: str) -> List[str]:
+        """Models of the task's tier, healthy ones first, each group in configured order."""
+        tier = self.routes["tiers"][self.tier(task)]
+        budget = tier.get("p95_budget_seconds")
+        degraded = {model for model in tier["models"] if self.is_degraded(model, budget)}
+        if degraded:
+            logger.info(f"Degraded models for task {task}: {sorted(degraded)}")
+        return ([model for model in tier["models"] if model not in degraded]
+                + [model for model in tier["models"] if model in degraded])
+
+    def pick(self, task: str) -> str:
+        """The model to call for a task."""
+        return self.candidates(task)[0]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-model health over the window, e.g. for metrics."""
+        with self._lock:
+            return {model: health.snapshot() for model, health in self._health.items()}
+
+    def gauge_samples(self) -> List[Tuple[Dict[str, str], float]]:
+        return [
+            ({"model": model, "stat": key}, value)
+            for model, stats in self.stats().items()
+            for key, value in stats.items()
+        ]
+
+
+_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """Returns the process-wide router, loading the routes on first use."""
+    global _router
+    if _router is None:
+        _router = ModelRouter()
+    return _router
@@ -1,104 +1,82 @@
+import functools
 import logging
+import math
 import uuid
-from openai import OpenAI
+from typing import Any, AsyncIterator, Optional, Tuple
+from openai.types.chat import ChatCompletionMessage
 from fastapi import HTTPException
 import os
 from api.services.tools_definition import switch_prompt, get_service_links_us, tools_definition
 from api.db.database import SessionLocal
-from api.db.queries import get_conversation_history, add_message, get_document_analysis, get_user_profile
+from api.db.message_sink import message_sink
+from api.db.queries import get_document_analysis, get_user_profile
 from api.services.fill_pdf_service import fill_pdf_service
+from api.services.fill_pdf import fill_pdf_dynamically
+from api.services.llm_gateway import get_gateway
+from api.services.semantic_cache import contains_personal_data, get_semantic_cache
+from api.services.context_service import build_context, schedule_summary_refresh
+from api.services.document_context import build_document_context
+from api.services.title_service import schedule_title_refresh
+from api.services.tool_engine import MAX_TOOL_ROUNDS, ToolEngine, assistant_tool_message, run_tool_loop
+from api.utils.resilience import CircuitOpenError
+from api.utils.stream_utils import StreamAccumulator, sse_event
 import json
 from api.firebase.firebase_service import DocumentManager
 
-# API keys
-XAI_API_KEY = os.getenv("XAI_API_KEY")
-VISION_MODEL_NAME = "grok-vision-beta"
-CHAT_MODEL_NAME = "grok-beta"
-
-client = OpenAI(api_key=XAI_API_KEY, base_url="https://api.x.ai/v1")
 
 logger = logging.getLogger(__name__)
 
+MODEL_UNAVAILABLE_MESSAGE = "The assistant is temporarily unavailable, please try again in a moment."
+
+async def retrieve_and_answer(query: str, ministry: str) -> dict:
+    # rag_tools builds its FAISS index from Firestore on import, so it is loaded on first use only
+    from api.services.rag_tools import retrieve_and_answer as rag_retrieve_and_answer
+    return await rag_retrieve_and_answer(query, ministry)
+
+
 # Mapping of function names to implementations
 tools_map = {
     "switch_prompt": switch_prompt,
     "get_service_links_us": get_service_links_us,
+    "retrieve_and_answer": retrieve_and_answer,
 }
-
-def execute_tool(tool_name: str, tool_args: dict) -> dict:
-    # Check if the tool name exists in the tools map
-    if tool_name in tools_map:
-        tool_function = tools_map[tool_name]
-        # Call the corresponding function with the provided arguments
-        return tool_function(**tool_args)
-    else:
-        raise ValueError(f"Tool {tool_name} not found")
-async def generate_initial_message(name: str = None, user_id: str = None) -> str:
-    """
-    Generates a concise initial greeting message with no extra details.
-    
-    Parameters:
-      - name (str): The name of the user. Defaults to "citizen" if not provided.
-      - user_id (str): The ID of the user; if provided, it will be included in the metadata.
-    
-    The function constructs a prompt that includes the name and calls the Grok endpoint with
-    a metadata field. The metadata is sent as a list where the first element is null and the second
-    element contains user_id.
-    
-    Returns:
-      A string containing a short initial greeting message.
-    """
-    # Use "citizen" if name is None or empty.
-    if not name:
-        name = "citizen"
-
-    # Construct the messages list with the conversation prompt
-    messages = [
-        {"role": "user", "content": f"Hello, my name is {name}. How can I get assistance with government services?"},
-        {"role": "assistant", "content": f"Hey {name}! What would you like assistance with today? 📋"}
-    ]
-
-    # Build the metadata payload; the first element is None, the second element contains user_id.
-    metadata = [None, {"user_id": user_id}]
-    
-    try:
-        # Call the Grok completions endpoint with the correct messages format
-        response = client.chat.completions.create(
-            model="grok-2-latest",
-            max_tokens=60,  # Keep the response short
-            temperature=0.7,  # A bit of creativity for a friendly response
-            messages=messages,
-            metadata=metadata,
-        )
-    
-        # Log the raw API response to check its structure
-        logger.info(f"Raw API response: {response}")
-    
-        # Try accessing the response differently depending on its structure
-        if hasattr(response, 'choices') and len(response.choices) > 0:
-            # Access the 'content' of the message in the first choice
-            completion = response.choices[0].message.content.strip()
-            # Return just the short greeting without additional info
-            initial_message = f"Hey {name}! What would you like assistance with today? 📋"  
-            logger.info(f"Initial message generated: {initial_message}")
-            return initial_message
-        else:
-            logger.error("Response does not contain expected 'choices' attribute.")
-            raise HTTPException(status_code=500, detail="Error generating initial message")
-    
-    except Exception as e:
-        logger.error(f"Error generating initial message: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error generating initial message")
-
-
-
-
-
-def process_image_with_grok(base64_image: str) -> dict:
+# RAG calls the model itself and needs more time than the default tool timeout
+TOOL_TIMEOUTS = {"retrieve_and_answer": 45}
+
+
+DOCUMENT_VALIDATION_PROMPT = (
+    "Analyze this document and extract all fields. Split the output into two categories: "
+    "'completed_fields' and 'empty_fields'. For 'completed_fields', include the "
+    "'field_name' and the 'field_value'. For 'empty_fields', include only the 'field_name'. "
+    "Additionally, identify and validate required fields, and include their statuses (e.g., "
+    "'filled' or 'missing') in the response. Return the results in a clear JSON format "
+    "structured as follows:\n{\n  \"completed_fields\": [\n    { \"field_name\": \"<field_label>\", "
+    "\"field_value\": \"<value_entered>\" }\n  ],\n  \"empty_fields\": [\n    { \"field_name\": "
+    "\"<field_label>\" }\n  ],\n  \"required_field_statuses\": [\n    { \"field_name\": "
+    "\"<field_label>\", \"status\": \"filled\" or \"missing\" }\n  ]\n}\n\nPlease note that the "
+    "'X' next to the 'Signature of Applicant' label indicates the location where the applicant is "
+    "required to sign. It does not mean that the signature has already been provided or that any "
+    "information has been marked. The applicant must place their signature in the designated area "
+    "to complete the form."
+)
+DOCUMENT_FEEDBACK_PROMPT = (
+    "You are a friendly assistant helping a user complete a government form. "
+    "The user message is JSON extracted from the form: \"completed_fields\" (label: value), "
+    "\"empty_fields\", \"missing_required_fields\" and, when a page could not be read, \"unparsed_pages\".\n"
+    "1. Acknowledge the user's effort and confirm the completed values look valid; point out any that do not.\n"
+    "2. For each missing required field, then the other empty fields, explain why it matters "
+    "and how to fill it in, with a short example.\n"
+    "3. End with encouragement to finish the form.\n"
+    "Keep it concise and supportive, using Markdown lists."
+)
+
+
+async def process_image_with_grok(base64_image: str) -> dict:
+    # Not cached: the answer contains the values the citizen filled in
     try:
         logger.debug("Sending request to Grok Vision model.")
-        response = client.chat.completions.create(
-            model=VISION_MODEL_NAME,
+        response = await get_gateway().chat_completion(
+            task="vision",
             messages=[
                 {
                     "role": "user",
@@ -112,21 +90,7 @@ def process_image_with_grok(base64_image: str) -> dict:
                         },
                         {
                             "type": "text",
-                            "text": (
-                                "Analyze this document and extract all fields. Split the output into two categories: "
-                                "'completed_fields' and 'empty_fields'. For 'completed_fields', include the "
-                                "'field_name' and the 'field_value'. For 'empty_fields', include only the 'field_name'. "
-                                "Additionally, identify and validate required fields, and include their statuses (e.g., "
-                                "'filled' or 'missing') in the response. Return the results in a clear JSON format "
-                                "structured as follows:\n{\n  \"completed_fields\": [\n    { \"field_name\": \"<field_label>\", "
-                                "\"field_value\": \"<value_entered>\" }\n  ],\n  \"empty_fields\": [\n    { \"field_name\": "
-                                "\"<field_label>\" }\n  ],\n  \"required_field_statuses\": [\n    { \"field_name\": "
-                                "\"<field_label>\", \"status\": \"filled\" or \"missing\" }\n  ]\n}\n\nPlease note that the "
-                                "'X' next to the 'Signature of Applicant' label indicates the location where the applicant is "
-                                "required to sign. It does not mean that the signature has already been provided or that any "
-                                "information has been marked. The applicant must place their signature in the designated area "
-                                "to complete the form."
-                            )
+                            "text": DOCUMENT_VALIDATION_PROMPT
                         }
                     ]
                 }
@@ -137,64 +101,13 @@ def process_image_with_grok(base64_image: str) -> dict:
         logger.error("Error processing image: %s", str(e))
         raise HTTPException(status_code=500, detail=f"Error processing image: {str(e)}")
 
-def process_document_with_text_model(aggregated_results: list) -> dict:
-    document_context = " ".join([str(result) for result in aggregated_results])
+async def process_document_with_text_model(aggregated_results: list) -> dict:
+    document_context = build_document_context(aggregated_results)
     try:
-        response = client.chat.completions.create(
-            model=CHAT_MODEL_NAME,
-             messages=[
-                {
-                    "role": "system",
-                    "content": """You are a helpful, friendly, and clear assistant with expertise in analyzing and solving form-related issues. 
-                                Provide personalized guidance based on the extracted form data:
-
-                    1. **Completed Fields**:
-                       - Acknowledge the user's effort.
-                       - Verify if the values provided are logical and valid.
-                       ``` 
-                       {completed_fields}async def generate_response(request: dict, session_id: str) -> str:
- 
-                       ```
-
-                    2. **Empty Fields**:
-                       - Explain the importance of each missing field.
-                       - Provide instructions and examples to help complete it.
-                       ``` 
-                       {empty_fields}
-                       ```
-
-                    3. **Required Field Statuses**:
-                       - Identify required fields that are incomplete.
-                       - Prioritize missing required fields and guide the user to address them.
-                       ``` 
-                       {required_field_statuses}
-                       ```
-
-                    ### Output Structure:
-                    - Start with an acknowledgment of the user's effort.
-                    - Highlight completed fields and confirm their validity.
-                    - Provide step-by-step guidance for each missing field, prioritizing required ones.
-                    - Use a supportive tone with examples where relevant.
-                    - End with encouragement to finish the form.
-
-                    ### Example Output:
-                    "Great work so far! Here's what I noticed:
-
-                    ✅ **Completed Fields**:
-                    - **Full Name**: John Doe
-                    - **Date of Birth**: 1990-01-01
-                       These look good!
-
-                    ⚠️ **Fields That Need Attention**:
-                    - **Email Address**: Missing. Please enter your email, e.g., john.doe@example.com.
-
-                    🚨 **Required Fields Missing**:
-                    - **Address**: Enter your full address, e.g., '123 Main St, Springfield, IL 12345'.
-
-                    Keep going, you're almost there! 📝"
-
-                    Generate helpful, supportive text based on the provided data."""
-                },
+        response = await get_gateway().chat_completion(
+            task="document_feedback",
+            messages=[
+                {"role": "system", "content": DOCUMENT_FEEDBACK_PROMPT},
                 {"role": "user", "content": document_context},
             ],
         )
@@ -204,6 +117,110 @@ def process_document_with_text_model(aggregated_results: list) -> dict:
         raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
 
 
+CONVERSATION_SYSTEM_PROMPT = (
+    "You are a friendly and helpful assistant with expertise in various government services. "
+    "I can help with DMV, Health, Education, and Tax-related queries. "
+    "My goal is to simplify processes and make things clear with a little bit of humor along the way."
+)
+
+
+async def _prepare_conversation(user_id: str, session_id: str, question: str) -> list:
+    """Stores the user's question and returns the messages sent to the chat model."""
+    async with SessionLocal() as session:
+        # Retrieve the recent turns and the summary of the older ones
+        session_conversations, stale_until = await build_context(session, user_id, session_id)
+
+    # Add user's question to conversation history; it is written in the next batch
+    await message_sink.add(user_id, session_id, "user", question)
+
+    if stale_until:
+        schedule_summary_refresh(user_id, session_id, stale_until)
+
+    # Prepare base messages, prior conversation and the current question
+    base_messages = [{"role": "system", "content": CONVERSATION_SYSTEM_PROMPT}]
+    base_messages.extend(session_conversations)
+    base_messages.append({"role": "user", "content": question})
+    return base_messages
+
+
+async def dynamic_form_filler(session_id: str, current_step: Optional[dict] = None) -> dict:
+    """
+    Narzędzie prowadzące użytkownika przez wypełnianie formularza pole po polu.
+
+    Zwraca aktualny stan procesu (current_step), który model przekazuje w kolejnym wywołaniu.
+    """
+    current_step = current_step or {}
+
+    # Pobierz analizę dokumentu z Firebase
+    analysis = await DocumentManager.get_document_analysis(session_id)
+
+    if not analysis:
+        return {"message": "Dokument nie został jeszcze przeanalizowany"}
+
+    if not current_step.get("document_id"):
+        # Inicjalizacja procesu
+        current_step = {
+            "document_id": session_id,
+            "remaining_fields": [field["field_name"] for field in analysis["fields"] if field["is_required"]],
+            "collected_data": {},
+            "current_field": None
+        }
+
+    if current_step.get("remaining_fields"):
+        current_field = current_step["remaining_fields"][0]
+        current_step["current_field"] = current_field
+        return {"current_step": current_step, "message": f"Proszę podać wartość dla pola: {current_field}"}
+
+    # Wypełnij PDF gdy wszystkie dane są zebrane
+    pdf_url = await fill_pdf_dynamically(session_id, current_step.get("collected_data", {}))
+    return {"current_step": current_step, "message": f"Dokument został wypełniony: {pdf_url}"}
+
+
+def _tool_engine(session_id: str) -> ToolEngine:
+    """Tools available in one conversation; the form filler is bound to its session."""
+    return ToolEngine(
+        {**tools_map, "dynamic_form_filler": functools.partial(dynamic_form_filler, session_id)},
+        timeouts=TOOL_TIMEOUTS,
+    )
+
+
+def _tool_options(allow_tools: bool) -> dict:
+    # Tools stay declared in follow-up rounds, because the messages contain tool results
+    return {"tools": tools_definition, "tool_choice": "auto" if allow_tools else "none"}
+
+
+# Answers of these tools depend on the session and are never reused by the semantic cache
+SESSION_SPECIFIC_TOOLS = {"dynamic_form_filler"}
+
+
+async def _cached_answer(question: str, ministry: Optional[str], base_messages: list) -> Tuple[Optional[str], Any]:
+    """Looks a first-turn question up in the semantic cache; returns the answer and the question embedding."""
+    cache = get_semantic_cache()
+    # Later turns depend on the conversation so far, only first turns are cached;
+    # questions with personal data are neither looked up nor stored
+    if cache is None or len(base_messages) > 2 or contains_personal_data(question):
+        return None, None
+    vector = await cache.embed(question, ministry)
+    if vector is None:
+        return None, None
+    return cache.search(vector, ministry), vector
+
+
+def _cache_answer(vector: Any, ministry: Optional[str], question: str, answer: Optional[str], tool_calls: Optional[list]) -> None:
+    if vector is None or not answer:
+        return
+    if any(tool_call.function.name in SESSION_SPECIFIC_TOOLS for tool_call in tool_calls or []):
+        return
+    get_semantic_cache().put(vector, ministry, question, answer)
+
+
+async def _save_assistant_message(user_id: str, session_id: str, content: str) -> None:
+    # Save assistant response if user is logged in
+    if user_id:
+        await message_sink.add(user_id, session_id, "assistant", content)
+        schedule_title_refresh(user_id, session_id)
+
+
 async def generate_response(request: dict, session_id: str) -> str:
     user_id = request.get("user_id")
     question = request.get("question")
@@ -213,155 +230,116 @@ async def generate_response(request: dict, session_id: str) -> str:
 
     logger.info(f"Received question: {question} from session ID: {session_id}")
 
-    async with SessionLocal() as session:
-        # Retrieve conversation history
-        session_conversations = await get_conversation_history(session, user_id, session_id)
-
-        # Add user's question to conversation history
-        await add_message(session, user_id, session_id, "user", question)
-
-        # Prepare base messages
-        base_messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are a friendly and helpful assistant with expertise in various government services. "
-                    "I can help with DMV, Health, Education, and Tax-related queries. "
-                    "My goal is to simplify processes and make things clear with a little bit of humor along the way."
-                )
-            }
-        ]
-
-        # Append prior conversation and the current question
-        base_messages.extend(session_conversations)
-        base_messages.append({"role": "user", "content": question})
+    ministry = request.get("ministry")
+    base_messages = await _prepare_conversation(user_id, session_id, question)
+
+    cached_answer, question_vector = await _cached_answer(question, ministry, base_messages)
+    if cached_answer:
+        await _save_assistant_message(user_id, session_id, cached_answer)
+        return cached_answer
 
     try:
-        # Request response from AI model
-        logger.info("Requesting response from OpenAI model")
-        response = client.chat.completions.create(
-            model="grok-2-latest",
-            messages=base_messages,
-            max_tokens=500, 
-            tools=tools_definition,
-            tool_choice="auto"
-        )
-        logger.info("Response received from OpenAI model")
-
-        fingerprint = response.system_fingerprint  
-        logger.info(f"System Fingerprint: {fingerprint}")
-
-        model_response = response.choices[0].message
-        tool_calls = model_response.tool_calls
-
-        final_response = None
-
-        if tool_calls:
-            logger.info(f"Processing {len(tool_calls)} tool calls")
-            # Nowe logowanie użytych narzędzi
-            tool_names = [tool_call.function.name for tool_call in tool_calls]
-            logger.info(f"Użyte narzędzia w żądaniu - Sesja: {session_id}, Użytkownik: {user_id}, Narzędzia: {tool_names}")
-            
-            for tool_call in tool_calls:
-                tool_name = tool_call.function.name
-                tool_args = json.loads(tool_call.function.arguments)
-                # Rozszerzone logowanie szczegółów
-                logger.debug(f"Przetwarzanie narzędzia - Sesja: {session_id}, Użytkownik: {user_id}, Narzędzie: {tool_name}, Argumenty: {tool_args}")
-
-                # Obsługa istniejących narzędzi
-                if tool_name == "retrieve_and_answer":
-                    ministry = tool_args.get("ministry")
-                    result = execute_tool(tool_name, tool_args)
-                    final_response = result.get("answer", "I couldn't find an answer using the available tools.")
-                    
-                elif tool_name == "get_service_links_us":
-                    result = execute_tool(tool_name, tool_args)
-                    if "link" in result:
-                        final_response = f"Here is the link: {result['link']}"
-                        
-                # Nowa funkcjonalność: dynamiczne wypełnianie formularza
-                elif tool_name == "dynamic_form_filler":
-                    current_step = tool_args.get("current_step", {})
-                    
-                    # Pobierz analizę dokumentu z Firebase
-                    analysis = await DocumentManager.get_document_analysis(session_id)
-                    
-                    if not analysis:
-                        return "Dokument nie został jeszcze przeanalizowany"
-                        
-                    if not current_step.get("document_id"):
-                        # Inicjalizacja procesu
-                        current_step = {
-                            "document_id": session_id,
-                            "remaining_fields": [field["field_name"] for field in analysis["fields"] if field["is_required"]],
-                            "collected_data": {},
-                            "current_field": None
-                        }
-                        
-                    if current_step["remaining_fields"]:
-                        current_field = current_step["remaining_fields"][0]
-                        current_step["current_field"] = current_field
-                        return f"Proszę podać wartość dla pola: {current_field}"
-                        
-                    else:
-                        # Wypełnij PDF gdy wszystkie dane są zebrane
-                        pdf_url = await fill_pdf_dynamically(session_id, current_step["collected_data"])
-                        return f"Dokument został wypełniony: {pdf_url}"
-                    
-                else:
-                    logger.warning(f"Nieznane narzędzie wywołane - Sesja: {session_id}, Użytkownik: {user_id}, Narzędzie: {tool_name}")
-                    continue
-
-        # Zachowaj istniejącą logikę dla odpowiedzi
-        if not final_response:
-            final_response = model_response.content
-
-        # Save assistant response if user is logged in
-        if user_id:
-            async with SessionLocal() as session:
-                await add_message(session, user_id, session_id, "assistant", final_response)
+        engine = _tool_engine(session_id)
+
+        async def call_model(messages: list, allow_tools: bool) -> ChatCompletionMessage:
+            # Request response from AI model
+            logger.info("Requesting response from OpenAI model")
+            response = await get_gateway().chat_completion(
+                task="chat",
+                messages=messages,
+                max_tokens=500,
+                **_tool_options(allow_tools)
+            )
+            logger.info(f"Response received from OpenAI model, system fingerprint: {response.system_fingerprint}")
+            return response.choices[0].message
+
+        # Tool results are sent back to the model until it answers without tools
+        final_response, executed_tools = await run_tool_loop(call_model, base_messages, engine)
+
+        await _save_assistant_message(user_id, session_id, final_response)
+        _cache_answer(question_vector, ministry, question, final_response, executed_tools)
 
         logger.info("Final response processed successfully")
         return final_response
 
+    except CircuitOpenError as e:
+        # Every model of the tier keeps failing: answer at once instead of waiting for timeouts
+        logger.warning(f"Model unavailable: {str(e)}")
+        raise HTTPException(status_code=503, detail=MODEL_UNAVAILABLE_MESSAGE,
+                            headers={"Retry-After": str(math.ceil(e.retry_after))})
     except Exception as e:
         logger.error(f"Error generating response: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing the request: {str(e)}")
 
 
-async def generate_conversation_title(user_id: str, session_id: str) -> str:
-    """ 
-    Generates a title for a given conversation based on its history.
+async def stream_response(request: dict, session_id: str) -> AsyncIterator[str]:
     """
-    async with SessionLocal() as session:
-        history = await get_conversation_history(session, user_id, session_id)
+    Streaming variant of generate_response, yielding Server-Sent Events.
+
+    Text deltas are forwarded as "token" events as soon as the model produces
+    them. Tool calls are assembled from their deltas, announced with a
+    "tool_calls" event and executed when the stream ends; their results are
+    sent back to the model and the follow-up answer is streamed the same way.
+    The final message is then saved and a "done" event closes the stream.
+    Failures are reported as an "error" event, since the HTTP status has
+    already been sent.
+
+    :param request: Request body with "question" and optionally "user_id" and "ministry".
+    :param session_id: Conversation session ID.
+    """
+    user_id = request.get("user_id")
+    question = request.get("question")
 
-    if not history:
-        return "New Conversation"
+    logger.info(f"Received streamed question: {question} from session ID: {session_id}")
 
-    messages = [{"role": msg["role"], "content": msg["content"]} for msg in history]
+    ministry = request.get("ministry")
 
     try:
-        response = client.chat.completions.create(
-            model=CHAT_MODEL_NAME,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Your task is to generate a short, relevant, and summarizing title for this conversation. "
-                               "The title should be concise, descriptive, and no more than 6 words."
-                },
-                *messages
-            ],
-            max_tokens=20
-        )
-        
-        title = response.choices[0].message.content.strip()
-        logger.info(f"Generated conversation title: {title}")
-        return title
-
+        base_messages = await _prepare_conversation(user_id, session_id, question)
+
+        cached_answer, question_vector = await _cached_answer(question, ministry, base_messages)
+        if cached_answer:
+            yield sse_event("token", {"content": cached_answer})
+            await _save_assistant_message(user_id, session_id, cached_answer)
+            yield sse_event("done", {"session_id": session_id, "response": cached_answer})
+            return
+
+        engine = _tool_engine(session_id)
+        executed_tools = []
+        for round_index in range(MAX_TOOL_ROUNDS + 1):
+            accumulator = StreamAccumulator()
+            async for chunk in get_gateway().stream_chat_completion(
+                task="chat",
+                messages=base_messages,
+                max_tokens=500,
+                **_tool_options(round_index < MAX_TOOL_ROUNDS)
+            ):
+                token = accumulator.add(chunk)
+                if token:
+                    yield sse_event("token", {"content": token})
+
+            tool_calls = accumulator.tool_calls
+            if not tool_calls:
+                break
+            # Tools run together, then their results are streamed back through the model
+            executed_tools.extend(tool_calls)
+            yield sse_event("tool_calls", {"tools": [tool_call.function.name for tool_call in tool_calls]})
+            base_messages.append(assistant_tool_message(accumulator.content or None, tool_calls))
+            base_messages.extend(await engine.run_tool_calls(tool_calls))
+
+        final_response = accumulator.content
+
+        await _save_assistant_message(user_id, session_id, final_response)
+        _cache_answer(question_vector, ministry, question, final_response, executed_tools)
+        yield sse_event("done", {"session_id": session_id, "response": final_response})
+
+    except CircuitOpenError as e:
+        logger.warning(f"Model unavailable: {str(e)}")
+        yield sse_event("error", {"detail": MODEL_UNAVAILABLE_MESSAGE, "retry_after": math.ceil(e.retry_after)})
     except Exception as e:
-        logger.error(f"Error generating conversation title: {str(e)}")
-        return "Unknown Title"
+        logger.error(f"Error streaming response: {str(e)}")
+        yield sse_event("error", {"detail": f"Error processing the request: {str(e)}"})
+
 
 def generate_download_link(pdf_content: bytes) -> str:
     # Tymczasowe rozwiązanie - zapisz plik i zwróć ścieżkę
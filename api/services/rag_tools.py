@@ -57,7 +57,7 @@ def find_nearest_documents(query: str, top_k: int = 5) -> List[str]:
     return relevant_docs
 
 
-def retrieve_and_answer(query: str, ministry: str) -> Dict[str, str]:
+async def retrieve_and_answer(query: str, ministry: str) -> Dict[str, str]:
     """
     Pobiera odpowiednie dokumenty dla danego ministerstwa i generuje odpowiedź.
     """
@@ -66,6 +66,6 @@ def retrieve_and_answer(query: str, ministry: str) -> Dict[str, str]:
     if not relevant_docs:
         return {"answer": "Nie znaleziono odpowiednich dokumentów dla Twojego zapytania."}
 
-    answer = generate_answer_with_context(query, relevant_docs)
+    answer = await generate_answer_with_context(query, relevant_docs)
     return {"answer": answer}
 
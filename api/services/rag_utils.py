@@ -1,13 +1,5 @@
 from typing import List
-from openai import OpenAI
-import os
-
-# xAI API Key (make sure this is set in your environment variables)
-XAI_API_KEY = os.getenv("XAI_API_KEY")
-CHAT_MODEL_NAME = "grok-2-latest"
-
-# Initialize OpenAI client for answer generation within the tool
-rag_client = OpenAI(api_key=XAI_API_KEY, base_url="https://api.x.ai/v1")
+from api.services.llm_gateway import get_gateway
 
 
 def retrieve_relevant_documents(query: str, ministry: str, n_results: int = 3) -> List[str]:
@@ -17,14 +9,14 @@ def retrieve_relevant_documents(query: str, ministry: str, n_results: int = 3) -
     return retrieved_docs
 
 
-def generate_answer_with_context(query: str, context_documents: List[str]) -> str:
+async def generate_answer_with_context(query: str, context_documents: List[str]) -> str:
     """Generates an answer to the query using the provided context documents."""
     context_str = " ".join(context_documents)
     augmented_prompt = f"Based on the following context: '{context_str}', answer the question: '{query}'"
 
     try:
-        response = rag_client.chat.completions.create(  
-            model=CHAT_MODEL_NAME,
+        response = await get_gateway().chat_completion(
+            task="rag",
             messages=[
                 {
                     "role": "system",
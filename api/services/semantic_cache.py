@@ -0,0 +1,166 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional
+import numpy as np
+from api.services.llm_gateway import get_gateway
+
+logger = logging.getLogger(__name__)
+
+# Off by default. The cache is shared by all users: every first-turn question costs an
+# extra embedding call (even on a miss), and an answer written for one user can be
+# served to another. Questions that look personal (see contains_personal_data) are
+# never cached, but enable it only where first-turn questions are generic, e.g. a public FAQ.
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+# Minimum cosine similarity for a stored answer to be reused
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "v1")
+DEFAULT_MINISTRY = "general"
+
+
+# E-mail addresses and runs of 5+ digits (ID, phone, account and case numbers, dates of birth)
+_PERSONAL_DATA = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+|\d(?:[\s./-]?\d){4,}")
+
+
+def contains_personal_data(question: str) -> bool:
+    """Whether a question looks like it carries personal data, so its answer must not be shared."""
+    return bool(_PERSONAL_DATA.search(question))
+
+
+def normalize_question(question: str) -> str:
+    """Lowercases a question and strips punctuation and repeated whitespace."""
+    question = re.sub(r"[^\w\s]", " ", question.lower())
+    return " ".join(question.split())
+
+
+async def embed_with_gateway(text: str) -> List[float]:
+    response = await get_gateway().embeddings(task="semantic_cache", model=EMBEDDING_MODEL_NAME, input=text)
+    return response.data[0].embedding
+
+
+class CacheEntry:
+    def __init__(self, vector: np.ndarray, ministry: str, question: str, answer: str, created_at: float):
+        self.vector = vector
+        self.ministry = ministry
+        self.question = question
+        self.answer = answer
+        self.created_at = created_at
+
+
+class SemanticCache:
+    """
+    In-memory cache of answers to first-turn questions, looked up by meaning.
+
+    Questions are embedded together with the active ministry and compared by
+    cosine similarity against previously answered ones; the closest answer is
+    reused when it passes the threshold. Entries expire after ``ttl_seconds``
+    and the least recently used ones are evicted beyond ``max_entries``.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], Awaitable[List[float]]] = embed_with_gateway,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl_seconds: int = SEMANTIC_CACHE_TTL_SECONDS,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+    ):
+        self.embed_text = embed
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        # Stacked vectors of all entries, rebuilt lazily after changes
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[int] = []
+
+    async def embed(self, question: str, ministry: Optional[str]) -> Optional[np.ndarray]:
+        """Embeds a question with its ministry; returns None when the embedding call fails."""
+        text = f"{ministry or DEFAULT_MINISTRY}: {normalize_question(question)}"
+        try:
+            vector = np.asarray(await self.embed_text(text), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Question embedding failed, semantic cache skipped: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def search(self, vector: np.ndarray, ministry: Optional[str]) -> Optional[str]:
+        """Returns the stored answer most similar to the question, if it passes the threshold."""
+        ministry = ministry or DEFAULT_MINISTRY
+        with self._lock:
+            self._expire()
+            if not self._entries:
+                self.misses += 1
+                return None
+            if self._matrix is None:
+                self._matrix_ids = list(self._entries)
+                self._matrix = np.stack([self._entries[entry_id].vector for entry_id in self._matrix_ids])
+
+            similarities = self._matrix @ vector
+            for index in np.argsort(similarities)[::-1]:
+                if similarities[index] < self.threshold:
+                    break
+                entry_id = self._matrix_ids[index]
+                entry = self._entries[entry_id]
+                # The ministry is part of the embedded text, but answers never cross ministries
+                if entry.ministry != ministry:
+                    continue
+                self._entries.move_to_end(entry_id)
+                self.hits += 1
+                logger.info(f"Semantic cache hit ({similarities[index]:.3f}) for: {entry.question}")
+                return entry.answer
+
+            self.misses += 1
+            return None
+
+    def put(self, vector: np.ndarray, ministry: Optional[str], question: str, answer: str) -> None:
+        with self._lock:
+            self._entries[self._next_id] = CacheEntry(vector, ministry or DEFAULT_MINISTRY, question, answer, time.time())
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def purge(self, ministry: Optional[str] = None) -> int:
+        """Removes all entries, or only those of one ministry, and returns how many were removed."""
+        with self._lock:
+            purged = [entry_id for entry_id, entry in self._entries.items()
+                      if ministry is None or entry.ministry == ministry]
+            for entry_id in purged:
+                del self._entries[entry_id]
+            self._matrix = None
+            return len(purged)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [entry_id for entry_id, entry in self._entries.items() if entry.created_at < cutoff]
+        for entry_id in expired:
+            del self._entries[entry_id]
+        if expired:
+            self._matrix = None
+
+
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Returns the process-wide semantic cache, or None when it is disabled."""
+    global _semantic_cache
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache()
+    return _semantic_cache
@@ -0,0 +1,82 @@
+import logging
+import os
+from typing import Awaitable, Callable, List, Optional
+from api.db.database import SessionLocal
+from api.db.message_sink import message_sink
+from api.db.queries import count_messages, get_conversation_title, get_first_messages, get_recent_messages, save_conversation_title
+from api.services.llm_gateway import get_gateway
+from api.utils.concurrency import KeyedTasks
+
+logger = logging.getLogger(__name__)
+
+# The title is regenerated once the conversation has grown by this many messages
+TITLE_REFRESH_MESSAGES = int(os.getenv("TITLE_REFRESH_MESSAGES", "6"))
+# Messages of the first and of the latest turn shown to the model
+TITLE_TURN_MESSAGES = 2
+TITLE_MESSAGE_MAX_CHARS = 500
+DEFAULT_TITLE = "New Conversation"
+
+TITLE_PROMPT = (
+    "Your task is to generate a short, relevant, and summarizing title for this conversation. "
+    "The title should be concise, descriptive, and no more than 6 words."
+)
+
+# Background title refreshes, one per session
+title_refreshes = KeyedTasks("Title refresh")
+
+
+def needs_title(title, message_count: int, refresh_messages: int = TITLE_REFRESH_MESSAGES) -> bool:
+    """A title is generated after the first full turn and again every ``refresh_messages`` messages."""
+    if title is None:
+        return message_count >= TITLE_TURN_MESSAGES
+    return message_count - title.message_count >= refresh_messages
+
+
+async def generate_title_with_model(messages: List[dict]) -> str:
+    response = await get_gateway().chat_completion(
+        task="title",
+        messages=[{"role": "system", "content": TITLE_PROMPT}, *messages],
+        max_tokens=20,
+    )
+    return response.choices[0].message.content.strip().strip('"')
+
+
+async def refresh_title(
+    user_id: str,
+    session_id: str,
+    session_factory=SessionLocal,
+    generate: Callable[[List[dict]], Awaitable[str]] = generate_title_with_model,
+    refresh_messages: int = TITLE_REFRESH_MESSAGES,
+) -> Optional[str]:
+    """
+    Regenerates the stored title when the conversation has grown enough since the last one.
+
+    Only the first and the latest turn are sent to the model, so the cost does
+    not depend on the length of the conversation.
+
+    :return: The new title, or None when the stored one is still current.
+    """
+    # The reply that triggered the refresh may still be in the write buffer
+    await message_sink.sync(user_id, session_id, wait=True)
+    async with session_factory() as session:
+        title = await get_conversation_title(session, session_id)
+        message_count = await count_messages(session, user_id, session_id)
+        if not needs_title(title, message_count, refresh_messages):
+            return None
+
+        first = await get_first_messages(session, user_id, session_id, TITLE_TURN_MESSAGES)
+        latest = await get_recent_messages(session, user_id, session_id, TITLE_TURN_MESSAGES)
+        first_ids = {row.id for row in first}
+        rows = list(first) + [row for row in latest if row.id not in first_ids]
+
+        new_title = await generate([
+            {"role": row.role, "content": (row.content or "")[:TITLE_MESSAGE_MAX_CHARS]} for row in rows
+        ])
+        await save_conversation_title(session, user_id, session_id, new_title, message_count)
+        logger.info(f"Generated conversation title for session {session_id}: {new_title}")
+        return new_title
+
+
+def schedule_title_refresh(user_id: str, session_id: str) -> None:
+    """Checks and refreshes the title in the background, off the request path."""
+    title_refreshes.spawn(session_id, lambda: refresh_title(user_id, session_id))
@@ -0,0 +1,130 @@
+import asyncio
+import inspect
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from openai.types.chat import ChatCompletionMessage
+from api.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "20"))
+# Follow-up model calls allowed after tool results; the last round may not call tools again
+MAX_TOOL_ROUNDS = int(os.getenv("MAX_TOOL_ROUNDS", "3"))
+
+TOOL_LATENCY = registry.histogram(
+    "tool_duration_seconds", "Execution time of tools called by the model, by outcome.", ["tool", "outcome"])
+
+
+class ToolEngine:
+    """
+    Executes the tool calls of one model response.
+
+    Independent calls run concurrently: coroutine tools on the event loop, plain
+    functions on the default thread pool. Every call has its own timeout, and
+    failures are returned to the model as an error result instead of failing
+    the whole request.
+    """
+
+    def __init__(
+        self,
+        tools: Dict[str, Callable[..., Any]],
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: float = TOOL_TIMEOUT_SECONDS,
+    ):
+        self.tools = tools
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+
+    async def execute(self, tool_name: str, tool_args: dict) -> Any:
+        """Runs one tool with its timeout; raises on unknown tools, timeouts and tool errors."""
+        if tool_name not in self.tools:
+            raise ValueError(f"Tool {tool_name} not found")
+        tool_function = self.tools[tool_name]
+        timeout = self.timeouts.get(tool_name, self.default_timeout)
+
+        if inspect.iscoroutinefunction(tool_function):
+            return await asyncio.wait_for(tool_function(**tool_args), timeout)
+        result = await asyncio.wait_for(asyncio.to_thread(tool_function, **tool_args), timeout)
+        # Wrapped coroutine functions (e.g. functools.partial on older Pythons) return an awaitable
+        if inspect.isawaitable(result):
+            result = await asyncio.wait_for(result, timeout)
+        return result
+
+    async def run_tool_call(self, tool_call) -> dict:
+        """Runs a tool call and returns its result as a "tool" message for the model."""
+        tool_name = tool_call.function.name
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            tool_args = json.loads(tool_call.function.arguments or "{}")
+            result = await self.execute(tool_name, tool_args)
+        except asyncio.TimeoutError:
+            logger.warning(f"Tool {tool_name} timed out")
+            outcome = "timeout"
+            result = {"error": f"Tool {tool_name} timed out"}
+        except Exception as e:
+            logger.warning(f"Tool {tool_name} failed: {str(e)}")
+            outcome = type(e).__name__
+            result = {"error": str(e)}
+        TOOL_LATENCY.observe(time.perf_counter() - start, tool=tool_name, outcome=outcome)
+
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "content": result if isinstance(result, str) else json.dumps(result, ensure_ascii=False, default=str),
+        }
+
+    async def run_tool_calls(self, tool_calls: list) -> List[dict]:
+        """Runs all tool calls concurrently; the results keep the order of the calls."""
+        logger.info(f"Running {len(tool_calls)} tool calls: {[tool_call.function.name for tool_call in tool_calls]}")
+        return list(await asyncio.gather(*(self.run_tool_call(tool_call) for tool_call in tool_calls)))
+
+
+def assistant_tool_message(content: Optional[str], tool_calls: list) -> dict:
+    """The assistant message that requested the tool calls, as it must precede their results."""
+    return {
+        "role": "assistant",
+        "content": content,
+        "tool_calls": [
+            {
+                "id": tool_call.id,
+                "type": "function",
+                "function": {"name": tool_call.function.name, "arguments": tool_call.function.arguments},
+            }
+            for tool_call in tool_calls
+        ],
+    }
+
+
+async def run_tool_loop(
+    call_model: Callable[[List[dict], bool], Awaitable[ChatCompletionMessage]],
+    messages: List[dict],
+    engine: ToolEngine,
+    max_rounds: int = MAX_TOOL_ROUNDS,
+) -> Tuple[Optional[str], list]:
+    """
+    Calls the model until it answers without requesting tools.
+
+    Tool results are appended to ``messages`` as "tool" messages and sent back
+    in a follow-up call, at most ``max_rounds`` times; the last follow-up is
+    made without tools, so the loop always ends with an answer.
+
+    :param call_model: Calls the model with the messages; the flag tells whether tools are offered.
+    :param messages: Conversation sent to the model, extended in place.
+    :param engine: Executes the requested tools.
+    :param max_rounds: Maximum number of follow-up calls.
+    :return: The final answer and all executed tool calls.
+    """
+    executed = []
+    message = await call_model(messages, max_rounds > 0)
+    for round_index in range(max_rounds):
+        if not message.tool_calls:
+            break
+        executed.extend(message.tool_calls)
+        messages.append(assistant_tool_message(message.content, message.tool_calls))
+        messages.extend(await engine.run_tool_calls(message.tool_calls))
+        message = await call_model(messages, round_index + 1 < max_rounds)
+    return message.content, executed
@@ -0,0 +1,146 @@
+import asyncio
+import base64
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Only the field layout of /analyze-document pages (names, positions, data types) is cached,
+# never /validate-document answers, which contain the values a citizen filled in. Entries
+# are still derived from uploads, so the file is readable by its owner only and every
+# entry is deleted VISION_CACHE_TTL_SECONDS after it was stored, whatever its use.
+VISION_CACHE_ENABLED = os.getenv("VISION_CACHE_ENABLED", "true").lower() == "true"
+VISION_CACHE_PATH = os.getenv("VISION_CACHE_PATH", os.path.join(os.getenv("TMPDIR", "/tmp"), "govassist_vision_cache.sqlite3"))
+VISION_CACHE_MAX_BYTES = int(os.getenv("VISION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+VISION_CACHE_TTL_SECONDS = int(os.getenv("VISION_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+
+
+def page_cache_key(base64_image: str, prompt_version: str, model: str) -> str:
+    """
+    Builds a content-addressed cache key for a page.
+
+    The key is a SHA-256 of the decoded page bytes (so Base64 formatting does
+    not matter) prefixed with the prompt version and the model, so changing a
+    prompt invalidates its old entries and answers of a fallback model are
+    never served as the primary model's.
+    """
+    digest = hashlib.sha256()
+    for part in (prompt_version, model):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(base64.b64decode(base64_image))
+    return digest.hexdigest()
+
+
+class VisionCache:
+    """
+    Size-bounded LRU cache for vision model results, stored in a local SQLite file.
+
+    Entries expire ``ttl_seconds`` after they were stored, even when they are
+    still being used.
+    """
+
+    def __init__(self, path: str = VISION_CACHE_PATH, max_bytes: int = VISION_CACHE_MAX_BYTES,
+                 ttl_seconds: int = VISION_CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Created owner-only before SQLite opens it; the WAL files inherit these permissions
+        os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+        os.chmod(path, 0o600)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vision_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL, "
+            "created_at REAL NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(vision_cache)")}
+        if "created_at" not in columns:
+            # Files from before the TTL: their entries count as expired
+            self._conn.execute("ALTER TABLE vision_cache ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_vision_cache_last_access ON vision_cache (last_access)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_vision_cache_created_at ON vision_cache (created_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached value for a key and marks it as recently used."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM vision_cache WHERE key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE vision_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        """Stores a value and evicts least recently used entries above the size limit."""
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO vision_cache (key, value, size, last_access, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._conn.execute("DELETE FROM vision_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM vision_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM vision_cache ORDER BY last_access"):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM vision_cache WHERE key = ?", evicted)
+        logger.debug(f"Vision cache evicted {len(evicted)} entries")
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and current cache size."""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM vision_cache").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "size_bytes": size}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM vision_cache")
+            self._conn.commit()
+
+    async def aget(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self.put, key, value)
+
+
+_vision_cache: Optional[VisionCache] = None
+
+
+def get_vision_cache() -> Optional[VisionCache]:
+    """Returns the shared cache instance, or None when caching is disabled."""
+    global _vision_cache
+    if not VISION_CACHE_ENABLED:
+        return None
+    if _vision_cache is None:
+        _vision_cache = VisionCache()
+    return _vision_cache
@@ -0,0 +1,49 @@
+import io
+from reportlab.pdfgen import canvas
+from api.services.acroform_service import extract_acroform
+
+
+def _fillable_pdf() -> bytes:
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer)
+    form = c.acroForm
+    form.textfield(name="full_name", value="John Doe", x=72, y=700, width=200, height=20, fieldFlags="required")
+    form.textfield(name="email", value="", x=72, y=650, width=200, height=20)
+    form.checkbox(name="organ_donor", x=72, y=600, size=15, checked=False, fieldFlags="")
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def _plain_pdf() -> bytes:
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer)
+    c.drawString(72, 700, "Scanned form")
+    c.save()
+    return buffer.getvalue()
+
+
+def test_extract_acroform_reads_fields_and_positions():
+    extraction = extract_acroform(_fillable_pdf())
+    fields = {field.field_name: field for field in extraction.fields}
+
+    assert set(fields) == {"full_name", "email", "organ_donor"}
+    assert fields["full_name"].position.x == 72
+    assert fields["full_name"].position.y == 700
+    assert fields["full_name"].position.width == 200
+    assert fields["full_name"].is_required
+    assert not fields["email"].is_required
+    assert fields["organ_donor"].required_value == "Checkbox"
+
+
+def test_validation_summary_splits_completed_and_empty_fields():
+    summary = extract_acroform(_fillable_pdf()).to_validation_summary()
+
+    assert summary["completed_fields"] == [{"field_name": "full_name", "field_value": "John Doe"}]
+    assert {"field_name": "email"} in summary["empty_fields"]
+    assert {"field_name": "organ_donor"} in summary["empty_fields"]
+    assert summary["required_field_statuses"] == [{"field_name": "full_name", "status": "filled"}]
+
+
+def test_extract_acroform_returns_none_for_plain_pdf():
+    assert extract_acroform(_plain_pdf()) is None
@@ -0,0 +1,29 @@
+from api.benchmarks.bench_load import EndpointStats, check_gates
+
+
+def _stats(ok: int, errors: int, latency: float = 0.1) -> dict:
+    stats = EndpointStats()
+    for _ in range(ok):
+        stats.record(latency, None)
+    for _ in range(errors):
+        stats.record(0.0, "dropped")
+    return stats.summary(duration=10.0)
+
+
+def test_gates_fail_runs_without_successful_requests():
+    report = {"generate-response": _stats(ok=0, errors=20)}
+    assert report["generate-response"]["p95_seconds"] == 0.0
+    assert check_gates(report, max_error_rate=1.0, max_p95={"generate-response": 3.0})
+
+
+def test_gates_count_errors_and_drops():
+    report = {"generate-response": _stats(ok=95, errors=5)}
+    assert report["generate-response"]["error_rate"] == 0.05
+    assert check_gates(report, max_error_rate=0.01, max_p95={})
+    assert not check_gates(report, max_error_rate=0.1, max_p95={})
+
+
+def test_gates_check_p95_per_endpoint():
+    report = {"generate-response": _stats(ok=10, errors=0, latency=4.0), "validate-document": _stats(ok=10, errors=0)}
+    failures = check_gates(report, max_error_rate=0.0, max_p95={"generate-response": 3.0, "validate-document": 3.0})
+    assert len(failures) == 1 and failures[0].startswith("generate-response")
@@ -0,0 +1,100 @@
+import asyncio
+from api.utils.concurrency import SingleFlight, gather_in_order
+
+
+def test_gather_in_order_keeps_page_order():
+    async def analyze(page):
+        # Later pages finish first
+        await asyncio.sleep(0.01 * (5 - page))
+        return page * 10
+
+    results = asyncio.run(gather_in_order(analyze, range(5), limit=5))
+    assert results == [0, 10, 20, 30, 40]
+
+
+def test_gather_in_order_respects_limit():
+    in_flight = 0
+    peak = 0
+
+    async def analyze(page):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return page
+
+    asyncio.run(gather_in_order(analyze, range(8), limit=2))
+    assert peak == 2
+
+
+def test_gather_in_order_pulls_async_items_lazily():
+    pulled = 0
+    in_flight = 0
+    max_ahead = 0
+
+    async def pages():
+        nonlocal pulled, max_ahead
+        for page in range(6):
+            pulled += 1
+            max_ahead = max(max_ahead, in_flight + 1)
+            yield page
+
+    async def analyze(page):
+        nonlocal in_flight
+        in_flight += 1
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return page
+
+    results = asyncio.run(gather_in_order(analyze, pages(), limit=2))
+    assert results == list(range(6))
+    assert pulled == 6
+    assert max_ahead <= 2
+
+
+def test_gather_in_order_stops_pulling_after_failure():
+    pulled = 0
+
+    async def pages():
+        nonlocal pulled
+        for page in range(10):
+            pulled += 1
+            yield page
+
+    async def analyze(page):
+        if page == 0:
+            raise ValueError("vision call failed")
+        await asyncio.sleep(0.05)
+        return page
+
+    try:
+        asyncio.run(gather_in_order(analyze, pages(), limit=1))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+    assert pulled == 1
+
+
+def test_single_flight_shares_in_flight_calls():
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    async def scenario():
+        flight = SingleFlight()
+        shared = await asyncio.gather(*(flight.do("same", fetch) for _ in range(5)))
+        other = await flight.do("other", fetch)
+        # The key is free again once the call has finished
+        again = await flight.do("same", fetch)
+        return flight, shared, other, again
+
+    flight, shared, other, again = asyncio.run(scenario())
+    assert shared == [1] * 5
+    assert (other, again) == (2, 3)
+    assert flight.stats() == {"calls": 3, "coalesced": 4, "in_flight": 0}
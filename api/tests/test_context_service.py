@@ -0,0 +1,67 @@
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from api.db.models import Base
+from api.db.queries import add_message, get_conversation_summary
+from api.services.context_service import build_context, refresh_summary
+
+
+async def _session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _add_turns(session, count: int, content: str = "message") -> None:
+    for turn in range(count):
+        await add_message(session, "user-1", "session-1", "user", f"{content} {turn}")
+        await add_message(session, "user-1", "session-1", "assistant", f"answer {turn}")
+
+
+def test_context_keeps_recent_turns_and_folds_older_ones_into_the_summary():
+    summarized = []
+
+    async def fake_summarize(previous, messages):
+        summarized.append(messages)
+        return f"{previous or ''}+{len(messages)}"
+
+    async def scenario():
+        session_factory = await _session_factory()
+        async with session_factory() as session:
+            await _add_turns(session, 5)
+            messages, stale_until = await build_context(session, "user-1", "session-1", recent_turns=2)
+            assert [m["content"] for m in messages] == ["message 3", "answer 3", "message 4", "answer 4"]
+            assert stale_until == 6
+
+            await refresh_summary("user-1", "session-1", stale_until, session_factory, fake_summarize)
+            messages, stale_until = await build_context(session, "user-1", "session-1", recent_turns=2)
+            assert messages[0] == {"role": "system", "content": "Summary of the earlier conversation: +6"}
+            assert len(messages) == 5
+            assert stale_until is None
+
+            # Only the turn that left the window is sent for the next refresh
+            await _add_turns(session, 1, "later")
+            _, stale_until = await build_context(session, "user-1", "session-1", recent_turns=2)
+            await refresh_summary("user-1", "session-1", stale_until, session_factory, fake_summarize)
+            summary = await get_conversation_summary(session, "session-1")
+            assert summary.summary == "+6+2"
+            assert summary.summarized_until == 8
+
+    asyncio.run(scenario())
+    assert [len(messages) for messages in summarized] == [6, 2]
+
+
+def test_context_respects_the_token_budget():
+    async def scenario():
+        session_factory = await _session_factory()
+        async with session_factory() as session:
+            await _add_turns(session, 1, "x" * 400)
+            await _add_turns(session, 1)
+            messages, stale_until = await build_context(session, "user-1", "session-1",
+                                                        recent_turns=5, token_budget=50)
+            assert [m["content"] for m in messages] == ["answer 0", "message 0", "answer 0"]
+            # The long message was dropped from the window and must be summarized
+            assert stale_until == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,33 @@
+from api.models.document_models import DocumentAnalysisResponse, Field, Position
+from api.services.document_aggregation import merge_page_results
+
+
+def _field(name, x, y, is_required=False):
+    return Field(field_name=name, position=Position(x=x, y=y, width=100, height=20),
+                 required_value="Text", is_required=is_required)
+
+
+def test_merge_tags_fields_with_page_index():
+    merged = merge_page_results([
+        DocumentAnalysisResponse(fields=[_field("Full Name", 50, 100)]),
+        DocumentAnalysisResponse(fields=[]),
+        DocumentAnalysisResponse(fields=[_field("Signature", 50, 700)]),
+    ])
+    assert [(field.field_name, field.page) for field in merged.fields] == [("Full Name", 0), ("Signature", 2)]
+
+
+def test_merge_deduplicates_fields_repeated_across_pages():
+    merged = merge_page_results([
+        DocumentAnalysisResponse(fields=[_field("Applicant Name", 50, 40), _field("Date of Birth", 50, 120)]),
+        DocumentAnalysisResponse(fields=[_field("applicant name:", 53, 42, is_required=True), _field("Address", 50, 200)]),
+    ])
+    names = [(field.field_name, field.page, field.is_required) for field in merged.fields]
+    assert names == [("Applicant Name", 0, True), ("Date of Birth", 0, False), ("Address", 1, False)]
+
+
+def test_merge_keeps_same_name_at_different_positions_and_on_same_page():
+    merged = merge_page_results([
+        DocumentAnalysisResponse(fields=[_field("Date", 50, 100), _field("Date", 50, 100)]),
+        DocumentAnalysisResponse(fields=[_field("Date", 400, 600)]),
+    ])
+    assert len(merged.fields) == 3
@@ -0,0 +1,41 @@
+import json
+from openai.types.chat import ChatCompletionMessage
+from api.services.document_context import build_document_context, parse_page_summary
+
+
+def _page(summary: dict, fenced: bool = False) -> ChatCompletionMessage:
+    content = json.dumps(summary, indent=2)
+    return ChatCompletionMessage(role="assistant", content=f"```json\n{content}\n```" if fenced else content)
+
+
+def test_context_merges_pages_and_drops_message_noise():
+    pages = [
+        _page({
+            "completed_fields": [{"field_name": "Full Name", "field_value": "John Doe"}],
+            "empty_fields": [{"field_name": "Email Address"}, {"field_name": "Address:"}],
+            "required_field_statuses": [{"field_name": "Address", "status": "missing"},
+                                        {"field_name": "Full Name", "status": "filled"}],
+        }, fenced=True),
+        _page({
+            "completed_fields": [{"field_name": "full name", "field_value": "J. Doe"},
+                                 {"field_name": "Email address", "field_value": "john@example.com"}],
+            "empty_fields": [{"field_name": "Address"}],
+            "required_field_statuses": [{"field_name": "Address", "status": "missing"}],
+        }),
+        ChatCompletionMessage(role="assistant", content="Sorry, this page is blank."),
+    ]
+
+    context = build_document_context(pages)
+
+    assert json.loads(context) == {
+        "completed_fields": {"Full Name": "John Doe", "Email Address": "john@example.com"},
+        "empty_fields": ["Address:"],
+        "missing_required_fields": ["Address:"],
+        "unparsed_pages": ["Sorry, this page is blank."],
+    }
+    assert len(context) < len(" ".join(str(page) for page in pages)) / 3
+
+
+def test_parse_accepts_summary_dicts():
+    summary = {"completed_fields": [], "empty_fields": [{"field_name": "Signature"}]}
+    assert parse_page_summary(summary) == (summary, None)
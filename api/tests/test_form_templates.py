@@ -0,0 +1,44 @@
+import io
+from PIL import Image, ImageDraw
+from api.models.document_models import DocumentAnalysisResponse, Field, Position
+from api.services.form_templates import TemplateRegistry, dhash, hamming_distance
+
+
+def _form(lines):
+    image = Image.new("RGB", (850, 1100), "white")
+    draw = ImageDraw.Draw(image)
+    for x, y, width in lines:
+        draw.rectangle([x, y, x + width, y + 40], outline="black", width=4)
+    return image
+
+
+DL_14A = [(60, 80, 700), (60, 200, 320), (440, 200, 320), (60, 320, 500), (60, 900, 300)]
+PASSPORT = [(400, 60, 400), (60, 500, 200), (300, 700, 500), (600, 1000, 200)]
+
+
+def _reencoded(image, scale=0.5, quality=60):
+    resized = image.resize((int(image.width * scale), int(image.height * scale)))
+    buffer = io.BytesIO()
+    resized.save(buffer, format="JPEG", quality=quality)
+    return Image.open(io.BytesIO(buffer.getvalue()))
+
+
+def test_dhash_survives_rescaling_and_jpeg():
+    original = _form(DL_14A)
+    assert hamming_distance(dhash(original), dhash(_reencoded(original))) <= 6
+    assert hamming_distance(dhash(original), dhash(_form(PASSPORT))) > 6
+
+
+def test_registry_returns_stored_analysis(tmp_path):
+    analysis = DocumentAnalysisResponse(fields=[
+        Field(field_name="Full Name", position=Position(x=60, y=80, width=700, height=40),
+              required_value="Text", is_required=True),
+    ])
+    path = str(tmp_path / "templates.json")
+    TemplateRegistry(path).register("DL-14A", _form(DL_14A), analysis)
+
+    registry = TemplateRegistry(path)
+    name, matched = registry.match(_reencoded(_form(DL_14A)))
+    assert name == "DL-14A"
+    assert matched == analysis
+    assert registry.match(_form(PASSPORT)) is None
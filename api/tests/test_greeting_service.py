@@ -0,0 +1,60 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from api.services import greeting_service
+from api.services.greeting_service import GreetingPool, client_now, parse_timezone, resolve_locale
+
+
+def test_greeting_uses_locale_time_of_day_and_name():
+    pool = GreetingPool()
+
+    morning = pool.greeting("Anna", "pl", now=datetime(2025, 1, 1, 8))
+    assert "Anna" in morning and morning.startswith("Dzień dobry")
+    assert "citizen" in pool.greeting(None, "en", now=datetime(2025, 1, 1, 20))
+    # Unsupported locales fall back to English
+    assert pool.greeting("Ann", "de", now=datetime(2025, 1, 1, 14)).startswith(("Good afternoon", "Hey"))
+
+    assert resolve_locale("pl-PL,pl;q=0.9,en;q=0.8") == "pl"
+    assert resolve_locale("de-DE,es;q=0.5") == "es"
+    assert resolve_locale(None) == "en"
+
+
+def test_greeting_is_served_from_memory():
+    pool = GreetingPool()
+    start = time.perf_counter()
+    for _ in range(1000):
+        pool.greeting("Anna", "en")
+    assert (time.perf_counter() - start) / 1000 < 0.001
+
+
+def test_refresh_keeps_templates_and_drops_invalid_variants():
+    async def generate(locale, slot, count):
+        if locale == "es":
+            raise RuntimeError("model unavailable")
+        return [f"Hi {{name}}, happy {slot}! Need help?", "No placeholder here", "Hi {name} {oops}", 42]
+
+    templates = {"en": {"morning": ["Good morning, {name}!"], "afternoon": ["Hi {name}!"],
+                        "evening": ["Evening, {name}!"], "night": ["Night, {name}!"]},
+                 "es": {"morning": ["Hola, {name}!"], "afternoon": ["Hola, {name}!"],
+                        "evening": ["Hola, {name}!"], "night": ["Hola, {name}!"]}}
+    pool = GreetingPool(templates=templates, generate=generate)
+
+    assert asyncio.run(pool.refresh()) == 4
+    greetings = {pool.greeting("Ann", "en", now=datetime(2025, 1, 1, 9)) for _ in range(200)}
+    assert greetings == {"Good morning, Ann!", "Hi Ann, happy morning! Need help?"}
+    assert pool.greeting("Ann", "es", now=datetime(2025, 1, 1, 9)) == "Hola, Ann!"
+
+
+def test_client_now_uses_the_client_time_zone(monkeypatch):
+    assert parse_timezone("+05:30").utcoffset(None) == timedelta(hours=5, minutes=30)
+    assert parse_timezone("UTC-5").utcoffset(None) == timedelta(hours=-5)
+    assert parse_timezone("Europe/Warsaw") is not None
+    assert parse_timezone("Mars/Olympus") is None
+    assert parse_timezone("+25:00") is None
+
+    assert client_now("+09:00").utcoffset() == timedelta(hours=9)
+    assert client_now("Asia/Tokyo").utcoffset() == timedelta(hours=9)
+    # Missing or invalid values fall back to the configured default zone
+    monkeypatch.setattr(greeting_service, "GREETING_DEFAULT_TIMEZONE", "-03:00")
+    assert client_now(None).utcoffset() == timedelta(hours=-3)
+    assert client_now("not a zone").utcoffset() == timedelta(hours=-3)
@@ -0,0 +1,30 @@
+import asyncio
+import base64
+import io
+from PIL import Image
+from api.utils.image_utils import ImagePool, encode_image_bytes_to_base64
+
+
+def _png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGBA", (64, 64), (255, 0, 0, 128)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_image_pool_encodes_in_worker_processes():
+    pool = ImagePool(max_workers=2, max_in_flight=1)
+
+    async def encode_all():
+        return await asyncio.gather(*(pool.run(encode_image_bytes_to_base64, _png_bytes()) for _ in range(4)))
+
+    try:
+        results = asyncio.run(encode_all())
+    finally:
+        pool.shutdown()
+
+    for result in results:
+        assert Image.open(io.BytesIO(base64.b64decode(result))).format == "JPEG"
+    stats = pool.stats()
+    assert stats["completed"] == 4
+    assert stats["queued"] == 0
+    assert stats["peak_queued"] == 3
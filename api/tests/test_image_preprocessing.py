@@ -0,0 +1,60 @@
+import base64
+import io
+import pytest
+from PIL import Image, ImageDraw
+from api.utils import image_preprocessing
+from api.utils.image_preprocessing import autocrop, estimate_skew, get_position_preset_name, get_preset, preprocess_image
+from api.utils.image_utils import encode_page_to_base64
+
+
+def _scan(angle: float = 0.0) -> Image.Image:
+    image = Image.new("RGB", (1700, 2200), "white")
+    draw = ImageDraw.Draw(image)
+    for y in range(300, 1900, 60):
+        draw.rectangle([250, y, 1450, y + 12], fill="black")
+    return image.rotate(angle, fillcolor="white") if angle else image
+
+
+def test_autocrop_removes_blank_margins():
+    cropped = autocrop(_scan(), padding=0)
+    assert cropped.size == (1201, 1573)
+
+
+def test_estimate_skew_finds_rotation():
+    assert abs(estimate_skew(_scan(angle=2.5)) + 2.5) <= 0.5
+    assert estimate_skew(_scan()) == 0.0
+
+
+def test_low_detail_preset_shrinks_payload():
+    page = _scan()
+    original = encode_page_to_base64(page, "original")
+    low_detail = encode_page_to_base64(page, "low_detail")
+
+    assert len(low_detail) < len(original) / 2
+    decoded = Image.open(io.BytesIO(base64.b64decode(low_detail)))
+    assert max(decoded.size) <= 512
+    assert decoded.mode == "L"
+
+
+def test_original_preset_keeps_page_unchanged():
+    page = _scan()
+    assert preprocess_image(page, get_preset("original")).size == page.size
+
+
+def test_position_preset_keeps_field_positions():
+    page = _scan()
+    encoded = encode_page_to_base64(page, get_position_preset_name())
+    decoded = Image.open(io.BytesIO(base64.b64decode(encoded)))
+
+    assert decoded.size == page.size
+    # A field at a known spot stays at the same pixel coordinates after encoding
+    assert decoded.getpixel((260, 306)) < 64
+    assert decoded.getpixel((240, 306)) > 192
+    assert decoded.getpixel((260, 290)) > 192
+
+
+def test_position_preset_must_preserve_geometry(monkeypatch):
+    assert not get_preset("balanced").preserves_geometry
+    monkeypatch.setattr(image_preprocessing, "FIELD_POSITION_IMAGE_PRESET", "balanced")
+    with pytest.raises(ValueError):
+        get_position_preset_name()
@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from api.models.document_models import DocumentAnalysisResponse, Field, Position
+from api.services.job_service import FAILED, SUCCEEDED, InMemoryJobStore, JobQueue, SQLiteJobStore
+
+
+def _analysis():
+    return DocumentAnalysisResponse(fields=[
+        Field(field_name="Full Name", position=Position(x=1, y=2, width=3, height=4),
+              required_value="Text", is_required=True),
+    ])
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryJobStore()
+    return SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_job_runs_in_background_and_returns_result(store):
+    cleaned_up = []
+
+    async def scenario():
+        queue = JobQueue(store, workers=2)
+        await queue.start()
+
+        async def handler():
+            await asyncio.sleep(0.01)
+            return _analysis()
+
+        job_id = await queue.submit("analyze-document", handler, cleanup=lambda: cleaned_up.append(True))
+        assert (await queue.get(job_id))["status"] in ("pending", "running")
+        job = await queue.wait(job_id, timeout=2)
+        await queue.stop()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job["status"] == SUCCEEDED
+    assert DocumentAnalysisResponse(**job["result"]) == _analysis()
+    assert cleaned_up == [True]
+
+
+def test_failed_job_reports_error(store):
+    async def scenario():
+        queue = JobQueue(store, workers=1)
+        await queue.start()
+
+        async def handler():
+            raise ValueError("Brak wykrytych pól w dokumencie")
+
+        job_id = await queue.submit("analyze-document", handler)
+        job = await queue.wait(job_id, timeout=2)
+        await queue.stop()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job["status"] == FAILED
+    assert job["error"] == "Brak wykrytych pól w dokumencie"
+
+
+def test_expired_jobs_are_purged_while_running(store):
+    async def scenario():
+        queue = JobQueue(store, workers=1, ttl=0.05, purge_interval=0.02)
+        await queue.start()
+
+        async def handler():
+            return _analysis()
+
+        job_id = await queue.submit("analyze-document", handler)
+        finished = await queue.wait(job_id, timeout=2)
+        await asyncio.sleep(0.2)
+        expired = await queue.get(job_id)
+        await queue.stop()
+        return finished, expired
+
+    finished, expired = asyncio.run(scenario())
+    assert finished["status"] == SUCCEEDED
+    assert expired is None
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import httpx
+import pytest
+from openai import APIStatusError
+from api.services.llm_gateway import LLMGateway, backoff_delay
+
+COMPLETION = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "grok-2-latest",
+    "choices": [{"index": 0, "finish_reason": "stop",
+                 "message": {"role": "assistant", "content": "Hello citizen!"}}],
+}
+
+
+def _gateway(responses, requests):
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        status = responses.pop(0)
+        if status == 200:
+            return httpx.Response(200, json=COMPLETION)
+        return httpx.Response(status, json={"error": {"message": "busy"}})
+
+    return LLMGateway(api_key="test", transport=httpx.MockTransport(handler), backoff_base=0.001)
+
+
+def test_chat_completion_retries_rate_limits_and_server_errors():
+    requests = []
+    gateway = _gateway([429, 503, 200], requests)
+
+    response = asyncio.run(gateway.chat_completion(model="grok-2-latest",
+                                                   messages=[{"role": "user", "content": "Hi"}]))
+    assert response.choices[0].message.content == "Hello citizen!"
+    assert len(requests) == 3
+    assert requests[0]["model"] == "grok-2-latest"
+
+
+def test_chat_completion_does_not_retry_client_errors():
+    requests = []
+    gateway = _gateway([400, 200], requests)
+
+    with pytest.raises(APIStatusError):
+        asyncio.run(gateway.chat_completion(model="grok-2-latest", messages=[]))
+    assert len(requests) == 1
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    delays = [backoff_delay(5, base=1, cap=4) for _ in range(50)]
+    assert all(0 <= delay <= 4 for delay in delays)
+    assert len(set(delays)) > 1
+    assert backoff_delay(0, retry_after=2.5) == 2.5
+
+
+def test_identical_concurrent_calls_share_one_upstream_request():
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=COMPLETION)
+
+    gateway = LLMGateway(api_key="test", transport=httpx.MockTransport(handler))
+    question = [{"role": "user", "content": "How do I get a REAL ID?"}]
+
+    async def scenario():
+        return await asyncio.gather(
+            *(gateway.chat_completion(model="grok-2-latest", messages=question) for _ in range(10)),
+            gateway.chat_completion(model="grok-2-latest", messages=question, max_tokens=50),
+        )
+
+    responses = asyncio.run(scenario())
+    assert all(response.choices[0].message.content == "Hello citizen!" for response in responses)
+    assert len(requests) == 2
+    assert gateway.stats() == {"calls": 2, "coalesced": 9, "in_flight": 0}
@@ -0,0 +1,35 @@
+import asyncio
+import httpx
+from api.benchmarks.llm_standin import create_app, recording_key
+from api.services.llm_gateway import LLMGateway
+
+
+def _gateway(app) -> LLMGateway:
+    return LLMGateway(api_key="test", base_url="http://standin/v1", transport=httpx.ASGITransport(app=app),
+                      single_flight=False, max_retries=0)
+
+
+def test_standin_replays_recordings_and_synthesizes_the_rest():
+    app = create_app(recordings=None, latency_scale=0, seed=1)
+    messages = [{"role": "user", "content": "How do I renew my passport?"}]
+    app.state.store.add({"kind": "chat", "key": recording_key("chat", {"messages": messages}), "latency": 0.5,
+                         "response": {"id": "chatcmpl-rec", "object": "chat.completion", "created": 0,
+                                      "model": "grok-2-latest", "choices": [{
+                                          "index": 0, "finish_reason": "stop",
+                                          "message": {"role": "assistant", "content": "Recorded answer"}}]}})
+    gateway = _gateway(app)
+
+    async def scenario():
+        recorded = await gateway.chat_completion(task="chat", messages=messages)
+        vision = await gateway.chat_completion(task="vision", messages=[{"role": "user", "content": [
+            {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA"}}]}])
+        embeddings = await gateway.embeddings(model="v1", input="passport")
+        tokens = [chunk.choices[0].delta.content async for chunk in
+                  gateway.stream_chat_completion(task="chat", messages=messages) if chunk.choices[0].delta.content]
+        return recorded, vision, embeddings, tokens
+
+    recorded, vision, embeddings, tokens = asyncio.run(scenario())
+    assert recorded.choices[0].message.content == "Recorded answer"
+    assert '"fields"' in vision.choices[0].message.content
+    assert len(embeddings.data[0].embedding) > 0
+    assert "".join(tokens) == "Recorded answer"
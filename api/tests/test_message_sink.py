@@ -0,0 +1,54 @@
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from api.db.message_sink import MessageSink
+from api.db.models import Base
+from api.db.queries import count_messages, get_conversation_history
+
+
+async def _session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def test_sink_batches_inserts_and_flushes_before_reads_and_on_stop():
+    async def scenario():
+        session_factory = await _session_factory()
+        sink = MessageSink(session_factory, batch_size=3, flush_interval=60)
+        sink.start()
+
+        await sink.add("user-1", "session-1", "user", "question")
+        await sink.add("user-1", "session-1", "assistant", "answer")
+        async with session_factory() as session:
+            assert await count_messages(session, "user-1", "session-1") == 0
+
+            # A read of the session writes its buffered messages first
+            await sink.sync("user-1", "session-1")
+            assert await get_conversation_history(session, "user-1", "session-1") == [
+                {"role": "user", "content": "question"}, {"role": "assistant", "content": "answer"}]
+
+            # Reaching the batch size wakes the background writer
+            for index in range(3):
+                await sink.add("user-1", "session-2", "user", f"message {index}")
+            await asyncio.sleep(0.05)
+            assert await count_messages(session, "user-1", "session-2") == 3
+
+            await sink.add("user-2", "session-3", "user", "last words")
+            await sink.stop()
+            assert await count_messages(session, "user-2", "session-3") == 1
+        return sink.stats()
+
+    assert asyncio.run(scenario()) == {"buffered": 0, "flushes": 3, "flushed_rows": 6, "failures": 0}
+
+
+def test_sink_writes_through_when_not_started():
+    async def scenario():
+        session_factory = await _session_factory()
+        sink = MessageSink(session_factory)
+        await sink.add("user-1", "session-1", "user", "question")
+        async with session_factory() as session:
+            return await count_messages(session, "user-1", "session-1")
+
+    assert asyncio.run(scenario()) == 1
@@ -0,0 +1,65 @@
+import asyncio
+import httpx
+import pytest
+from openai import APIStatusError
+from api.services.llm_gateway import LLM_REQUESTS, LLM_TOKENS, LLM_TOOL_CALLS, LLMGateway
+from api.utils.metrics import Metric, MetricsRegistry
+
+
+def test_registry_renders_prometheus_text_format():
+    registry = MetricsRegistry(namespace="test")
+    requests = registry.counter("requests_total", "Requests.", ["route"])
+    latency = registry.histogram("latency_seconds", "Latency.", ["route"], buckets=(0.1, 1))
+    registry.register_stats("pool", "Pool stats.", lambda: {"queued": 3, "name": "ignored"})
+
+    requests.inc(route='/say "hi"')
+    requests.inc(2, route='/say "hi"')
+    latency.observe(0.05, route="/a")
+    latency.observe(0.5, route="/a")
+    latency.observe(5, route="/a")
+
+    text = registry.render()
+    assert "# TYPE test_requests_total counter" in text
+    assert 'test_requests_total{route="/say \\"hi\\""} 3' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/a"} 3' in text
+    assert "# TYPE test_pool_queued gauge\ntest_pool_queued 3" in text
+    assert "ignored" not in text
+
+
+def test_gateway_records_tokens_tools_and_error_class():
+    completion = {
+        "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "grok-2-latest",
+        "choices": [{"index": 0, "finish_reason": "tool_calls", "message": {
+            "role": "assistant", "content": None,
+            "tool_calls": [{"id": "call_1", "type": "function",
+                            "function": {"name": "get_service_links_us", "arguments": "{}"}}]}}],
+        "usage": {"prompt_tokens": 120, "completion_tokens": 15, "total_tokens": 135},
+    }
+    statuses = [200, 400]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if statuses.pop(0) == 200:
+            return httpx.Response(200, json=completion)
+        return httpx.Response(400, json={"error": {"message": "bad request"}})
+
+    gateway = LLMGateway(api_key="test", transport=httpx.MockTransport(handler), single_flight=False)
+    prompt_tokens = LLM_TOKENS.value(task="metrics-test", model="grok-2-latest", kind="prompt")
+    tool_calls = LLM_TOOL_CALLS.value(tool="get_service_links_us")
+
+    asyncio.run(gateway.chat_completion(task="metrics-test", model="grok-2-latest", messages=[]))
+    with pytest.raises(APIStatusError):
+        asyncio.run(gateway.chat_completion(task="metrics-test", model="grok-2-latest", messages=[]))
+
+    assert LLM_TOKENS.value(task="metrics-test", model="grok-2-latest", kind="prompt") == prompt_tokens + 120
+    assert LLM_TOKENS.value(task="metrics-test", model="grok-2-latest", kind="completion") >= 15
+    assert LLM_TOOL_CALLS.value(tool="get_service_links_us") == tool_calls + 1
+    assert LLM_REQUESTS.value(endpoint="chat.completions", task="metrics-test", model="grok-2-latest",
+                              outcome="BadRequestError") == 1
+
+
+def test_metric_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        Metric("untyped_metric", "Has no samples.")
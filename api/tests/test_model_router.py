@@ -0,0 +1,58 @@
+import asyncio
+import json
+import httpx
+import pytest
+from api.services.llm_gateway import LLMGateway
+from api.services.model_router import ModelRouter, load_routes
+
+
+def test_routes_override_and_degraded_model_moves_behind_fallback():
+    routes = load_routes(json.dumps({"tasks": {"summary": "large"}}))
+    assert routes["tasks"]["summary"] == "large"
+    assert routes["tasks"]["title"] == "small"
+    with pytest.raises(ValueError):
+        load_routes(json.dumps({"tasks": {"title": "missing"}}))
+
+    router = ModelRouter(routes, min_samples=4, max_error_rate=0.5)
+    assert router.pick("chat") == "grok-2-latest"
+    assert router.pick("unknown-task") == "grok-2-latest"
+
+    for ok in (True, False, False, False):
+        router.record("grok-2-latest", 0.5, ok)
+    assert router.candidates("chat") == ["grok-beta", "grok-2-latest"]
+
+    # Healthy but slower than the tier's p95 budget
+    router = ModelRouter(routes, min_samples=4)
+    for _ in range(4):
+        router.record("grok-beta", 30.0, True)
+    assert router.pick("title") == "grok-2-latest"
+    assert router.stats()["grok-beta"]["p95_seconds"] == 30.0
+
+
+def test_gateway_falls_back_to_next_model_of_the_tier():
+    completion = {
+        "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "grok-beta",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+    }
+    models = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        model = json.loads(request.content)["model"]
+        models.append(model)
+        if model == "grok-2-latest":
+            return httpx.Response(503, json={"error": {"message": "overloaded"}})
+        return httpx.Response(200, json=completion)
+
+    router = ModelRouter(load_routes(""), min_samples=1)
+    gateway = LLMGateway(api_key="test", transport=httpx.MockTransport(handler), max_retries=0,
+                         single_flight=False, router=router)
+
+    model, response = asyncio.run(gateway.routed_chat_completion(task="chat", messages=[]))
+    assert response.choices[0].message.content == "ok"
+    assert models == ["grok-2-latest", "grok-beta"]
+    # Callers learn which model answered, e.g. to cache the result under it
+    assert model == "grok-beta"
+
+    # The failure was recorded, so the next call goes straight to the healthy model
+    asyncio.run(gateway.chat_completion(task="chat", messages=[]))
+    assert models[2:] == ["grok-beta"]
@@ -0,0 +1,47 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from api.db.models import Base, ConversationMessage
+from api.db.queries import get_conversations_with_pagination
+from api.utils.pagination_utils import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    timestamp = datetime(2024, 5, 1, 12, 30, 15, 250000)
+    assert decode_cursor(encode_cursor(timestamp, 42)) == (timestamp, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_keyset_pages_cover_every_message_once_despite_equal_timestamps():
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+        now = datetime.utcnow()
+        async with session_factory() as session:
+            session.add_all([
+                # Pairs of messages share a timestamp, so the ID has to break ties
+                ConversationMessage(user_id="user-1", session_id=f"session-{index % 3}", role="user",
+                                    content=f"message {index}", timestamp=now - timedelta(minutes=index // 2))
+                for index in range(11)
+            ] + [ConversationMessage(user_id="user-2", session_id="other", role="user", content="other",
+                                     timestamp=now)])
+            await session.commit()
+
+            pages, cursor = [], None
+            while True:
+                page = await get_conversations_with_pagination(session, "user-1", "today", 4, cursor)
+                pages.append([item["content"] for item in page["items"]])
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    return pages
+
+    pages = asyncio.run(scenario())
+    assert [len(page) for page in pages] == [4, 4, 3]
+    contents = [content for page in pages for content in page]
+    assert sorted(contents) == sorted(f"message {index}" for index in range(11))
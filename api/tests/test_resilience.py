@@ -0,0 +1,95 @@
+import asyncio
+import httpx
+import pytest
+from openai import APIStatusError
+from api.services.llm_gateway import LLMGateway
+from api.services.model_router import ModelRouter, load_routes
+from api.utils.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, hedged
+
+
+def test_circuit_breaker_opens_probes_and_closes():
+    now = [0.0]
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    now[0] = 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # one probe at a time
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    now[0] = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.consecutive_failures == 0
+
+
+def test_hedged_returns_the_faster_duplicate():
+    delays = [1.0, 0.01]
+    hedges = []
+
+    async def call():
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    result, from_hedge = asyncio.run(hedged(call, 0.05, on_hedge=lambda: hedges.append(1)))
+    assert (result, from_hedge) == (0.01, True)
+    assert hedges == [1]
+
+    delays[:] = [0.01]
+    assert asyncio.run(hedged(call, 0.05)) == (0.01, False)
+
+
+def test_gateway_fails_fast_when_all_circuits_are_open():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(503, json={"error": {"message": "overloaded"}})
+
+    routes = load_routes('{"tiers": {"small": {"models": ["grok-beta"]}}}')
+    gateway = LLMGateway(api_key="test", transport=httpx.MockTransport(handler), max_retries=0,
+                         single_flight=False, router=ModelRouter(routes), circuit_failure_threshold=2)
+
+    for _ in range(2):
+        with pytest.raises(APIStatusError):
+            asyncio.run(gateway.chat_completion(task="title", messages=[]))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(gateway.chat_completion(task="title", messages=[]))
+
+    assert len(requests) == 2
+    assert gateway.circuit_states() == [({"model": "grok-beta"}, 2)]
+
+
+def test_coalesced_callers_record_one_outcome_per_upstream_call():
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(503, json={"error": {"message": "overloaded"}})
+
+    routes = load_routes('{"tiers": {"small": {"models": ["grok-beta"]}}}')
+    router = ModelRouter(routes)
+    gateway = LLMGateway(api_key="test", transport=httpx.MockTransport(handler), max_retries=0,
+                         router=router, circuit_failure_threshold=3)
+
+    async def scenario():
+        return await asyncio.gather(
+            *(gateway.chat_completion(task="title", messages=[]) for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert len(requests) == 1
+    assert all(isinstance(result, APIStatusError) for result in results)
+    # One upstream failure is one sample, however many callers shared it
+    assert gateway.breakers["grok-beta"].consecutive_failures == 1
+    assert gateway.circuit_states() == [({"model": "grok-beta"}, 0)]
+    assert router.stats()["grok-beta"]["samples"] == 1
@@ -0,0 +1,64 @@
+import asyncio
+import time
+from api.services.semantic_cache import SemanticCache, contains_personal_data, normalize_question
+
+# Tiny bag-of-words embedding: near-identical questions get near-identical vectors
+VOCABULARY = ["dmv", "tax", "renew", "license", "california", "texas", "file", "return"]
+
+
+async def fake_embed(text: str):
+    words = normalize_question(text).split()
+    return [float(words.count(word)) for word in VOCABULARY]
+
+
+def _store(cache: SemanticCache, question: str, ministry: str, answer: str) -> None:
+    vector = asyncio.run(cache.embed(question, ministry))
+    cache.put(vector, ministry, question, answer)
+
+
+def _lookup(cache: SemanticCache, question: str, ministry: str):
+    return cache.search(asyncio.run(cache.embed(question, ministry)), ministry)
+
+
+def test_normalize_question():
+    assert normalize_question("  How do I RENEW my license,  in California?? ") == "how do i renew my license in california"
+
+
+def test_similar_question_hits_within_the_same_ministry():
+    cache = SemanticCache(embed=fake_embed, threshold=0.95)
+    _store(cache, "How do I renew my license in California?", "dmv", "Visit dmv.ca.gov")
+
+    assert _lookup(cache, "how do i renew my LICENSE in california", "dmv") == "Visit dmv.ca.gov"
+    assert _lookup(cache, "How do I renew my license in Texas?", "dmv") is None
+    assert _lookup(cache, "How do I renew my license in California?", "tax") is None
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 2}
+
+
+def test_lru_eviction_ttl_and_purge():
+    cache = SemanticCache(embed=fake_embed, threshold=0.95, max_entries=2, ttl_seconds=60)
+    _store(cache, "renew license california", "dmv", "ca")
+    _store(cache, "renew license texas", "dmv", "tx")
+    # Touch the oldest entry, so the next insert evicts "tx"
+    assert _lookup(cache, "renew license california", "dmv") == "ca"
+    _store(cache, "file tax return", "tax", "irs")
+
+    assert _lookup(cache, "renew license texas", "dmv") is None
+    assert _lookup(cache, "file tax return", "tax") == "irs"
+
+    assert cache.purge("tax") == 1
+    assert _lookup(cache, "file tax return", "tax") is None
+
+    for entry in cache._entries.values():
+        entry.created_at = time.time() - 120
+    assert _lookup(cache, "renew license california", "dmv") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_questions_with_personal_data_are_detected():
+    assert contains_personal_data("My PESEL is 90010112345, what benefits do I get?")
+    assert contains_personal_data("Send the form to jan.kowalski@example.com")
+    assert contains_personal_data("Call me at 555-123-4567")
+    assert contains_personal_data("I was born on 01.02.1990")
+    assert not contains_personal_data("How do I renew my license in California?")
+    # Years and form numbers alone are not personal
+    assert not contains_personal_data("How do I fill in form W-2 for 2024?")
@@ -0,0 +1,59 @@
+import asyncio
+import json
+import httpx
+from api.services.llm_gateway import LLMGateway
+from api.utils.stream_utils import StreamAccumulator, sse_event
+
+
+def _chunk(delta: dict, finish_reason=None) -> dict:
+    return {"id": "chatcmpl-1", "object": "chat.completion.chunk", "created": 0, "model": "grok-2-latest",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+
+CHUNKS = [
+    _chunk({"role": "assistant", "content": "Let me "}),
+    _chunk({"content": "check."}),
+    _chunk({"tool_calls": [{"index": 0, "id": "call_a", "type": "function",
+                            "function": {"name": "get_service_links_us", "arguments": ""}}]}),
+    _chunk({"tool_calls": [{"index": 1, "id": "call_b", "type": "function",
+                            "function": {"name": "switch_prompt", "arguments": "{\"minis"}}]}),
+    _chunk({"tool_calls": [{"index": 0, "function": {"arguments": "{\"service\": "}}]}),
+    _chunk({"tool_calls": [{"index": 1, "function": {"arguments": "try\": \"dmv\"}"}}]}),
+    _chunk({"tool_calls": [{"index": 0, "function": {"arguments": "\"dmv\"}"}}]}),
+    _chunk({}, finish_reason="tool_calls"),
+]
+
+
+def _streaming_gateway() -> LLMGateway:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        body = "".join(f"data: {json.dumps(chunk)}\n\n" for chunk in CHUNKS) + "data: [DONE]\n\n"
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    return LLMGateway(api_key="test", transport=httpx.MockTransport(handler))
+
+
+def test_accumulator_assembles_interleaved_tool_call_deltas():
+    async def consume():
+        accumulator = StreamAccumulator()
+        tokens = []
+        async for chunk in _streaming_gateway().stream_chat_completion(model="grok-2-latest", messages=[]):
+            token = accumulator.add(chunk)
+            if token:
+                tokens.append(token)
+        return accumulator, tokens
+
+    accumulator, tokens = asyncio.run(consume())
+
+    assert tokens == ["Let me ", "check."]
+    assert accumulator.content == "Let me check."
+    assert accumulator.finish_reason == "tool_calls"
+    calls = accumulator.tool_calls
+    assert [call.id for call in calls] == ["call_a", "call_b"]
+    assert calls[0].function.name == "get_service_links_us"
+    assert json.loads(calls[0].function.arguments) == {"service": "dmv"}
+    assert json.loads(calls[1].function.arguments) == {"ministry": "dmv"}
+
+
+def test_sse_event_format():
+    assert sse_event("token", {"content": "Cześć"}) == 'event: token\ndata: {"content": "Cześć"}\n\n'
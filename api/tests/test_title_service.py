@@ -0,0 +1,47 @@
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from api.db.models import Base
+from api.db.queries import add_message, get_user_sessions
+from api.services.title_service import refresh_title
+
+
+async def _session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def test_title_is_regenerated_only_after_enough_new_messages():
+    prompts = []
+
+    async def fake_generate(messages):
+        prompts.append([message["content"] for message in messages])
+        return f"Title {len(prompts)}"
+
+    async def scenario():
+        session_factory = await _session_factory()
+        refresh = lambda: refresh_title("user-1", "session-1", session_factory, fake_generate, refresh_messages=4)
+        async with session_factory() as session:
+            assert await refresh() is None
+
+            for turn in range(1, 5):
+                await add_message(session, "user-1", "session-1", "user", f"question {turn}")
+                await add_message(session, "user-1", "session-1", "assistant", f"answer {turn}")
+                await refresh()
+            await add_message(session, "user-1", "session-2", "user", "other question")
+
+            return await get_user_sessions(session, "user-1")
+
+    sessions = asyncio.run(scenario())
+
+    # Generated after the first turn and after 4 more messages; turn 2 and 4 made no model call
+    assert prompts == [
+        ["question 1", "answer 1"],
+        ["question 1", "answer 1", "question 3", "answer 3"],
+    ]
+    assert [(row["session_id"], row["title"], row["message_count"]) for row in sessions] == [
+        ("session-2", None, 1),
+        ("session-1", "Title 2", 8),
+    ]
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import time
+from openai.types.chat import ChatCompletionMessage, ChatCompletionMessageToolCall
+from api.services.tool_engine import ToolEngine, run_tool_loop
+
+
+def _call(call_id: str, name: str, **arguments) -> ChatCompletionMessageToolCall:
+    return ChatCompletionMessageToolCall(id=call_id, type="function",
+                                         function={"name": name, "arguments": json.dumps(arguments)})
+
+
+async def slow_links(state: str) -> dict:
+    await asyncio.sleep(0.2)
+    return {"link": f"https://{state}.gov"}
+
+
+def blocking_prompt(ministry: str) -> dict:
+    time.sleep(0.2)
+    return {"prompt": ministry}
+
+
+async def hanging_tool() -> dict:
+    await asyncio.sleep(10)
+
+
+def test_tool_calls_run_concurrently_with_timeouts_and_errors():
+    engine = ToolEngine({"links": slow_links, "prompt": blocking_prompt, "hang": hanging_tool},
+                        timeouts={"hang": 0.1})
+    calls = [_call("a", "links", state="texas"), _call("b", "prompt", ministry="dmv"),
+             _call("c", "hang"), _call("d", "missing")]
+
+    start = time.perf_counter()
+    results = asyncio.run(engine.run_tool_calls(calls))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.35
+    assert [result["tool_call_id"] for result in results] == ["a", "b", "c", "d"]
+    assert json.loads(results[0]["content"]) == {"link": "https://texas.gov"}
+    assert json.loads(results[1]["content"]) == {"prompt": "dmv"}
+    assert json.loads(results[2]["content"]) == {"error": "Tool hang timed out"}
+    assert "not found" in json.loads(results[3]["content"])["error"]
+
+
+def test_tool_loop_sends_results_back_and_bounds_the_rounds():
+    requests = []
+
+    async def call_model(messages, allow_tools):
+        requests.append((len(messages), allow_tools))
+        if allow_tools:
+            return ChatCompletionMessage(role="assistant", content=None,
+                                         tool_calls=[_call(f"call-{len(requests)}", "links", state="ohio")])
+        return ChatCompletionMessage(role="assistant", content="Here you go")
+
+    messages = [{"role": "user", "content": "Links please"}]
+    answer, executed = asyncio.run(run_tool_loop(call_model, messages, ToolEngine({"links": slow_links}), max_rounds=2))
+
+    assert answer == "Here you go"
+    assert len(executed) == 2
+    # Two tool rounds, the last follow-up is made without tools
+    assert requests == [(1, True), (3, True), (5, False)]
+    assert [message["role"] for message in messages] == ["user", "assistant", "tool", "assistant", "tool"]
+    assert messages[1]["tool_calls"][0]["id"] == "call-1"
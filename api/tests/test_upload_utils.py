@@ -0,0 +1,38 @@
+import asyncio
+import io
+import os
+import pytest
+from fastapi import UploadFile
+from api.utils.upload_utils import UnsupportedUploadError, UploadTooLargeError, sniff_content_type, spool_upload
+
+
+def _upload(data: bytes, filename: str = "form.pdf") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+def test_sniff_content_type_uses_magic_bytes():
+    assert sniff_content_type(b"%PDF-1.7\n...") == "application/pdf"
+    assert sniff_content_type(b"\xff\xd8\xff\xe0JFIF") == "image/jpeg"
+    assert sniff_content_type(b"\x89PNG\r\n\x1a\n....") == "image/png"
+    assert sniff_content_type(b"<html>") is None
+
+
+def test_spool_upload_streams_to_disk_in_chunks():
+    data = b"%PDF-1.4\n" + b"x" * 10_000
+    upload = asyncio.run(spool_upload(_upload(data), chunk_size=1024))
+
+    with upload:
+        assert upload.content_type == "application/pdf"
+        assert upload.size == len(data)
+        assert upload.read_bytes() == data
+    assert not os.path.exists(upload.path)
+
+
+def test_spool_upload_rejects_unknown_content():
+    with pytest.raises(UnsupportedUploadError):
+        asyncio.run(spool_upload(_upload(b"MZ\x90\x00 not a document", "form.pdf")))
+
+
+def test_spool_upload_enforces_size_limit():
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(spool_upload(_upload(b"%PDF-1.4\n" + b"x" * 5000), max_bytes=4096, chunk_size=1024))
@@ -0,0 +1,57 @@
+import base64
+import os
+import stat
+import time
+from api.services.vision_cache import VisionCache, page_cache_key
+
+
+def _page(data: bytes) -> str:
+    return base64.b64encode(data).decode("utf-8")
+
+
+def test_page_cache_key_depends_on_bytes_prompt_version_and_model():
+    key = page_cache_key(_page(b"page-1"), "fields-v1", "grok-2-vision")
+    assert key == page_cache_key(_page(b"page-1"), "fields-v1", "grok-2-vision")
+    assert key != page_cache_key(_page(b"page-2"), "fields-v1", "grok-2-vision")
+    assert key != page_cache_key(_page(b"page-1"), "fields-v2", "grok-2-vision")
+    assert key != page_cache_key(_page(b"page-1"), "fields-v1", "grok-vision-beta")
+
+
+def test_cache_counts_hits_and_misses(tmp_path):
+    cache = VisionCache(str(tmp_path / "cache.sqlite3"), max_bytes=1024)
+    assert cache.get("a") is None
+    cache.put("a", '{"fields": []}')
+    assert cache.get("a") == '{"fields": []}'
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = VisionCache(str(tmp_path / "cache.sqlite3"), max_bytes=30)
+    cache.put("a", "x" * 10)
+    cache.put("b", "y" * 10)
+    cache.get("a")  # "b" becomes the least recently used entry
+    cache.put("c", "z" * 15)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 10
+    assert cache.get("c") == "z" * 15
+    assert cache.stats()["size_bytes"] <= 30
+
+
+def test_cache_file_is_private_and_entries_expire(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = VisionCache(path, max_bytes=1024, ttl_seconds=60)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    cache.put("a", '{"fields": []}')
+    assert cache.get("a") == '{"fields": []}'
+    # Being read does not extend an entry's lifetime
+    cache._conn.execute("UPDATE vision_cache SET created_at = ?", (time.time() - 120,))
+    assert cache.get("a") is None
+
+    cache.put("b", "{}")
+    assert cache.stats()["entries"] == 1
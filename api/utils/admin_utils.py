@@ -0,0 +1,22 @@
+import hmac
+import logging
+import os
+from typing import Optional
+from fastapi import Header, HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+# Shared secret for operational endpoints; they are disabled while it is unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    FastAPI dependency guarding admin endpoints with the X-Admin-Token header.
+
+    Raises:
+        HTTPException: 403 when no admin token is configured or the header does not match it.
+    """
+    if not ADMIN_TOKEN or not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        logger.warning("Rejected request to an admin endpoint")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
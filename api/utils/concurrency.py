@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import os
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Union
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of vision model calls running at the same time for one upload
+VISION_CONCURRENCY = int(os.getenv("VISION_CONCURRENCY", "4"))
+
+
+async def _as_async_iterator(items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def gather_in_order(
+    func: Callable[[Any], Awaitable[Any]],
+    items: Union[Iterable[Any], AsyncIterable[Any]],
+    limit: int = VISION_CONCURRENCY,
+) -> List[Any]:
+    """Runs an async function over items concurrently with a concurrency limit.
+
+    Items are pulled lazily: the next item is only requested once a slot is
+    free, so with a streaming source (e.g. ``aiter_pdf_base64``) at most
+    ``limit`` items are held in memory while earlier calls are still running.
+
+    Args:
+        func (Callable): Coroutine function called once per item.
+        items (Iterable | AsyncIterable): Items to process (e.g. Base64 encoded pages).
+        limit (int): Maximum number of calls in flight at once.
+
+    Returns:
+        List: Results in the same order as ``items``.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+    tasks: List[asyncio.Task] = []
+
+    async def run(item):
+        try:
+            return await func(item)
+        finally:
+            semaphore.release()
+
+    iterator = _as_async_iterator(items)
+    try:
+        while True:
+            await semaphore.acquire()
+            # Stop pulling new items once a call has failed
+            if any(task.done() and not task.cancelled() and task.exception() for task in tasks):
+                semaphore.release()
+                break
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                semaphore.release()
+                break
+            tasks.append(asyncio.create_task(run(item)))
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    finally:
+        await iterator.aclose()
+
+
+class SingleFlight:
+    """Shares one in-flight call between concurrent callers asking for the same key.
+
+    The first caller starts the call; callers arriving while it is still
+    running await the same result (or exception) instead of starting their
+    own. Once the call has finished the key is free again, so nothing is
+    cached beyond the lifetime of the call. A caller being cancelled does not
+    cancel the shared call for the others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Runs ``func`` unless a call for ``key`` is already in flight, and returns its result.
+
+        Args:
+            key (str): Identity of the call, e.g. a hash of the request.
+            func (Callable): Coroutine function making the call.
+
+        Returns:
+            Any: The result of the shared call.
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(func())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    def _forget(self, key: str, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        # Nobody may be left to await a failed call
+        if not future.cancelled():
+            future.exception()
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
+
+
+class KeyedTasks:
+    """Fire-and-forget background tasks with at most one running per key (e.g. per session).
+
+    Used for work that must stay off the request path, such as refreshing a
+    conversation summary or title. A task spawned while another one for the
+    same key is still running is skipped; the next trigger picks up whatever
+    is still missing.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def spawn(self, key: str, func: Callable[[], Awaitable[Any]]) -> bool:
+        """Starts ``func`` in the background unless a task for ``key`` is running.
+
+        Args:
+            key (str): Task key, e.g. the session ID.
+            func (Callable): Coroutine function to run; its errors are logged.
+
+        Returns:
+            bool: True when a new task was started.
+        """
+        task = self._tasks.get(key)
+        if task is not None and not task.done():
+            return False
+
+        async def run():
+            try:
+                await func()
+            except Exception as e:
+                logger.error(f"{self.name} for {key} failed: {str(e)}")
+            finally:
+                if self._tasks.get(key) is asyncio.current_task():
+                    del self._tasks[key]
+
+        self._tasks[key] = asyncio.create_task(run())
+        return True
+
+    async def drain(self) -> None:
+        """Waits for all running tasks, e.g. on shutdown."""
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
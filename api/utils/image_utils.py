@@ -1,8 +1,83 @@
+import asyncio
 import base64
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from PIL import Image
 import io
-from typing import List
-from pdf2image import convert_from_path
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional
+from pdf2image import convert_from_path, pdfinfo_from_path
+from api.utils.image_preprocessing import get_preset, preprocess_image
+
+# Worker processes for rasterization and JPEG/Base64 encoding
+IMAGE_POOL_WORKERS = int(os.getenv("IMAGE_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Jobs submitted to the pool at once; further jobs wait (and are counted as queued)
+IMAGE_POOL_MAX_IN_FLIGHT = int(os.getenv("IMAGE_POOL_MAX_IN_FLIGHT", str(IMAGE_POOL_WORKERS * 2)))
+
+class ImagePool:
+    """Bounded process pool for CPU-bound image work.
+
+    Poppler rendering and JPEG encoding run in worker processes, so they use
+    all cores and never block the event loop. At most ``max_in_flight`` jobs
+    are submitted at once; callers beyond that wait and show up as queued.
+    """
+
+    def __init__(self, max_workers: int = IMAGE_POOL_WORKERS, max_in_flight: int = IMAGE_POOL_MAX_IN_FLIGHT):
+        self.max_workers = max(1, max_workers)
+        self.max_in_flight = max(1, max_in_flight)
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.peak_queued = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Runs a picklable top-level function in the pool and returns its result."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        self.queued += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), partial(func, *args))
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        """Returns queue-depth and throughput counters of the pool."""
+        return {
+            "workers": self.max_workers,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "peak_queued": self.peak_queued,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+image_pool = ImagePool()
 
 def encode_image_to_base64(image_file: Image.Image) -> str:
     """Encodes a PIL image to Base64."""
@@ -11,6 +86,28 @@ def encode_image_to_base64(image_file: Image.Image) -> str:
     except Exception as e:
         raise ValueError(f"Error encoding image to Base64: {e}")
 
+def encode_page_to_base64(image: Image.Image, preset_name: Optional[str] = None) -> str:
+    """Preprocesses a page with an image preset and encodes it to Base64 JPEG.
+
+    Args:
+        image (Image.Image): Page in PIL format.
+        preset_name (str): Name of the preset from IMAGE_PRESETS (default is IMAGE_PRESET).
+
+    Returns:
+        str: Preprocessed page encoded as a Base64 string.
+    """
+    preset = get_preset(preset_name)
+    return pil_image_to_base64(preprocess_image(image, preset), quality=preset.jpeg_quality)
+
+def encode_image_bytes_to_base64(image_bytes: bytes, preset_name: Optional[str] = None) -> str:
+    """Decodes an uploaded JPEG/PNG and re-encodes it as a preprocessed Base64 JPEG."""
+    return encode_page_to_base64(Image.open(io.BytesIO(image_bytes)), preset_name)
+
+def encode_image_file_to_base64(image_path: str, preset_name: Optional[str] = None) -> str:
+    """Reads a JPEG/PNG file and re-encodes it as a preprocessed Base64 JPEG."""
+    with Image.open(image_path) as image:
+        return encode_page_to_base64(image, preset_name)
+
 def convert_pdf_to_images(pdf_path: str, dpi: int = 200) -> List[Image.Image]:
     """Converts a PDF file into a list of PIL images.
 
@@ -27,19 +124,70 @@ def convert_pdf_to_images(pdf_path: str, dpi: int = 200) -> List[Image.Image]:
     except Exception as e:
         raise ValueError(f"Error converting PDF to images: {e}")
 
-def pil_image_to_base64(pil_image: Image.Image, format: str = "JPEG") -> str:
+def get_pdf_page_count(pdf_path: str) -> int:
+    """Returns the number of pages in a PDF file without rendering it."""
+    try:
+        return int(pdfinfo_from_path(pdf_path)["Pages"])
+    except Exception as e:
+        raise ValueError(f"Error reading PDF info: {e}")
+
+def render_pdf_page(pdf_path: str, page_number: int, dpi: int = 200) -> Image.Image:
+    """Renders a single PDF page (1-based) into a PIL image."""
+    try:
+        return convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)[0]
+    except Exception as e:
+        raise ValueError(f"Error converting PDF page {page_number} to image: {e}")
+
+def render_pdf_page_to_base64(pdf_path: str, page_number: int, dpi: int = 200, preset_name: Optional[str] = None) -> str:
+    """Renders a single PDF page, preprocesses it and encodes it to Base64 JPEG."""
+    return encode_page_to_base64(render_pdf_page(pdf_path, page_number, dpi), preset_name)
+
+def iter_pdf_images(pdf_path: str, dpi: int = 200) -> Iterator[Image.Image]:
+    """Yields PDF pages one at a time, so only one rendered page is held in memory.
+
+    Args:
+        pdf_path (str): Path to the PDF file.
+        dpi (int): Image resolution in DPI (default is 200).
+
+    Yields:
+        Image.Image: The next page in PIL format.
+    """
+    for page_number in range(1, get_pdf_page_count(pdf_path) + 1):
+        yield render_pdf_page(pdf_path, page_number, dpi)
+
+async def aiter_pdf_base64(pdf_path: str, dpi: int = 200, preset_name: Optional[str] = None) -> AsyncIterator[str]:
+    """Asynchronously yields PDF pages as Base64 JPEGs, one page at a time.
+
+    Rendering and encoding run in the image process pool, so the next page can
+    be rendered while earlier pages are being analyzed.
+
+    Args:
+        pdf_path (str): Path to the PDF file.
+        dpi (int): Image resolution in DPI (default is 200).
+        preset_name (str): Image preset applied before encoding (default is IMAGE_PRESET).
+
+    Yields:
+        str: The next page encoded as a Base64 string.
+    """
+    page_count = await asyncio.to_thread(get_pdf_page_count, pdf_path)
+    for page_number in range(1, page_count + 1):
+        yield await image_pool.run(render_pdf_page_to_base64, pdf_path, page_number, dpi, preset_name)
+
+def pil_image_to_base64(pil_image: Image.Image, format: str = "JPEG", quality: Optional[int] = None) -> str:
     """Converts a PIL image object to Base64.
 
     Args:
         pil_image (Image.Image): PIL image object.
         format (str): Image format for saving (e.g., 'JPEG', 'PNG').
+        quality (int): JPEG quality (default is Pillow's default).
 
     Returns:
         str: Image encoded as a Base64 string.
     """
     try:
         buffer = io.BytesIO()
-        pil_image.save(buffer, format=format)
+        save_options = {"quality": quality} if quality is not None else {}
+        pil_image.save(buffer, format=format, **save_options)
         return base64.b64encode(buffer.getvalue()).decode("utf-8")
     except Exception as e:
         raise ValueError(f"Error converting PIL image to Base64: {e}")
@@ -0,0 +1,206 @@
+import logging
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from cache hits to slow vision calls
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Metric(ABC):
+    """Base of the metrics kept in the registry; subclasses render their own samples."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> List[Sample]: ...
+
+
+class Counter(Metric):
+    """Monotonic counter, e.g. requests or tokens."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets, e.g. latencies in seconds."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: bucket counts, sum, count
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                labels = dict(zip(self.labelnames, key))
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+                samples.append((f"{self.name}_sum", labels, total))
+                samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class CollectedGauge:
+    """Labeled gauge whose samples are computed at scrape time, e.g. per-model latency percentiles."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, collect: Callable[[], List[Tuple[Dict[str, str], float]]]):
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+
+    def samples(self) -> List[Sample]:
+        try:
+            return [(self.name, labels, value) for labels, value in self.collect()]
+        except Exception as e:
+            logger.warning(f"Collecting {self.name} metrics failed: {e}")
+            return []
+
+
+class StatsGauges:
+    """Gauges read from a component's ``stats()`` dict at scrape time (caches, pools, queues)."""
+
+    type = "gauge"
+
+    def __init__(self, prefix: str, documentation: str, collect: Callable[[], Dict[str, float]]):
+        self.name = prefix
+        self.documentation = documentation
+        self.collect = collect
+
+    def samples(self) -> List[Sample]:
+        try:
+            stats = self.collect() or {}
+        except Exception as e:
+            logger.warning(f"Collecting {self.name} metrics failed: {e}")
+            return []
+        return [(f"{self.name}_{key}", {}, float(value)) for key, value in stats.items()
+                if isinstance(value, (int, float)) and not isinstance(value, bool)]
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics, rendered in the Prometheus text exposition format.
+
+    Kept dependency-free: counters and histograms are updated in memory on the
+    request path and only formatted when ``/metrics`` is scraped.
+    """
+
+    def __init__(self, namespace: str = "govassist"):
+        self.namespace = namespace
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Modules may be re-imported (e.g. in tests); keep the first instance
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(f"{self.namespace}_{name}", documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{self.namespace}_{name}", documentation, labelnames, buckets))
+
+    def register_stats(self, prefix: str, documentation: str, collect: Callable[[], Dict[str, float]]) -> None:
+        with self._lock:
+            name = f"{self.namespace}_{prefix}"
+            self._metrics[name] = StatsGauges(name, documentation, collect)
+
+    def register_gauge(self, name: str, documentation: str,
+                       collect: Callable[[], List[Tuple[Dict[str, str], float]]]) -> None:
+        with self._lock:
+            gauge = CollectedGauge(f"{self.namespace}_{name}", documentation, collect)
+            self._metrics[gauge.name] = gauge
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            samples = metric.samples()
+            if isinstance(metric, StatsGauges):
+                for name, labels, value in samples:
+                    lines.append(f"# HELP {name} {metric.documentation}")
+                    lines.append(f"# TYPE {name} gauge")
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
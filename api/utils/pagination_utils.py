@@ -0,0 +1,41 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """
+    Encodes the position after a row as an opaque cursor for keyset pagination.
+
+    Args:
+        timestamp (datetime): Sort key of the last row of the page.
+        row_id (int): ID of that row, which breaks ties between equal timestamps.
+
+    Returns:
+        str: URL-safe cursor to pass back for the next page.
+    """
+    payload = json.dumps([timestamp.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodes a cursor created by ``encode_cursor``.
+
+    Args:
+        cursor (str): Cursor received from the client.
+
+    Returns:
+        Tuple[datetime, int]: The timestamp and ID of the last row already returned.
+
+    Raises:
+        ValueError: If the cursor was not produced by ``encode_cursor``.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid pagination cursor: {e}")
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+# Numeric values of the states, for gauges
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit {name} is open, retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for a while so callers fail fast.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    ``allow`` refuses every call for ``reset_timeout`` seconds. It then turns
+    half-open and lets a single probe call through: a success closes the
+    circuit, a failure opens it again.
+
+    Args:
+        name (str): Name of the protected dependency, used in logs and errors.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds the circuit stays open before a probe.
+        clock (Callable): Time source, replaceable in tests.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.consecutive_failures = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._probe_started = None
+            return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit lets a probe call through."""
+        return max(0.0, self.reset_timeout - (self.clock() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Whether a call may be made now; in the half-open state only one probe at a time."""
+        state = self.state
+        with self._lock:
+            if state == CLOSED:
+                return True
+            if state == OPEN:
+                return False
+            # A probe that never reported back (e.g. cancelled) is replaced after the reset timeout
+            now = self.clock()
+            if self._probe_started is None or now - self._probe_started >= self.reset_timeout:
+                self._probe_started = now
+                return True
+            return False
+
+    def check(self) -> None:
+        """Like ``allow``, but raises ``CircuitOpenError`` when the call is refused."""
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_after())
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+            self._state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self._state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(f"Circuit {self.name} opened after {self.consecutive_failures} consecutive failures")
+                self._state = OPEN
+                self._opened_at = self.clock()
+                self._probe_started = None
+
+
+async def hedged(
+    call: Callable[[], Awaitable[Any]],
+    delay: Optional[float],
+    on_hedge: Optional[Callable[[], None]] = None,
+) -> Tuple[Any, bool]:
+    """Starts a duplicate call if the first one has not finished after ``delay`` seconds.
+
+    Whichever call succeeds first is returned and the other one is cancelled.
+    A failed call only fails the whole operation once both have failed.
+
+    Args:
+        call (Callable): Creates one attempt; it is called at most twice.
+        delay (float | None): Seconds to wait before hedging; None disables hedging.
+        on_hedge (Callable | None): Called when the duplicate is sent.
+
+    Returns:
+        Tuple: The result and whether it came from the duplicate call.
+    """
+    first = asyncio.ensure_future(call())
+    if delay is None:
+        return await first, False
+
+    attempts = [first]
+    try:
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result(), False
+
+        if on_hedge:
+            on_hedge()
+        attempts.append(asyncio.ensure_future(call()))
+        pending = set(attempts)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result(), attempt is attempts[1]
+                error = error or attempt.exception()
+        raise error
+    finally:
+        for attempt in attempts:
+            if not attempt.done():
+                attempt.cancel()
@@ -0,0 +1,69 @@
+import json
+from typing import Dict, List, Optional
+from openai.types.chat import ChatCompletionChunk, ChatCompletionMessageToolCall
+
+
+def sse_event(event: str, data: dict) -> str:
+    """
+    Formats one Server-Sent Events message.
+
+    Args:
+        event (str): Event name, e.g. "token" or "done".
+        data (dict): JSON payload of the event.
+
+    Returns:
+        str: The encoded event, terminated by a blank line.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class StreamAccumulator:
+    """
+    Rebuilds the assistant message from streamed chat completion chunks.
+
+    Content arrives as plain text deltas. Tool calls arrive in fragments keyed by
+    their index: the first fragment carries the id and function name, the
+    following ones only pieces of the JSON arguments.
+    """
+
+    def __init__(self):
+        self._content: List[str] = []
+        self._tool_calls: Dict[int, dict] = {}
+        self.finish_reason: Optional[str] = None
+
+    def add(self, chunk: ChatCompletionChunk) -> Optional[str]:
+        """Adds a chunk and returns its text delta, if any."""
+        if not chunk.choices:
+            return None
+        choice = chunk.choices[0]
+        if choice.finish_reason:
+            self.finish_reason = choice.finish_reason
+        delta = choice.delta
+
+        for tool_call in delta.tool_calls or []:
+            entry = self._tool_calls.setdefault(tool_call.index, {"id": None, "name": "", "arguments": ""})
+            if tool_call.id:
+                entry["id"] = tool_call.id
+            if tool_call.function:
+                entry["name"] += tool_call.function.name or ""
+                entry["arguments"] += tool_call.function.arguments or ""
+
+        if delta.content:
+            self._content.append(delta.content)
+            return delta.content
+        return None
+
+    @property
+    def content(self) -> str:
+        return "".join(self._content)
+
+    @property
+    def tool_calls(self) -> List[ChatCompletionMessageToolCall]:
+        return [
+            ChatCompletionMessageToolCall(
+                id=entry["id"] or f"call_{index}",
+                type="function",
+                function={"name": entry["name"], "arguments": entry["arguments"] or "{}"},
+            )
+            for index, entry in sorted(self._tool_calls.items())
+        ]
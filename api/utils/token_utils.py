@@ -0,0 +1,34 @@
+from typing import Iterable
+
+# Rough average for English text with the Grok/GPT tokenizers
+CHARS_PER_TOKEN = 4
+# Role and formatting tokens added by the chat format to every message
+TOKENS_PER_MESSAGE = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens of a text without loading a tokenizer.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: Approximate token count.
+    """
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_message_tokens(messages: Iterable[dict]) -> int:
+    """
+    Estimates the prompt tokens of chat messages.
+
+    Args:
+        messages (Iterable[dict]): Messages with a string "content".
+
+    Returns:
+        int: Approximate token count, including the per-message overhead.
+    """
+    return sum(TOKENS_PER_MESSAGE + estimate_tokens(message.get("content") or "") for message in messages)
@@ -0,0 +1,118 @@
+import logging
+import os
+import tempfile
+from typing import Optional
+from fastapi import UploadFile
+
+logger = logging.getLogger(__name__)
+
+# Hard limit for a single uploaded document
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Leading bytes of the supported formats
+MAGIC_BYTES = {
+    b"%PDF-": "application/pdf",
+    b"\xff\xd8\xff": "image/jpeg",
+    b"\x89PNG\r\n\x1a\n": "image/png",
+}
+FILE_SUFFIXES = {
+    "application/pdf": ".pdf",
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+}
+
+
+class UnsupportedUploadError(ValueError):
+    """The upload is not a PDF, JPEG or PNG file."""
+
+
+class UploadTooLargeError(ValueError):
+    """The upload exceeds MAX_UPLOAD_BYTES."""
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Detects the file type from its first bytes, ignoring the client's Content-Type."""
+    # Some PDF producers put a few bytes of garbage before the header
+    if b"%PDF-" in head[:1024]:
+        return "application/pdf"
+    for magic, content_type in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return content_type
+    return None
+
+
+class SpooledUpload:
+    """
+    An upload streamed to a temporary file on disk.
+
+    Use it as a context manager; the file is removed on exit unless ``keep()``
+    was called (e.g. when a background job takes ownership of it).
+    """
+
+    def __init__(self, path: str, content_type: str, size: int):
+        self.path = path
+        self.content_type = content_type
+        self.size = size
+        self._keep = False
+
+    def read_bytes(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def keep(self) -> "SpooledUpload":
+        self._keep = True
+        return self
+
+    def close(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if not self._keep:
+            self.close()
+
+
+async def spool_upload(
+    file: UploadFile,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> SpooledUpload:
+    """
+    Streams an upload to disk in fixed-size chunks.
+
+    The file type is sniffed from the first chunk, before anything is written,
+    and reading stops as soon as the size limit is exceeded, so memory use does
+    not depend on the size of the upload.
+
+    :param file: The uploaded file.
+    :param max_bytes: Maximum accepted size in bytes.
+    :param chunk_size: Size of the chunks read from the request.
+    :return: The spooled upload with its detected content type.
+    :raises UnsupportedUploadError: The file is not a PDF, JPEG or PNG.
+    :raises UploadTooLargeError: The file is larger than ``max_bytes``.
+    """
+    chunk = await file.read(chunk_size)
+    content_type = sniff_content_type(chunk)
+    if content_type is None:
+        raise UnsupportedUploadError(f"Unsupported file content for {file.filename}")
+
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=FILE_SUFFIXES[content_type])
+    size = 0
+    try:
+        with temp_file:
+            while chunk:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds the limit of {max_bytes} bytes")
+                temp_file.write(chunk)
+                chunk = await file.read(chunk_size)
+    except BaseException:
+        os.remove(temp_file.name)
+        raise
+
+    logger.debug(f"Spooled upload {file.filename} ({content_type}, {size} bytes) to {temp_file.name}")
+    return SpooledUpload(temp_file.name, content_type, size)